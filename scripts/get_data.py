@@ -1,312 +1,323 @@
+"""get_data.py
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Download every raw series listed in ``scripts/data_manifest.csv`` (macro
+indicators of 8 countries, currency futures and FX pairs) to CSV.
+
+The manifest has one row per series::
+
+    symbol,bars,timeframe,path
+    EUGDPYY,80,3M,data/raw/economy/EU/eu_gdp_growth.csv
+
+Every series is fetched with ``load_asset_price`` on a bounded thread pool
+and written atomically (temp file in the same folder, then ``os.replace``),
+so a crash never leaves a truncated CSV behind. A series is *skipped* when
+its CSV is already current: the last stored bar had closed when the file was
+written and the bar after it has not closed yet, or the file was refreshed
+less than ``--min-age`` hours ago (macro series are published with a lag). A
+CSV whose last row was still forming when it was written is fetched again. Completed rows are recorded in a
+checkpoint file; an interrupted run started again with the same manifest
+resumes with the rows that are still missing, and the checkpoint is deleted
+once every row succeeded.
+
+Usage (from the repository root)::
+
+    python scripts/get_data.py                   # 8 workers, skip current series
+    python scripts/get_data.py --workers 16 --force
+    python scripts/get_data.py --rate 2          # ≤ 2 request/s, retry on errors
+
+With ``--rate`` every request goes through
+:class:`utils.request_scheduler.RequestScheduler` (token bucket, price
+series before macro series, retry with jittered backoff), so a throttled
+burst is retried instead of being recorded as failed.
+
+Functions
+---------
+read_manifest(path) / download_all(entries, …)
+    Programmatic entry points; ``download_all`` accepts a ``fetch`` callable
+    with the ``load_asset_price`` signature (e.g. a fake source for tests).
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
 import os
-import pandas as pd
-from price_loaders.tradingview import load_asset_price
-
-def save_to_csv(data, folder, filename):
-    filepath = os.path.join(folder, filename)
-    data.to_csv(filepath, index=False)
-    print(f"Lưu dữ liệu thành công vào {filepath}")
-
-# Economy Data
-#European Union (EU)
-eu_gdp_growth                   = load_asset_price("EUGDPYY", 80, "3M", None) 
-eu_interest_rate                = load_asset_price("EUINTR", 240, "1M", None) 
-eu_inflation_rate               = load_asset_price("EUIRYY", 240, "1M", None)
-eu_consumer_price_index         = load_asset_price("EUCPI", 240, "1M", None)
-eu_producer_price_index         = load_asset_price("EUPPI", 240, "1M", None)
-eu_unemployment_rate            = load_asset_price("EUUR", 240, "1M", None)
-eu_trade_balance                = load_asset_price("EUBOT", 240, "1M", None)
-eu_gov_debt                     = load_asset_price("EUGDG", 10, "12M", None)
-eu_consumer_confidence_index    = load_asset_price("EUCCI", 240, "1M", None)
-eu_retail_sales                 = load_asset_price("EURSMM", 2,"1M", None)
-eu_money_supply                 = load_asset_price("EUM2", 2,"1M", None)
-
-# United Kingdom (GB)
-gb_gdp_growth                   = load_asset_price("GBGDPYY", 80, "3M", None)  
-gb_interest_rate                = load_asset_price("GBINTR", 240, "1M", None)  
-gb_inflation_rate               = load_asset_price("GBIRYY", 240, "1M", None)  
-gb_consumer_price_index         = load_asset_price("GBCPI", 240, "1M", None)  
-gb_producer_price_index         = load_asset_price("GBPPI", 240, "1M", None)  
-gb_unemployment_rate            = load_asset_price("ECONOMICS:GBUR", 240, "1M", None)
-gb_trade_balance                = load_asset_price("GBBOT", 240, "1M", None)  
-gb_gov_debt                     = load_asset_price("GBGDG", 10, "12M", None)  
-gb_consumer_confidence_index    = load_asset_price("GBCCI", 240, "1M", None)  
-gb_retail_sales                 = load_asset_price("GBRSMM", 240, "1M", None)  
-gb_money_supply                 = load_asset_price("GBM2", 240, "1M", None)  
-
-# Australia (AU)
-au_gdp_growth                   = load_asset_price("AUGDPYY", 80, "3M", None)  
-au_interest_rate                = load_asset_price("AUINTR", 240, "1M", None)  
-au_inflation_rate               = load_asset_price("AUIRYY", 80, "3M", None)  
-au_consumer_price_index         = load_asset_price("AUCPI", 80, "3M", None)  
-au_producer_price_index         = load_asset_price("AUPPI", 240, "1M", None)  
-au_unemployment_rate            = load_asset_price("AUUR", 240, "1M", None)  
-au_trade_balance                = load_asset_price("AUBOT", 240, "1M", None)  
-au_gov_debt                     = load_asset_price("AUGDG", 10, "12M", None)  
-au_consumer_confidence_index    = load_asset_price("AUCCI", 240, "1M", None)  
-au_retail_sales                 = load_asset_price("AURSMM", 240, "1M", None)  
-au_money_supply                 = load_asset_price("AUM3", 240, "1M", None)  
-
-# New Zealand (NZ)
-nz_gdp_growth                   = load_asset_price("NZGDPYY", 80, "3M", None)  
-nz_interest_rate                = load_asset_price("NZINTR", 240, "1M", None)  
-nz_inflation_rate               = load_asset_price("NZIRYY", 80, "3M", None)  
-nz_consumer_price_index         = load_asset_price("NZCPI", 80, "3M", None)  
-nz_producer_price_index         = load_asset_price("NZPPI", 80, "3M", None)  
-nz_unemployment_rate            = load_asset_price("NZUR", 80, "3M", None)  
-nz_trade_balance                = load_asset_price("NZBOT", 240, "1M", None)  
-nz_gov_debt                     = load_asset_price("NZGDG", 10, "12M", None)  
-nz_consumer_confidence_index    = load_asset_price("NZCCI", 240, "1M", None)  
-nz_retail_sales                 = load_asset_price("NZRSMM", 240, "1M", None)  
-nz_money_supply                 = load_asset_price("NZM2", 240, "1M", None)  
-
-# Canada (CA)
-ca_gdp_growth                   = load_asset_price("CAGDPYY", 80, "3M", None)  
-ca_interest_rate                = load_asset_price("CAINTR", 240, "1M", None)  
-ca_inflation_rate               = load_asset_price("CAIRYY", 240, "1M", None)  
-ca_consumer_price_index         = load_asset_price("CACPI", 240, "1M", None)  
-ca_producer_price_index         = load_asset_price("CAPPI", 240, "1M", None)  
-ca_unemployment_rate            = load_asset_price("CAUR", 240, "1M", None)  
-ca_trade_balance                = load_asset_price("CABOT", 240, "1M", None)  
-ca_gov_debt                     = load_asset_price("CAGDG", 10, "12M", None)  
-ca_consumer_confidence_index    = load_asset_price("CACCI", 240, "1M", None)  
-ca_retail_sales                 = load_asset_price("CARSMM", 240, "1M", None)  
-ca_money_supply                 = load_asset_price("CAM2", 240, "1M", None)  
-
-# Japan (JP)
-jp_gdp_growth                   = load_asset_price("JPGDPYY", 80, "3M", None)  
-jp_interest_rate                = load_asset_price("JPINTR", 240, "1M", None)  
-jp_inflation_rate               = load_asset_price("JPIRYY", 240, "1M", None)  
-jp_consumer_price_index         = load_asset_price("JPCPI", 240, "1M", None)  
-jp_producer_price_index         = load_asset_price("JPPPI", 240, "1M", None)  
-jp_unemployment_rate            = load_asset_price("JPUR", 240, "1M", None)  
-jp_trade_balance                = load_asset_price("JPBOT", 240, "1M", None)  
-jp_gov_debt                     = load_asset_price("JPGDG", 10, "12M", None)  
-jp_consumer_confidence_index    = load_asset_price("JPCCI", 240, "1M", None)  
-jp_retail_sales                 = load_asset_price("JPRSMM", 240, "1M", None)  
-jp_money_supply                 = load_asset_price("JPM2", 240, "1M", None)  
-
-# Switzerland (CH)
-ch_gdp_growth                   = load_asset_price("CHGDPYY", 80, "3M", None)  
-ch_interest_rate                = load_asset_price("CHINTR", 240, "1M", None)  
-ch_inflation_rate               = load_asset_price("CHIRYY", 240, "1M", None)  
-ch_consumer_price_index         = load_asset_price("CHCPI", 240, "1M", None)  
-ch_producer_price_index         = load_asset_price("CHPPI", 240, "1M", None)  
-ch_unemployment_rate            = load_asset_price("CHUR", 240, "1M", None)  
-ch_trade_balance                = load_asset_price("CHBOT", 240, "1M", None)  
-ch_gov_debt                     = load_asset_price("CHGDG", 10, "12M", None)  
-ch_consumer_confidence_index    = load_asset_price("CHCCI", 240, "1M", None)  
-ch_retail_sales                 = load_asset_price("CHRSMM", 240, "1M", None)  
-ch_money_supply                 = load_asset_price("CHM2", 240, "1M", None)  
-
-# United States (US)
-us_gdp_growth                   = load_asset_price("USGDPYY", 80, "3M", None)  
-us_interest_rate                = load_asset_price("USINTR", 240, "1M", None)  
-us_inflation_rate               = load_asset_price("USIRYY", 240, "1M", None)  
-us_consumer_price_index         = load_asset_price("USCPI", 240, "1M", None)  
-us_producer_price_index         = load_asset_price("USPPI", 240, "1M", None)  
-us_unemployment_rate            = load_asset_price("USUR", 240, "1M", None)  
-us_trade_balance                = load_asset_price("USBOT", 240, "1M", None)  
-us_gov_debt                     = load_asset_price("USGDG", 10, "12M", None)  
-us_consumer_confidence_index    = load_asset_price("USCCI", 240, "1M", None)  
-us_retail_sales                 = load_asset_price("USRSMM", 240, "1M", None)  
-us_money_supply                 = load_asset_price("USM2", 240, "1M", None)  
-
-
-
-# EU
-save_to_csv(eu_gdp_growth,          "data/raw/economy/EU/", "eu_gdp_growth.csv")
-save_to_csv(eu_interest_rate,       "data/raw/economy/EU/", "eu_interest_rate.csv")
-save_to_csv(eu_inflation_rate,      "data/raw/economy/EU/", "eu_inflation_rate.csv")
-save_to_csv(eu_consumer_price_index, "data/raw/economy/EU/", "eu_consumer_price_index.csv")
-save_to_csv(eu_producer_price_index, "data/raw/economy/EU/", "eu_producer_price_index.csv")
-save_to_csv(eu_unemployment_rate,   "data/raw/economy/EU/", "eu_unemployment_rate.csv")
-save_to_csv(eu_trade_balance,       "data/raw/economy/EU/", "eu_trade_balance.csv")
-save_to_csv(eu_gov_debt,            "data/raw/economy/EU/", "eu_gov_debt.csv")
-save_to_csv(eu_consumer_confidence_index, "data/raw/economy/EU/", "eu_consumer_confidence_index.csv")
-save_to_csv(eu_retail_sales,        "data/raw/economy/EU/", "eu_retail_sales.csv")
-save_to_csv(eu_money_supply,        "data/raw/economy/EU/", "eu_money_supply.csv")
-
-# GB
-save_to_csv(gb_gdp_growth,          "data/raw/economy/GB/", "gb_gdp_growth.csv")
-save_to_csv(gb_interest_rate,       "data/raw/economy/GB/", "gb_interest_rate.csv")
-save_to_csv(gb_inflation_rate,      "data/raw/economy/GB/", "gb_inflation_rate.csv")
-save_to_csv(gb_consumer_price_index, "data/raw/economy/GB/", "gb_consumer_price_index.csv")
-save_to_csv(gb_producer_price_index, "data/raw/economy/GB/", "gb_producer_price_index.csv")
-save_to_csv(gb_unemployment_rate,   "data/raw/economy/GB/", "gb_unemployment_rate.csv")
-save_to_csv(gb_trade_balance,       "data/raw/economy/GB/", "gb_trade_balance.csv")
-save_to_csv(gb_gov_debt,            "data/raw/economy/GB/", "gb_gov_debt.csv")
-save_to_csv(gb_consumer_confidence_index, "data/raw/economy/GB/", "gb_consumer_confidence_index.csv")
-save_to_csv(gb_retail_sales,        "data/raw/economy/GB/", "gb_retail_sales.csv")
-save_to_csv(gb_money_supply,        "data/raw/economy/GB/", "gb_money_supply.csv")
-
-# AU
-save_to_csv(au_gdp_growth,          "data/raw/economy/AU/", "au_gdp_growth.csv")
-save_to_csv(au_interest_rate,       "data/raw/economy/AU/", "au_interest_rate.csv")
-save_to_csv(au_inflation_rate,      "data/raw/economy/AU/", "au_inflation_rate.csv")
-save_to_csv(au_consumer_price_index, "data/raw/economy/AU/", "au_consumer_price_index.csv")
-save_to_csv(au_producer_price_index, "data/raw/economy/AU/", "au_producer_price_index.csv")
-save_to_csv(au_unemployment_rate,   "data/raw/economy/AU/", "au_unemployment_rate.csv")
-save_to_csv(au_trade_balance,       "data/raw/economy/AU/", "au_trade_balance.csv")
-save_to_csv(au_gov_debt,            "data/raw/economy/AU/", "au_gov_debt.csv")
-save_to_csv(au_consumer_confidence_index, "data/raw/economy/AU/", "au_consumer_confidence_index.csv")
-save_to_csv(au_retail_sales,        "data/raw/economy/AU/", "au_retail_sales.csv")
-save_to_csv(au_money_supply,        "data/raw/economy/AU/", "au_money_supply.csv")
-
-# NZ
-save_to_csv(nz_gdp_growth,          "data/raw/economy/NZ/", "nz_gdp_growth.csv")
-save_to_csv(nz_interest_rate,       "data/raw/economy/NZ/", "nz_interest_rate.csv")
-save_to_csv(nz_inflation_rate,      "data/raw/economy/NZ/", "nz_inflation_rate.csv")
-save_to_csv(nz_consumer_price_index, "data/raw/economy/NZ/", "nz_consumer_price_index.csv")
-save_to_csv(nz_producer_price_index, "data/raw/economy/NZ/", "nz_producer_price_index.csv")
-save_to_csv(nz_unemployment_rate,   "data/raw/economy/NZ/", "nz_unemployment_rate.csv")
-save_to_csv(nz_trade_balance,       "data/raw/economy/NZ/", "nz_trade_balance.csv")
-save_to_csv(nz_gov_debt,            "data/raw/economy/NZ/", "nz_gov_debt.csv")
-save_to_csv(nz_consumer_confidence_index, "data/raw/economy/NZ/", "nz_consumer_confidence_index.csv")
-save_to_csv(nz_retail_sales,        "data/raw/economy/NZ/", "nz_retail_sales.csv")
-save_to_csv(nz_money_supply,        "data/raw/economy/NZ/", "nz_money_supply.csv")
-
-# CA
-save_to_csv(ca_gdp_growth,          "data/raw/economy/CA/", "ca_gdp_growth.csv")
-save_to_csv(ca_interest_rate,       "data/raw/economy/CA/", "ca_interest_rate.csv")
-save_to_csv(ca_inflation_rate,      "data/raw/economy/CA/", "ca_inflation_rate.csv")
-save_to_csv(ca_consumer_price_index, "data/raw/economy/CA/", "ca_consumer_price_index.csv")
-save_to_csv(ca_producer_price_index, "data/raw/economy/CA/", "ca_producer_price_index.csv")
-save_to_csv(ca_unemployment_rate,   "data/raw/economy/CA/", "ca_unemployment_rate.csv")
-save_to_csv(ca_trade_balance,       "data/raw/economy/CA/", "ca_trade_balance.csv")
-save_to_csv(ca_gov_debt,            "data/raw/economy/CA/", "ca_gov_debt.csv")
-save_to_csv(ca_consumer_confidence_index, "data/raw/economy/CA/", "ca_consumer_confidence_index.csv")
-save_to_csv(ca_retail_sales,        "data/raw/economy/CA/", "ca_retail_sales.csv")
-save_to_csv(ca_money_supply,        "data/raw/economy/CA/", "ca_money_supply.csv")
-
-# JP
-save_to_csv(jp_gdp_growth,          "data/raw/economy/JP/", "jp_gdp_growth.csv")
-save_to_csv(jp_interest_rate,       "data/raw/economy/JP/", "jp_interest_rate.csv")
-save_to_csv(jp_inflation_rate,      "data/raw/economy/JP/", "jp_inflation_rate.csv")
-save_to_csv(jp_consumer_price_index, "data/raw/economy/JP/", "jp_consumer_price_index.csv")
-save_to_csv(jp_producer_price_index, "data/raw/economy/JP/", "jp_producer_price_index.csv")
-save_to_csv(jp_unemployment_rate,   "data/raw/economy/JP/", "jp_unemployment_rate.csv")
-save_to_csv(jp_trade_balance,       "data/raw/economy/JP/", "jp_trade_balance.csv")
-save_to_csv(jp_gov_debt,            "data/raw/economy/JP/", "jp_gov_debt.csv")
-save_to_csv(jp_consumer_confidence_index, "data/raw/economy/JP/", "jp_consumer_confidence_index.csv")
-save_to_csv(jp_retail_sales,        "data/raw/economy/JP/", "jp_retail_sales.csv")
-save_to_csv(jp_money_supply,        "data/raw/economy/JP/", "jp_money_supply.csv")
-
-# CH
-save_to_csv(ch_gdp_growth,          "data/raw/economy/CH/", "ch_gdp_growth.csv")
-save_to_csv(ch_interest_rate,       "data/raw/economy/CH/", "ch_interest_rate.csv")
-save_to_csv(ch_inflation_rate,      "data/raw/economy/CH/", "ch_inflation_rate.csv")
-save_to_csv(ch_consumer_price_index, "data/raw/economy/CH/", "ch_consumer_price_index.csv")
-save_to_csv(ch_producer_price_index, "data/raw/economy/CH/", "ch_producer_price_index.csv")
-save_to_csv(ch_unemployment_rate,   "data/raw/economy/CH/", "ch_unemployment_rate.csv")
-save_to_csv(ch_trade_balance,       "data/raw/economy/CH/", "ch_trade_balance.csv")
-save_to_csv(ch_gov_debt,            "data/raw/economy/CH/", "ch_gov_debt.csv")
-save_to_csv(ch_consumer_confidence_index, "data/raw/economy/CH/", "ch_consumer_confidence_index.csv")
-save_to_csv(ch_retail_sales,        "data/raw/economy/CH/", "ch_retail_sales.csv")
-save_to_csv(ch_money_supply,        "data/raw/economy/CH/", "ch_money_supply.csv")
-
-# US
-save_to_csv(us_gdp_growth,          "data/raw/economy/US/", "us_gdp_growth.csv")
-save_to_csv(us_interest_rate,       "data/raw/economy/US/", "us_interest_rate.csv")
-save_to_csv(us_inflation_rate,      "data/raw/economy/US/", "us_inflation_rate.csv")
-save_to_csv(us_consumer_price_index, "data/raw/economy/US/", "us_consumer_price_index.csv")
-save_to_csv(us_producer_price_index, "data/raw/economy/US/", "us_producer_price_index.csv")
-save_to_csv(us_unemployment_rate,   "data/raw/economy/US/", "us_unemployment_rate.csv")
-save_to_csv(us_trade_balance,       "data/raw/economy/US/", "us_trade_balance.csv")
-save_to_csv(us_gov_debt,            "data/raw/economy/US/", "us_gov_debt.csv")
-save_to_csv(us_consumer_confidence_index, "data/raw/economy/US/", "us_consumer_confidence_index.csv")
-save_to_csv(us_retail_sales,        "data/raw/economy/US/", "us_retail_sales.csv")
-save_to_csv(us_money_supply,        "data/raw/economy/US/", "us_money_supply.csv")
-
-
-# Currency futures Data
-#Euro FX Futures
-eu_future = load_asset_price("6E1!", 480, "1M", None)
-
-#Australian Dollar Futures
-au_future = load_asset_price("6A1!", 480, "1M", None)
-
-#British Pound Futures
-gb_future = load_asset_price("6B1!", 480, "1M", None)
-
-#New Zealand Futures
-nz_future = load_asset_price("6N1!", 480, "1M", None)
-
-#Japanese Futures
-jp_future = load_asset_price("6J1!", 480, "1M", None)
-
-#Canadia Futures
-ca_future = load_asset_price("6C1!", 480, "1M", None)
-
-#Swiss Franc Futures
-ch_future = load_asset_price("6S1!", 480, "1M", None)
-
-#U.S. Dollar Index Futures
-us_future = load_asset_price("DX1!", 480, "1M", None)
-
-#EU
-save_to_csv(eu_future, "data/raw/currency/EU", "eu_future.csv")
-
-#AU
-save_to_csv(au_future, "data/raw/currency/AU", "au_future.csv")
-
-#GB
-save_to_csv(gb_future, "data/raw/currency/GB", "gb_future.csv")
-
-#NZ
-save_to_csv(nz_future, "data/raw/currency/NZ", "nz_future.csv")
-
-#JP
-save_to_csv(jp_future, "data/raw/currency/JP", "jp_future.csv")
-
-#CA
-save_to_csv(ca_future, "data/raw/currency/CA", "ca_future.csv")
-
-#CH
-save_to_csv(ch_future, "data/raw/currency/CH", "ch_future.csv")
-
-#US
-save_to_csv(us_future, "data/raw//currency/US", "us_future.csv")
-
-# FOREX Market Data
-# EUR/USD
-eurusd_future = load_asset_price("EURUSD", 480, "1M", None)
-
-# AUD/USD
-audusd_future = load_asset_price("AUDUSD", 480, "1M", None)
-
-# GBP/USD
-gbpusd_future = load_asset_price("GBPUSD", 480, "1M", None)
-
-# NZD/USD
-nzdusd_future = load_asset_price("NZDUSD", 480, "1M", None)
-
-# USD/JPY
-usdjpy_future = load_asset_price("USDJPY", 480, "1M", None)
-
-# USD/CAD
-usdcad_future = load_asset_price("USDCAD", 480, "1M", None)
-
-# USD/CHF
-usdchf_future = load_asset_price("USDCHF", 480, "1M", None)
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable
 
-# EUR/USD
-save_to_csv(eurusd_future, "data/raw/forex/EURUSD", "eurusd.csv")
-
-# AUD/USD
-save_to_csv(audusd_future, "data/raw/forex/AUDUSD", "audusd.csv")
-
-# GBP/USD
-save_to_csv(gbpusd_future, "data/raw/forex/GBPUSD", "gbpusd.csv")
-
-# NZD/USD
-save_to_csv(nzdusd_future, "data/raw/forex/NZDUSD", "nzdusd.csv")
-
-# USD/JPY
-save_to_csv(usdjpy_future, "data/raw/forex/USDJPY", "usdjpy.csv")
-
-# USD/CAD
-save_to_csv(usdcad_future, "data/raw/forex/USDCAD", "usdcad.csv")
+import pandas as pd
 
-# USD/CHF
-save_to_csv(usdchf_future, "data/raw/forex/USDCHF", "usdchf.csv")
\ No newline at end of file
+MANIFEST = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_manifest.csv")
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+CHECKPOINT = "data/raw/.get_data_checkpoint.json"
+
+# Độ dài một bar theo timeframe (bar kế tiếp mở sau mốc này)
+BAR_OFFSETS: dict[str, pd.DateOffset] = {
+    "1D": pd.DateOffset(days=1),
+    "1W": pd.DateOffset(weeks=1),
+    "1M": pd.DateOffset(months=1),
+    "3M": pd.DateOffset(months=3),
+    "12M": pd.DateOffset(months=12),
+}
+
+Fetcher = Callable[[str, int, str, None], "pd.DataFrame | None"]
+
+###############################################################################
+# 1️⃣  Manifest                                                               #
+###############################################################################
+
+@dataclass(frozen=True)
+class Entry:
+    symbol: str
+    bars: int
+    timeframe: str
+    path: str
+
+
+def read_manifest(path: str = MANIFEST) -> list[Entry]:
+    """Parse the manifest CSV (``symbol,bars,timeframe,path``)."""
+
+    with open(path, newline="", encoding="utf-8") as f:
+        entries = [
+            Entry(row["symbol"].strip(), int(row["bars"]), row["timeframe"].strip(), row["path"].strip())
+            for row in csv.DictReader(f)
+            if row.get("symbol")
+        ]
+    paths = [e.path for e in entries]
+    if len(set(paths)) != len(paths):
+        raise ValueError("Manifest has duplicate output paths.")
+    for e in entries:
+        if e.timeframe not in BAR_OFFSETS:
+            raise ValueError(f"Unknown timeframe '{e.timeframe}' for {e.symbol}.")
+    return entries
+
+###############################################################################
+# 2️⃣  Kiểm tra "đã mới nhất"                                                 #
+###############################################################################
+
+def last_timestamp(path: str) -> pd.Timestamp | None:
+    """Read the ``time`` of the last row of *path* without parsing the whole CSV."""
+
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        header = f.readline().decode("utf-8").strip().split(",")
+        if "time" not in header:
+            return None
+        # Đọc ngược từng khối tới khi có trọn dòng cuối
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        block = b""
+        step = 4096
+        while end > 0 and block.count(b"\n") < 2:
+            start = max(end - step, 0)
+            f.seek(start)
+            block = f.read(end - start) + block
+            end = start
+    lines = [line for line in block.decode("utf-8").splitlines() if line.strip()]
+    if len(lines) < 1 or lines[-1].split(",") == header:
+        return None
+    try:
+        return pd.Timestamp(lines[-1].split(",")[header.index("time")])
+    except (ValueError, IndexError):
+        return None
+
+
+def is_current(entry: Entry, now: pd.Timestamp, min_age: float) -> bool:
+    """True if *entry*'s CSV needs no download."""
+
+    last = last_timestamp(entry.path)
+    if last is None:
+        return False
+    if last.tzinfo is None:
+        last = last.tz_localize("UTC")
+    offset = BAR_OFFSETS[entry.timeframe]
+    mtime = os.path.getmtime(entry.path)
+    written = pd.Timestamp(mtime, unit="s", tz="UTC")
+    # Bar cuối đã đóng khi file được ghi (giá trị là giá đóng cửa cuối cùng)
+    # và bar kế tiếp chưa đóng → chưa có bar hoàn chỉnh nào mới. Bar cuối
+    # còn đang hình thành lúc ghi thì phải tải lại.
+    if written >= last + offset and now < last + 2 * offset:
+        return True
+    # Vừa tải gần đây (dữ liệu vĩ mô công bố trễ)
+    return time.time() - mtime < min_age * 3600
+
+###############################################################################
+# 3️⃣  Tải song song + checkpoint                                             #
+###############################################################################
+
+def download_all(
+    entries: list[Entry],
+    fetch: Fetcher | None = None,
+    workers: int = 8,
+    force: bool = False,
+    min_age: float = 12,
+    checkpoint: str | None = CHECKPOINT,
+) -> dict[str, list[str]]:
+    """Download every entry that is not current.
+
+    Parameters
+    ----------
+    entries : list[Entry]
+        Các dòng manifest.
+    fetch : callable | None
+        Hàm có chữ ký ``load_asset_price(symbol, bars, timeframe, None)``;
+        mặc định là ``price_loaders.tradingview.load_asset_price``.
+    workers : int, default=8
+        Số request chạy đồng thời.
+    force : bool, default=False
+        Tải lại mọi dòng (bỏ qua kiểm tra mới nhất và checkpoint).
+    min_age : float, default=12
+        File được ghi trong vòng *min_age* giờ được coi là mới nhất.
+    checkpoint : str | None
+        File ghi các dòng đã xong; ``None`` → không dùng checkpoint.
+
+    Returns
+    -------
+    dict[str, list[str]]
+        ``{"downloaded": [...], "skipped": [...], "failed": [...]}`` (đường dẫn).
+    """
+
+    if fetch is None:
+        from price_loaders.tradingview import load_asset_price as fetch
+
+    now = pd.Timestamp.now(tz="UTC")
+    run_id = _manifest_id(entries)
+    done = set() if force else _read_checkpoint(checkpoint, run_id)
+
+    result: dict[str, list[str]] = {"downloaded": [], "skipped": [], "failed": []}
+    todo = []
+    for entry in entries:
+        if entry.path in done or (not force and is_current(entry, now, min_age)):
+            result["skipped"].append(entry.path)
+        else:
+            todo.append(entry)
+
+    lock = threading.Lock()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="get_data") as pool:
+        futures = {pool.submit(_download_one, entry, fetch): entry for entry in todo}
+        for future in as_completed(futures):
+            entry = futures[future]
+            try:
+                rows = future.result()
+            except Exception as exc:  # noqa: BLE001  # một series lỗi không dừng cả lượt
+                print(f"❌ {entry.symbol} → {entry.path}: {exc}")
+                result["failed"].append(entry.path)
+                continue
+            print(f"✅ {entry.symbol} ({rows} bars) → {entry.path}")
+            with lock:
+                result["downloaded"].append(entry.path)
+                done.add(entry.path)
+                _write_checkpoint(checkpoint, run_id, done)
+
+    # Xong trọn vẹn → xoá checkpoint; còn lỗi → giữ để chạy lại tiếp tục
+    if checkpoint is not None and not result["failed"] and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"⏱️ {len(result['downloaded'])} downloaded, {len(result['skipped'])} skipped, "
+        f"{len(result['failed'])} failed in {elapsed:.2f}s (workers={workers})"
+    )
+    return result
+
+
+def _download_one(entry: Entry, fetch: Fetcher) -> int:
+    df = fetch(entry.symbol, entry.bars, entry.timeframe, None)
+    if df is None or df.empty:
+        raise ValueError("empty response")
+    _atomic_csv(df, entry.path)
+    return len(df)
+
+
+def _atomic_csv(df: pd.DataFrame, path: str) -> None:
+    folder = os.path.dirname(path) or "."
+    os.makedirs(folder, exist_ok=True)
+    tmp = os.path.join(folder, f".{os.path.basename(path)}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        df.to_csv(tmp, index=False)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _manifest_id(entries: list[Entry]) -> str:
+    text = "\n".join(f"{e.symbol},{e.bars},{e.timeframe},{e.path}" for e in entries)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _read_checkpoint(path: str | None, run_id: str) -> set[str]:
+    if path is None or not os.path.exists(path):
+        return set()
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return set()
+    # Checkpoint của manifest khác → bỏ qua
+    return set(state.get("done", [])) if state.get("manifest") == run_id else set()
+
+
+def _write_checkpoint(path: str | None, run_id: str, done: set[str]) -> None:
+    if path is None:
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"manifest": run_id, "done": sorted(done)}, f)
+    os.replace(tmp, path)
+
+###############################################################################
+# 4️⃣  CLI                                                                    #
+###############################################################################
+
+def main(argv: list[str] | None = None) -> dict[str, list[str]]:
+    parser = argparse.ArgumentParser(description="Download the raw CSV series listed in the manifest.")
+    parser.add_argument("--manifest", default=MANIFEST)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--force", action="store_true", help="re-download every series")
+    parser.add_argument("--min-age", type=float, default=12, help="hours a fresh file counts as current")
+    parser.add_argument("--checkpoint", default=CHECKPOINT)
+    parser.add_argument("--rate", type=float, default=None, help="max requests per second (enables retries)")
+    parser.add_argument("--retries", type=int, default=4, help="retries per series with --rate")
+    args = parser.parse_args(argv)
+
+    entries = read_manifest(args.manifest)
+    if args.rate is None:
+        return download_all(entries, workers=args.workers, force=args.force,
+                            min_age=args.min_age, checkpoint=args.checkpoint)
+
+    if SRC not in sys.path:
+        sys.path.insert(0, SRC)
+    from utils.request_scheduler import MACRO, PRICE, RequestScheduler
+
+    # Series vĩ mô (data/raw/economy/...) xếp sau giá / futures
+    priority = {e.symbol: MACRO if "/economy/" in e.path.replace(os.sep, "/") else PRICE for e in entries}
+    with RequestScheduler(rate=args.rate, workers=args.workers, max_retries=args.retries) as scheduler:
+        result = download_all(
+            entries,
+            fetch=lambda symbol, bars, timeframe, _=None: scheduler.fetch(
+                symbol, bars, timeframe, priority=priority.get(symbol, PRICE)),
+            workers=args.workers,
+            force=args.force,
+            min_age=args.min_age,
+            checkpoint=args.checkpoint,
+        )
+        stats = scheduler.stats()
+    print(
+        f"📶 {stats['attempts']} requests ({stats['retries']} retries), "
+        f"latency p50={stats['latency_p50']:.2f}s p95={stats['latency_p95']:.2f}s"
+    )
+    return result
+
+
+if __name__ == "__main__":
+    main()
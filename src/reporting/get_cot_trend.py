@@ -1,38 +1,81 @@
-from technical.cot_index import cot_index
+import numpy as np
+from technical.cot_index import cot_index, cot_index_panel
+
+
+def _extreme_masks(cot_com, cot_ret, upperExtreme, lowerExtreme):
+    # Bullish: commercial cực cao & retail cực thấp; Bearish: ngược lại (NaN → False)
+    bullish = (cot_com >= upperExtreme) & (cot_ret <= lowerExtreme)
+    bearish = (cot_com <= lowerExtreme) & (cot_ret >= upperExtreme)
+    return bullish, bearish
+
 
 def get_cot_trend(cot_df, weeks=26, upperExtreme=80, lowerExtreme=20):
+    """
+    Tìm tuần cực trị gần nhất (bỏ tháng cuối chưa hoàn chỉnh).
+    Trả về dict {'trend', 'date', 'commercial', 'retail'} hoặc None nếu không có.
+    """
     # Tạo dataframe COT index tuần
     df_ = cot_index(cot_df, weeks)
 
-    # Lấy tháng cuối cùng trong dữ liệu
+    # Bỏ toàn bộ tuần thuộc tháng cuối cùng (vì tháng cuối chưa hoàn chỉnh)
     last_date = df_['date'].max()
-    last_month = last_date.month
-    last_year = last_date.year
+    dates = df_['date']
+    keep = (dates.dt.year < last_date.year) | ((dates.dt.year == last_date.year) & (dates.dt.month < last_date.month))
 
-    # Bỏ toàn bộ tuần thuộc tháng cuối cùng (vì tháng cuối chưa hoàn chỉnh)
-    df_filtered = df_[(df_['date'].dt.year < last_year) | ((df_['date'].dt.year == last_year) & (df_['date'].dt.month < last_month))]
-
-    # Lùi tuần từng bản ghi một
-    for idx in range(len(df_filtered)-1, -1, -1):
-        row = df_filtered.iloc[idx]
-        cot_com = row['cot_index_commercial']
-        cot_ret = row['cot_index_retail']
-
-        bullish_mask = (cot_com >= upperExtreme) and (cot_ret <= lowerExtreme)
-        bearish_mask = (cot_com <= lowerExtreme) and (cot_ret >= upperExtreme)
-
-        # print(f"Kiểm tra tuần {row['date'].date()}: Commercial={cot_com:.2f}, Retail={cot_ret:.2f}")
-
-        if bullish_mask:
-            return (f"Uptrend\n"
-                    f"Date: {row['date'].date()}\n"
-                    f"Commercial COT Index: {cot_com:.2f}\n"
-                    f"Retail COT Index: {cot_ret:.2f}")
-        elif bearish_mask:
-            return (f"Downtrend\n"
-                    f"Date: {row['date'].date()}\n"
-                    f"Commercial COT Index: {cot_com:.2f}\n"
-                    f"Retail COT Index: {cot_ret:.2f}")
-
-    print("Không tìm được xu hướng rõ ràng trong dữ liệu.")
-    return None, None
\ No newline at end of file
+    cot_com = df_['cot_index_commercial'].to_numpy(dtype=float)
+    cot_ret = df_['cot_index_retail'].to_numpy(dtype=float)
+    bullish, bearish = _extreme_masks(cot_com, cot_ret, upperExtreme, lowerExtreme)
+
+    # Tuần gần nhất thoả một trong hai điều kiện
+    hits = np.flatnonzero((bullish | bearish) & keep.to_numpy())
+    if len(hits) == 0:
+        print("Không tìm được xu hướng rõ ràng trong dữ liệu.")
+        return None
+
+    i = hits[-1]
+    return {
+        'trend': 'Uptrend' if bullish[i] else 'Downtrend',
+        'date': dates.iloc[i],
+        'commercial': cot_com[i],
+        'retail': cot_ret[i],
+    }
+
+
+def get_cot_trends(source, weeks=26, upperExtreme=80, lowerExtreme=20, markets=None):
+    """
+    Bản batch của get_cot_trend cho mọi thị trường (CotStore hoặc DataFrame có cột 'market').
+    Trả về DataFrame index 'market' với các cột trend, date, commercial, retail;
+    chỉ gồm các thị trường có tín hiệu.
+    """
+    panel = cot_index_panel(source, weeks, markets)
+
+    # Bỏ tháng cuối của từng thị trường
+    dates = panel.index.get_level_values('date')
+    month = dates.year * 12 + dates.month
+    last_month = panel.assign(_m=month).groupby(level='market')['_m'].transform('max').to_numpy()
+    keep = month.to_numpy() < last_month
+
+    cot_com = panel['cot_index_commercial'].to_numpy(dtype=float)
+    cot_ret = panel['cot_index_retail'].to_numpy(dtype=float)
+    bullish, bearish = _extreme_masks(cot_com, cot_ret, upperExtreme, lowerExtreme)
+
+    # Vị trí cuối cùng thoả điều kiện trong mỗi thị trường
+    hits = np.flatnonzero((bullish | bearish) & keep)
+    codes = panel.index.codes[0][hits]
+    last = hits[np.r_[codes[1:] != codes[:-1], True]] if len(hits) else hits
+
+    result = panel.iloc[last].reset_index()[['market', 'date']]
+    result.insert(1, 'trend', np.where(bullish[last], 'Uptrend', 'Downtrend'))
+    result['commercial'] = cot_com[last]
+    result['retail'] = cot_ret[last]
+    return result.set_index('market')
+
+
+def format_cot_trend(signal):
+    """Chuỗi hiển thị trong bảng báo cáo."""
+    if signal is None:
+        return "N/A"
+    return (f"{signal['trend']}\n"
+            f"Date: {signal['date'].date()}\n"
+            f"Commercial COT Index: {signal['commercial']:.2f}\n"
+            f"Retail COT Index: {signal['retail']:.2f}")
@@ -1,39 +1,115 @@
+import numpy as np
 import pandas as pd
-from technical.moving_averages import moving_averages
-def get_ma_trend(df, timeframe):
-    df = df.copy()
-    df = moving_averages(df)
-    df['time'] = pd.to_datetime(df['time'])
+from technical.moving_averages import moving_average_array
+from technical.ohlcv import OHLCV
 
-    last_date = df['time'].max()
+MA_WINDOWS = [30, 60, 90]
 
+
+def _period_start(last_date, timeframe):
+    # Mốc đầu kỳ hiện tại (tháng / quý / năm) — các nến từ mốc này bị bỏ
     if timeframe == 'D':
-        mask = (df['time'].dt.month != last_date.month) | (df['time'].dt.year != last_date.year)
+        return last_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0, nanosecond=0)
+    if timeframe == 'W':
+        month = (last_date.month - 1) // 3 * 3 + 1
+        return last_date.replace(month=month, day=1, hour=0, minute=0, second=0, microsecond=0, nanosecond=0)
+    return last_date.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0, nanosecond=0)
+
+
+def get_ma_trend(df, timeframe, tail=False):
+    # df: DataFrame hoặc OHLCV (OHLCV luôn tăng dần theo time → dùng đường tail trên mảng)
+    if timeframe not in ('D', 'W', 'M'):
+        return None
+    if isinstance(df, OHLCV):
+        return _ma_trend_bars(df, timeframe)
+    if tail:
+        return _ma_trend_tail(df, timeframe)
+
+    # Tính MA trên mảng close (không sao chép / thêm cột vào DataFrame)
+    times = df['time']
+    if not pd.api.types.is_datetime64_any_dtype(times):
+        times = pd.to_datetime(times)
+    close = df['close'].to_numpy(dtype=float)
+
+    last_date = times.max()
+
+    if timeframe == 'D':
+        mask = (times.dt.month != last_date.month) | (times.dt.year != last_date.year)
     elif timeframe == 'W':
         current_quarter = (last_date.month - 1) // 3 + 1
-        mask = ~((df['time'].dt.year == last_date.year) & ((df['time'].dt.month - 1) // 3 + 1 == current_quarter))
-    elif timeframe == 'M':
-        mask = df['time'].dt.year < last_date.year
+        mask = ~((times.dt.year == last_date.year) & ((times.dt.month - 1) // 3 + 1 == current_quarter))
     else:
+        mask = times.dt.year < last_date.year
+
+    ready = mask.to_numpy() & ~np.isnan(moving_average_array(close, MA_WINDOWS)).any(axis=1)
+    rows = np.flatnonzero(ready)
+    if len(rows) == 0:
+        return None
+
+    return _format_trend(close, times.iloc[rows[-1]], rows[-1])
+
+
+def _ma_trend_tail(df, timeframe):
+    """
+    Cùng kết quả với get_ma_trend nhưng chỉ tính MA trên đoạn cuối cần thiết:
+    dòng cuối trước kỳ hiện tại cùng max(MA_WINDOWS) - 1 nến trước nó; nếu MA ở đó
+    là NaN thì nhân đôi đoạn lùi về quá khứ. Dữ liệu phải sắp xếp tăng dần theo time.
+    """
+    times = df['time']
+    if not pd.api.types.is_datetime64_any_dtype(times):
+        times = pd.to_datetime(times)
+    if times.empty:
         return None
 
-    df = df[mask].dropna(subset=['MA30', 'MA60', 'MA90'])
-    if df.empty:
+    # Số dòng trước kỳ hiện tại (time tăng dần → tìm nhị phân)
+    cutoff = _period_start(times.iloc[-1], timeframe)
+    end = int(times.searchsorted(cutoff, side='left'))
+
+    close = df['close'].to_numpy(dtype=float)
+    pos = _last_ready(close, end)
+    return None if pos is None else _format_trend(close, times.iloc[pos], pos)
+
+
+def _ma_trend_bars(bars, timeframe):
+    # Như _ma_trend_tail nhưng trên OHLCV: time là int64 UTC, mốc kỳ tính theo tz của chuỗi
+    if len(bars) == 0:
         return None
+    cutoff = _period_start(bars.timestamp(-1), timeframe)
+    end = int(np.searchsorted(bars.time, cutoff.value, side='left'))
+
+    pos = _last_ready(bars.close, end)
+    return None if pos is None else _format_trend(bars.close, bars.timestamp(pos), pos)
+
+
+def _last_ready(close, end):
+    # Dòng cuối (< end) có đủ mọi MA; đoạn tính bắt đầu từ max(MA_WINDOWS) nến, nhân đôi khi cần
+    size = max(MA_WINDOWS)
+    while True:
+        start = max(end - size, 0)
+        ma = moving_average_array(close[start:end], MA_WINDOWS)
+        rows = np.flatnonzero(~np.isnan(ma).any(axis=1))
+        if len(rows):
+            return start + rows[-1]
+        if start == 0:
+            return None
+        size *= 2
+
 
-    row = df.iloc[-1]
-    ma30 = row['MA30']
-    ma60 = row['MA60']
-    ma90 = row['MA90']
-    time_str = row['time'].strftime('%Y-%m-%d')
+def _format_trend(close, time, pos):
+    # MA của dòng được chọn tính trực tiếp trên cửa sổ giá đóng cửa: kết quả không
+    # phụ thuộc lịch sử đứng trước (chế độ đầy đủ và tail cho cùng một chuỗi)
+    ma30, ma60, ma90 = (np.asarray(close[pos - w + 1:pos + 1], dtype=np.float64).mean() for w in MA_WINDOWS)
+    time_str = time.strftime('%Y-%m-%d')
+    trend = classify_ma(ma30, ma60, ma90)
 
+    return f"{trend}\nDate: {time_str} \nMA30: {ma30:.5f}\nMA60: {ma60:.5f}\nMA90: {ma90:.5f}"
+
+
+def classify_ma(ma30, ma60, ma90):
     if ma30 > ma90 and ma60 > ma90:
-        trend = 'Uptrend'
+        return 'Uptrend'
     elif ma30 < ma90 and ma60 < ma90:
-        trend = 'Downtrend'
+        return 'Downtrend'
     elif (ma30 > ma90 and ma60 < ma90) or (ma30 < ma90 and ma60 > ma90):
-        trend = 'Sideways'
-    else:
-        trend = 'Unknown'
-
-    return f"{trend}\nDate: {time_str} \nMA30: {ma30:.5f}\nMA60: {ma60:.5f}\nMA90: {ma90:.5f}"
+        return 'Sideways'
+    return 'Unknown'
@@ -1,9 +1,13 @@
 import pandas as pd
-from technical.seassionality import seasonality_pivot_table, monthly_avg_for_periods_by_month
+from technical.seassionality import cached_seasonality_pivot, seasonality_pivot_table, monthly_avg_for_periods_by_month
 
 
-def get_seasonal_trends(df, threshold=0.05):
-    pivot_table = seasonality_pivot_table(df, 'time', 2005, 'close')
+def get_seasonal_trends(df, threshold=0.05, symbol=None):
+    # Có symbol → dùng lại ma trận đã tính nếu nến cuối không đổi
+    if symbol is None:
+        pivot_table = seasonality_pivot_table(df, 'time', 2005, 'close')
+    else:
+        pivot_table = cached_seasonality_pivot(symbol, df, 'time', 2005, 'close')
     monthly_avgs = monthly_avg_for_periods_by_month(pivot_table)
 
     label_map = {
@@ -16,19 +20,20 @@ def get_seasonal_trends(df, threshold=0.05):
 
     data = []
     for period, value in monthly_avgs.items():
-        if value is None or pd.isna(value):
-            trend = 'Unknown'
-        elif -threshold < value < threshold:
-            trend = 'Sideways'
-        elif value >= threshold:
-            trend = 'Bullish'
-        else:
-            trend = 'Bearish'
-
         data.append({
             'Period': label_map.get(period, period),
             'Average % Change': value,
-            'Trend': trend
+            'Trend': classify_seasonal(value, threshold)
         })
 
-    return pd.DataFrame(data)
\ No newline at end of file
+    return pd.DataFrame(data)
+
+
+def classify_seasonal(value, threshold=0.05):
+    if value is None or pd.isna(value):
+        return 'Unknown'
+    elif -threshold < value < threshold:
+        return 'Sideways'
+    elif value >= threshold:
+        return 'Bullish'
+    return 'Bearish'
@@ -1,40 +1,49 @@
-
+import numpy as np
 import pandas as pd
-from technical.swing_points import swing_high_low
-
-def get_structure_trend(df, timeframe):
-    df = swing_high_low(df, timeframe)
-    df['time'] = pd.to_datetime(df['time'])
+from technical.ohlcv import OHLCV
+from technical.swing_points import swing_point_indices
+
+def get_structure_trend(df, timeframe, tail=False):
+    # df: DataFrame hoặc OHLCV; chỉ đọc mảng high/low, không thêm cột / sao chép bảng.
+    # tail=True: chỉ tính trên đoạn cuối đủ để 2 đỉnh/đáy cuối giống hệt toàn bộ lịch sử
+    if isinstance(df, OHLCV):
+        highs, lows, time_at = df.high, df.low, df.timestamp
+    else:
+        highs = df['high'].to_numpy(dtype=np.float64)
+        lows = df['low'].to_numpy(dtype=np.float64)
+        time_at = lambda i: pd.to_datetime(df['time'].iloc[i])
 
-    valid_highs = df[df['valid_swing_high']].reset_index(drop=True)
-    valid_lows = df[df['valid_swing_low']].reset_index(drop=True)
-    
-    recent_highs = valid_highs.tail(2).reset_index(drop=True)
-    recent_lows = valid_lows.tail(2).reset_index(drop=True)
+    valid_highs, valid_lows = swing_point_indices(highs, lows, timeframe, tail=tail, count=2)
+    recent_highs = valid_highs[-2:]
+    recent_lows = valid_lows[-2:]
 
     if len(recent_highs) < 2 or len(recent_lows) < 2:
         return "Indeterminate"
 
-    highs_increasing = recent_highs.loc[1, 'high'] > recent_highs.loc[0, 'high']
-    lows_increasing = recent_lows.loc[1, 'low'] > recent_lows.loc[0, 'low']
-
-    highs_decreasing = recent_highs.loc[1, 'high'] < recent_highs.loc[0, 'high']
-    lows_decreasing = recent_lows.loc[1, 'low'] < recent_lows.loc[0, 'low']
-
-    if highs_increasing and lows_increasing:
-        trend = 'Uptrend'
-    elif highs_decreasing and lows_decreasing:
-        trend = 'Downtrend'
-    else:
-        trend = 'Divergence'
+    trend = classify_structure([highs[i] for i in recent_highs], [lows[i] for i in recent_lows])
 
     high_str = (
-        f"Highs: \n{recent_highs.loc[0, 'time'].date()}:{recent_highs.loc[0, 'high']:.5f}, \n"
-        f"{recent_highs.loc[1, 'time'].date()}:{recent_highs.loc[1, 'high']:.5f}"
+        f"Highs: \n{time_at(recent_highs[0]).date()}:{highs[recent_highs[0]]:.5f}, \n"
+        f"{time_at(recent_highs[1]).date()}:{highs[recent_highs[1]]:.5f}"
     )
     low_str = (
-        f"Lows:  \n{recent_lows.loc[0, 'time'].date()}:{recent_lows.loc[0, 'low']:.5f}, \n"
-        f"{recent_lows.loc[1, 'time'].date()}:{recent_lows.loc[1, 'low']:.5f}"
+        f"Lows:  \n{time_at(recent_lows[0]).date()}:{lows[recent_lows[0]]:.5f}, \n"
+        f"{time_at(recent_lows[1]).date()}:{lows[recent_lows[1]]:.5f}"
     )
 
-    return f"{trend}\n{high_str}\n{low_str}"
\ No newline at end of file
+    return f"{trend}\n{high_str}\n{low_str}"
+
+
+def classify_structure(highs, lows):
+    """highs, lows: giá của 2 đỉnh / 2 đáy hợp lệ gần nhất (cũ trước, mới sau)."""
+    highs_increasing = highs[1] > highs[0]
+    lows_increasing = lows[1] > lows[0]
+
+    highs_decreasing = highs[1] < highs[0]
+    lows_decreasing = lows[1] < lows[0]
+
+    if highs_increasing and lows_increasing:
+        return 'Uptrend'
+    elif highs_decreasing and lows_decreasing:
+        return 'Downtrend'
+    return 'Divergence'
@@ -0,0 +1,230 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from reporting.get_cot_trend import _extreme_masks
+from reporting.get_ma_trend import MA_WINDOWS, classify_ma
+from reporting.get_seasonal_trends import classify_seasonal
+from reporting.get_structure_trend import classify_structure
+from technical.cot_index import cot_index
+from technical.moving_averages import moving_average_array
+from technical.seassionality import PERIODS, seasonality_matrix
+from technical.swing_detector import SwingDetector
+
+TIMEFRAMES = [('D', '1D_data'), ('W', '1W_data'), ('M', '1M_data')]
+
+
+def replay_signals(datasets, threshold=0.05, weeks=26, start_year=2005):
+    """
+    Phát lại (walk-forward) các cột của báo cáo tổng hợp tại mọi nến ngày trong lịch sử.
+    Mỗi dòng chỉ dùng dữ liệu có tới thời điểm đó:
+    - MA / Structure W, M: các nến tuần / tháng đã đóng + nến đang hình thành dựng
+      từ nến ngày tới hôm đó (giống khi chạy báo cáo vào ngày ấy).
+    - COT: các báo cáo có ngày báo cáo <= ngày đang xét (không tính độ trễ công bố).
+    - Seasonal: tháng hiện tại là tháng của nến tháng đang hình thành.
+    Quy tắc bỏ tháng / quý / năm hiện tại giống get_ma_trend và get_cot_trend.
+    Trả về DataFrame, mỗi dòng một nến ngày.
+    """
+    daily = datasets['asset_data']['1D_data']
+    times = pd.to_datetime(daily['time']).reset_index(drop=True)
+    out = {'time': times}
+
+    # Vị trí nến (đang hình thành) của từng timeframe tại mỗi nến ngày
+    current = {}
+    for tf, key in TIMEFRAMES:
+        frame_times = pd.to_datetime(datasets['asset_data'][key]['time'])
+        current[tf] = np.arange(len(daily)) if tf == 'D' else \
+            frame_times.searchsorted(times, side='right') - 1
+
+    for tf, key in TIMEFRAMES:
+        trend, date = _replay_ma(datasets['asset_data'][key], tf, current[tf])
+        out[f'ma_{tf}'] = trend
+        out[f'ma_{tf}_date'] = date
+
+    for tf, key in TIMEFRAMES:
+        out[f'structure_{tf}'] = _replay_structure(datasets['asset_data'][key], daily, tf, current[tf])
+
+    if datasets.get('cot_data') is not None and len(datasets['cot_data']):
+        out['cot'], out['cot_date'] = _replay_cot(datasets['cot_data'], times, weeks)
+
+    averages = _replay_seasonal(datasets['asset_data']['1M_data'], daily, current['M'], start_year)
+    for k, p in enumerate(PERIODS):
+        out[f'seasonal_{p}y'] = averages[:, k]
+        out[f'seasonal_{p}y_trend'] = [classify_seasonal(v, threshold) for v in averages[:, k]]
+
+    return pd.DataFrame(out)
+
+
+def replay_portfolio(data, max_workers=None, **kwargs):
+    """
+    replay_signals cho mọi symbol; max_workers > 1 chạy song song theo symbol.
+    Trả về DataFrame index (symbol, time).
+    """
+    symbols = list(data)
+    if max_workers is None or max_workers <= 1:
+        frames = [replay_signals(data[s], **kwargs) for s in symbols]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(replay_signals, data[s], **kwargs) for s in symbols]
+            frames = [f.result() for f in futures]
+    return pd.concat(frames, keys=symbols, names=['symbol']).reset_index(level=1, drop=True) \
+        .set_index('time', append=True)
+
+
+def _wall_time(times):
+    # Giờ theo múi giờ của cột (giống .dt.month / .dt.year trong get_ma_trend)
+    times = pd.to_datetime(times)
+    if times.dt.tz is not None:
+        times = times.dt.tz_localize(None)
+    return times.to_numpy(dtype='datetime64[ns]')
+
+
+def _period_start(wall, timeframe):
+    # Mốc đầu tháng (D) / quý (W) / năm (M) chứa mỗi thời điểm
+    months = wall.astype('datetime64[M]').astype(np.int64)
+    if timeframe == 'D':
+        start = months
+    elif timeframe == 'W':
+        start = months - months % 12 % 3
+    else:
+        start = months - months % 12
+    return start.astype('datetime64[M]').astype('datetime64[ns]')
+
+
+def _replay_ma(frame, timeframe, current):
+    close = frame['close'].to_numpy(dtype=np.float64)
+    wall = _wall_time(frame['time'])
+    n = len(close)
+
+    # Dòng cuối có đủ MA tại hoặc trước mỗi vị trí
+    ready = ~np.isnan(moving_average_array(close, MA_WINDOWS)).any(axis=1)
+    last_ready = np.maximum.accumulate(np.where(ready, np.arange(n), -1)) if n else np.empty(0, int)
+
+    # Nến j là nến cuối → chỉ dùng các nến trước mốc đầu kỳ của nến j
+    end = np.searchsorted(wall, _period_start(wall, timeframe), side='left')
+    row = np.where(end > 0, last_ready[np.maximum(end - 1, 0)], -1) if n else np.empty(0, int)
+    rows = np.where(current >= 0, row[np.clip(current, 0, None)] if n else -1, -1)
+
+    # Phân loại một lần cho mỗi dòng được dùng (MA tính trực tiếp như _format_trend)
+    trend = np.full(len(rows), None, dtype=object)
+    date = np.full(len(rows), None, dtype=object)
+    times = pd.to_datetime(frame['time']).reset_index(drop=True)
+    for pos in np.unique(rows[rows >= 0]):
+        ma30, ma60, ma90 = (close[pos - w + 1:pos + 1].mean() for w in MA_WINDOWS)
+        hit = rows == pos
+        trend[hit] = classify_ma(ma30, ma60, ma90)
+        date[hit] = times.iloc[pos]
+    return trend, date
+
+
+def _replay_structure(frame, daily, timeframe, current):
+    detector = SwingDetector(timeframe)
+    trend = np.full(len(current), None, dtype=object)
+
+    if timeframe == 'D':
+        for i, (h, l, t) in enumerate(zip(daily['high'].to_numpy(), daily['low'].to_numpy(), daily['time'])):
+            detector.update(h, l, t)
+            trend[i] = _structure_label(*detector.recent(2))
+        return trend
+
+    # Nến đang hình thành: high/low tích luỹ của các nến ngày thuộc cùng nến tuần / tháng
+    groups = pd.Series(current)
+    partial_high = daily['high'].reset_index(drop=True).groupby(groups).cummax().to_numpy()
+    partial_low = daily['low'].reset_index(drop=True).groupby(groups).cummin().to_numpy()
+
+    highs = frame['high'].to_numpy(dtype=np.float64)
+    lows = frame['low'].to_numpy(dtype=np.float64)
+    times = frame['time'].to_numpy()
+    fed = 0   # số nến đã đóng đã nạp vào detector
+    for i, k in enumerate(current):
+        if k < 0:
+            trend[i] = 'Indeterminate'
+            continue
+        while fed < k:
+            detector.update(highs[fed], lows[fed], times[fed])
+            fed += 1
+        trend[i] = _structure_label(*detector.recent(2, bar=(partial_high[i], partial_low[i], times[k])))
+    return trend
+
+
+def _structure_label(highs, lows):
+    if len(highs) < 2 or len(lows) < 2:
+        return 'Indeterminate'
+    return classify_structure([p for _, _, p in highs], [p for _, _, p in lows])
+
+
+def _replay_cot(cot_df, times, weeks):
+    weekly = cot_index(cot_df, weeks)
+    labels = weekly['date']
+
+    # Ngày báo cáo cuối cùng của mỗi tuần → thời điểm tuần đó có trong dữ liệu
+    report = pd.to_datetime(cot_df['date']).sort_values()
+    day = report.dt.normalize()
+    week = day + pd.to_timedelta((4 - day.dt.dayofweek) % 7, unit='D')
+    available = report.groupby(week.to_numpy()).max().reindex(labels.to_numpy()).to_numpy()
+
+    cot_com = weekly['cot_index_commercial'].to_numpy(dtype=float)
+    cot_ret = weekly['cot_index_retail'].to_numpy(dtype=float)
+    bullish, bearish = _extreme_masks(cot_com, cot_ret, 80, 20)
+    n = len(weekly)
+    last_hit = np.maximum.accumulate(np.where(bullish | bearish, np.arange(n), -1))
+
+    # Tuần j là tuần cuối → chỉ xét các tuần trước tháng của tuần j
+    wall = _wall_time(labels)
+    end = np.searchsorted(wall, _period_start(wall, 'D'), side='left')
+    signal = np.where(end > 0, last_hit[np.maximum(end - 1, 0)], -1)
+
+    # Tuần cuối có báo cáo tại mỗi nến ngày
+    asof = np.searchsorted(pd.to_datetime(available, utc=True), pd.to_datetime(times, utc=True), side='right') - 1
+    rows = np.where(asof >= 0, signal[np.clip(asof, 0, None)], -1)
+
+    trend = np.where(rows < 0, None, np.where(bullish[rows], 'Uptrend', 'Downtrend')).astype(object)
+    date = np.where(rows < 0, None, labels.to_numpy()[rows]).astype(object)
+    return trend, date
+
+
+def _replay_seasonal(monthly, daily, current, start_year):
+    years, months, matrix = seasonality_matrix(monthly, 'time', start_year, 'close')
+    full = np.full((len(years), 12), np.nan)
+    full[:, months - 1] = matrix
+
+    # Tổng / số giá trị tích luỹ theo năm cho từng tháng (dòng 0 = chưa có năm nào)
+    csum = np.vstack([np.zeros(12), np.cumsum(np.nan_to_num(full), axis=0)])
+    ccount = np.vstack([np.zeros(12), np.cumsum(~np.isnan(full), axis=0)])
+
+    # Năm / tháng (theo quy tắc time + MonthEnd(1)) của nến tháng đang hình thành
+    month_times = pd.to_datetime(monthly['time'])
+    raw_year = month_times.dt.year.to_numpy()
+    if month_times.dt.tz is not None:
+        month_times = month_times.dt.tz_convert('UTC').dt.tz_localize(None)
+    day = month_times.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]') + np.timedelta64(1, 'D')
+    month_index = day.astype('datetime64[M]').astype(np.int64)
+    cell_year = month_index // 12 + 1970
+    cell_month = month_index % 12 + 1
+
+    closes = monthly['close'].to_numpy(dtype=np.float64)
+    daily_close = daily['close'].to_numpy(dtype=np.float64)
+    out = np.full((len(current), len(PERIODS)), np.nan)
+
+    valid = current >= 0
+    k = np.clip(current, 0, None)
+    cy, m = cell_year[k], cell_month[k] - 1
+
+    # % thay đổi tạm thời của tháng đang chạy (giá đóng cửa ngày so với tháng trước)
+    prev = np.clip(k - 1, 0, None)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Nến k và nến trước phải nằm trong dữ liệu pivot (từ 2 nến cuối của năm start_year - 1)
+        in_pivot = (k >= 1) & (raw_year[k] >= start_year - 1) & (raw_year[prev] >= start_year - 1) & (cy >= start_year)
+        partial = np.where(in_pivot, (daily_close / closes[prev] - 1) * 100, np.nan)
+    has_partial = ~np.isnan(partial)
+
+    # Các năm đã hoàn chỉnh trong [cy - p, cy - 1] lấy từ tổng tích luỹ
+    hi = np.searchsorted(years, cy, side='left')
+    for j, p in enumerate(PERIODS):
+        lo = np.searchsorted(years, cy - p, side='left')
+        total = csum[hi, m] - csum[lo, m] + np.where(has_partial, partial, 0.0)
+        count = ccount[hi, m] - ccount[lo, m] + has_partial
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out[:, j] = np.where(valid & (count > 0), total / count, np.nan)
+    return out
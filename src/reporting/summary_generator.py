@@ -1,56 +1,58 @@
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 from tabulate import tabulate
 import numpy as np
 import pandas as pd
-from reporting.get_cot_trend import get_cot_trend
+from reporting.get_cot_trend import format_cot_trend, get_cot_trend
 from reporting.get_ma_trend import get_ma_trend
 from reporting.get_seasonal_trends import get_seasonal_trends
 from reporting.get_structure_trend import get_structure_trend
+from technical.ohlcv import OHLCV, PRICE_FIELDS
 
+# Các ô của một dòng báo cáo: (loại, timeframe, bảng dữ liệu)
+TASKS = [
+    ('ma', 'D', '1D_data'), ('ma', 'W', '1W_data'), ('ma', 'M', '1M_data'),
+    ('structure', 'D', '1D_data'), ('structure', 'W', '1W_data'), ('structure', 'M', '1M_data'),
+    ('cot', None, 'cot_data'),
+    ('seasonal', None, '1M_data'),
+]
 
-def generate_summary_report(data):
+# Giá trị đánh dấu ô chưa có trong cache (None là kết quả hợp lệ của get_ma_trend)
+_MISSING = object()
 
-    table = []
-    
-    for symbol, datasets in data.items():
-        # MA trends
-        ma_d = get_ma_trend(datasets['asset_data']['1D_data'], timeframe="D")
-        ma_w = get_ma_trend(datasets['asset_data']['1W_data'], timeframe="W")
-        ma_m = get_ma_trend(datasets['asset_data']['1M_data'], timeframe="M")
-
-        # Market Structure
-        ms_d = get_structure_trend(datasets['asset_data']['1D_data'], timeframe='D')
-        ms_w = get_structure_trend(datasets['asset_data']['1W_data'], timeframe='W')
-        ms_m = get_structure_trend(datasets['asset_data']['1M_data'], timeframe='M')
-
-        # COT trend
-        cot_status = get_cot_trend(datasets['cot_data'])
-
-        # Seasonal values
-        ss_t = get_seasonal_trends(datasets['asset_data']['1M_data'], threshold= 0.05)
-
-        def format_seasonal(period):
-            subset = ss_t.loc[ss_t['Period'] == period]
-            if subset.empty:
-                return "N/A"
-            val = subset['Average % Change'].values[0]
-            trend = subset['Trend'].values[0]
-            return f"{trend}\nAvgs: {val:.3f}%"
-
-
-        s_2y = format_seasonal('Last 2 Years')
-        s_5y = format_seasonal('Last 5 Years')
-        s_10y = format_seasonal('Last 10 Years')
-        s_15y = format_seasonal('Last 15 Years')
-        s_20y = format_seasonal('Last 20 Years')
-
-        # Placeholder for Score
-        score = "nan"
-
-        # Append row to table
-        table.append([
-            symbol, ma_d, ma_w, ma_m, ms_d, ms_w, ms_m,
-            cot_status, s_2y, s_5y, s_10y, s_15y, s_20y, score
-        ])
+SEASONAL_PERIODS = ['Last 2 Years', 'Last 5 Years', 'Last 10 Years', 'Last 15 Years', 'Last 20 Years']
+
+
+def generate_summary_report(data, max_workers=None, cache=None):
+    """
+    In bảng tổng hợp cho mọi symbol trong `data`.
+    - max_workers > 1: chia các ô (symbol × chỉ báo × timeframe) cho process pool,
+      OHLCV được chuyển qua shared memory; thứ tự dòng giữ như `data`.
+    - cache: utils.indicator_cache.IndicatorCache; ô nào có dữ liệu đầu vào không đổi
+      (theo fingerprint) được lấy lại từ cache, chỉ các ô thay đổi được tính lại.
+    """
+    cached = {}
+    if cache is not None:
+        for symbol, datasets in data.items():
+            for kind, timeframe, key in TASKS:
+                cell_key = _cell_key(cache, kind, timeframe, _frame(datasets, kind, key))
+                cached[(symbol, kind, timeframe)] = (cell_key, cache.get(cell_key, _MISSING))
+
+    if max_workers is None or max_workers <= 1:
+        table = []
+        for symbol, datasets in data.items():
+            results = {}
+            for kind, timeframe, key in TASKS:
+                cell_key, value = cached.get((symbol, kind, timeframe), (None, _MISSING))
+                if value is _MISSING:
+                    value = _evaluate(kind, timeframe, _frame(datasets, kind, key), symbol)
+                    if cell_key is not None:
+                        cache.put(cell_key, value)
+                results[(kind, timeframe)] = value
+            table.append(_assemble_row(symbol, results))
+    else:
+        table = _parallel_rows(data, max_workers, cache, cached)
 
     headers = [
         "Symbol", "MA D (30 60 90)", "MA W (30 60 90)", "MA M (30 60 90)",
@@ -59,4 +61,127 @@ def generate_summary_report(data):
         "Seasonal 15Y", "Seasonal 20Y", "Score"
     ]
 
-    print(tabulate(table, headers=headers, tablefmt="fancy_grid"))
\ No newline at end of file
+    print(tabulate(table, headers=headers, tablefmt="fancy_grid"))
+
+
+def _frame(datasets, kind, key):
+    return datasets['cot_data'] if kind == 'cot' else datasets['asset_data'][key]
+
+
+def _cell_key(cache, kind, timeframe, df):
+    # Seasonal phụ thuộc tháng hiện tại (đồng hồ hệ thống) → đưa vào khoá
+    month = datetime.datetime.now().month if kind == 'seasonal' else None
+    return cache.key(f'summary.{kind}', (timeframe, df, month))
+
+
+def _evaluate(kind, timeframe, df, symbol):
+    # Một ô của báo cáo (chạy được cả trong process con)
+    if kind == 'ma':
+        return get_ma_trend(df, timeframe=timeframe, tail=True)
+    if kind == 'structure':
+        return get_structure_trend(df, timeframe=timeframe, tail=True)
+    if kind == 'cot':
+        return format_cot_trend(get_cot_trend(df))
+
+    # Seasonal values
+    ss_t = get_seasonal_trends(df, threshold= 0.05, symbol=symbol)
+
+    def format_seasonal(period):
+        subset = ss_t.loc[ss_t['Period'] == period]
+        if subset.empty:
+            return "N/A"
+        val = subset['Average % Change'].values[0]
+        trend = subset['Trend'].values[0]
+        return f"{trend}\nAvgs: {val:.3f}%"
+
+    return [format_seasonal(period) for period in SEASONAL_PERIODS]
+
+
+def _assemble_row(symbol, results):
+    # Placeholder for Score
+    score = "nan"
+    return [
+        symbol,
+        results[('ma', 'D')], results[('ma', 'W')], results[('ma', 'M')],
+        results[('structure', 'D')], results[('structure', 'W')], results[('structure', 'M')],
+        results[('cot', None)],
+        *results[('seasonal', None)],
+        score,
+    ]
+
+
+def _parallel_rows(data, max_workers, cache=None, cached=None):
+    # Gói toàn bộ OHLCV vào một khối shared memory, process con chỉ nhận vị trí
+    cached = cached or {}
+    shm, layout = _pack_ohlcv(data)
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {}
+            for symbol, datasets in data.items():
+                for kind, timeframe, key in TASKS:
+                    if cached.get((symbol, kind, timeframe), (None, _MISSING))[1] is not _MISSING:
+                        continue
+                    if kind == 'cot':
+                        # COT là bảng nhiều cột hỗn hợp → gửi bằng pickle
+                        future = pool.submit(_evaluate, kind, timeframe, datasets['cot_data'], symbol)
+                    else:
+                        future = pool.submit(_evaluate_shared, shm.name, layout[(symbol, key)],
+                                             kind, timeframe, symbol)
+                    futures[(symbol, kind, timeframe)] = future
+
+            table = []
+            for symbol in data:
+                results = {}
+                for kind, timeframe, _ in TASKS:
+                    cell_key, value = cached.get((symbol, kind, timeframe), (None, _MISSING))
+                    if value is _MISSING:
+                        value = futures[(symbol, kind, timeframe)].result()
+                        if cache is not None:
+                            cache.put(cell_key, value)
+                    results[(kind, timeframe)] = value
+                table.append(_assemble_row(symbol, results))
+            return table
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _pack_ohlcv(data):
+    """
+    Ghi mọi chuỗi nến (DataFrame hoặc OHLCV) vào một khối SharedMemory dạng cột
+    time (int64 UTC), open, high, low, close[, volume].
+    Trả về (shm, layout) với layout[(symbol, key)] = (offset, rows, fields, tz).
+    """
+    frames, layout, offset = [], {}, 0
+    for symbol, datasets in data.items():
+        for key in ('1D_data', '1W_data', '1M_data'):
+            bars = datasets['asset_data'][key]
+            if not isinstance(bars, OHLCV):
+                bars = OHLCV.from_frame(bars)
+            fields = [f for f in PRICE_FIELDS if getattr(bars, f) is not None]
+            layout[(symbol, key)] = (offset, len(bars), fields, bars.tz)
+            frames.append((offset, bars, fields))
+            offset += len(bars) * (len(fields) + 1) * 8
+
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for start, bars, fields in frames:
+        block = np.ndarray((len(fields) + 1, len(bars)), dtype=np.float64, buffer=shm.buf, offset=start)
+        block[0].view(np.int64)[:] = bars.time
+        for j, field in enumerate(fields, start=1):
+            block[j] = getattr(bars, field)
+        del block
+    return shm, layout
+
+
+def _evaluate_shared(shm_name, entry, kind, timeframe, symbol):
+    # Process con dựng OHLCV từ bản sao các cột (không dựng lại DataFrame)
+    offset, rows, fields, tz = entry
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        block = np.ndarray((len(fields) + 1, rows), dtype=np.float64, buffer=shm.buf, offset=offset)
+        columns = {field: block[j].copy() for j, field in enumerate(fields, start=1)}
+        time = block[0].view(np.int64).copy()
+        del block
+    finally:
+        shm.close()
+    return _evaluate(kind, timeframe, OHLCV(time, tz=tz, **columns), symbol)
@@ -1,3 +1,5 @@
+from collections import deque
+
 import numpy as np
 import pandas as pd
 
@@ -46,3 +48,224 @@ def cot_index(cot_df, weeks=26):
     df_weekly['cot_index_retail'] = calc_index(df_weekly['adj_retail'])
 
     return df_weekly
+
+
+def cot_index_panel(source, weeks=26, markets=None):
+    """
+    Tính COT index cho nhiều thị trường cùng lúc (một lượt vector hoá).
+    - source: CotStore, hoặc DataFrame đã đổi tên cột (như store.get) có cột 'market'.
+    - markets: danh sách tên thị trường cần tính (mặc định: tất cả).
+    Trả về DataFrame index (market, date) với cùng các cột như cot_index,
+    mỗi thị trường cho kết quả giống hệt cot_index trên dữ liệu của nó.
+    """
+    if isinstance(source, pd.DataFrame):
+        df = source
+        if markets is not None:
+            df = df[df['market'].isin(markets)]
+    else:
+        names = source.markets if markets is None else markets
+        df = pd.concat([source.partition(m) for m in names], ignore_index=True)
+
+    cols = ['commercial_long', 'commercial_short', 'noncommercial_long', 'noncommercial_short',
+            'retail_long', 'retail_short', 'open_interest']
+    df = df[['market', 'date', *cols]].copy()
+    df['market'] = df['market'].astype(str)
+    df['date'] = pd.to_datetime(df['date'])
+    df = df.sort_values(['market', 'date'], kind='stable')
+
+    # Nhãn tuần W-FRI (thứ Sáu cuối tuần chứa ngày báo cáo), như resample('W-FRI')
+    day = df['date'].dt.normalize()
+    df['date'] = day + pd.to_timedelta((4 - day.dt.dayofweek) % 7, unit='D')
+    df[cols] = df[cols].astype(np.float64)
+
+    # Lấy bản ghi cuối mỗi tuần của từng thị trường, bỏ tuần thiếu dữ liệu
+    df_weekly = df.groupby(['market', 'date'], sort=True).last().dropna()
+
+    df_weekly['net_commercial'] = df_weekly['commercial_long'] - df_weekly['commercial_short']
+    df_weekly['net_large'] = df_weekly['noncommercial_long'] - df_weekly['noncommercial_short']
+    df_weekly['net_retail'] = df_weekly['retail_long'] - df_weekly['retail_short']
+
+    df_weekly['open_interest'] = df_weekly['open_interest'].replace(0, np.nan)
+
+    df_weekly['adj_commercial'] = df_weekly['net_commercial'] / df_weekly['open_interest']
+    df_weekly['adj_large'] = df_weekly['net_large'] / df_weekly['open_interest']
+    df_weekly['adj_retail'] = df_weekly['net_retail'] / df_weekly['open_interest']
+
+    # Vị trí dòng đầu tiên của thị trường chứa mỗi dòng (biên nhóm cho rolling)
+    codes = df_weekly.index.codes[0]
+    first = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    group_start = np.repeat(first, np.diff(np.r_[first, len(codes)]))
+
+    for name in ('commercial', 'large', 'retail'):
+        series = df_weekly[f'adj_{name}'].to_numpy()
+        min_val, max_val = grouped_rolling_min_max(series, group_start, weeks)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            idx = 100 * (series - min_val) / (max_val - min_val)
+        idx[max_val == min_val] = np.nan  # tránh chia 0
+        df_weekly[f'cot_index_{name}'] = idx
+
+    return df_weekly
+
+
+def grouped_rolling_min_max(values, group_start, window):
+    """
+    Rolling min/max (min_periods=1, bỏ qua NaN) trên mảng xếp chồng nhiều nhóm,
+    cửa sổ không vượt qua đầu nhóm `group_start[i]`.
+    Dùng bảng lũy thừa 2: O(n log window) thay vì một lượt rolling cho mỗi nhóm.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    pos = np.arange(n)
+    nan = np.isnan(values)
+    lo = np.where(nan, np.inf, values)
+    hi = np.where(nan, -np.inf, values)
+
+    # lo/hi[i] = min/max trên đoạn [i - p + 1, i] (cắt tại đầu nhóm), p tăng gấp đôi
+    p = 1
+    while p * 2 <= window:
+        prev = pos - p
+        ok = prev >= group_start
+        src = np.where(ok, prev, pos)
+        lo = np.minimum(lo, lo[src])
+        hi = np.maximum(hi, hi[src])
+        p *= 2
+
+    # Ghép hai đoạn dài p phủ [i - window + 1, i]
+    prev = pos - (window - p)
+    ok = prev >= group_start
+    src = np.where(ok, prev, pos)
+    lo = np.minimum(lo, lo[src])
+    hi = np.maximum(hi, hi[src])
+
+    lo[np.isinf(lo)] = np.nan
+    hi[np.isinf(hi)] = np.nan
+    return lo, hi
+
+
+class CotIndexStream:
+    """
+    COT index tăng dần theo từng báo cáo tuần.
+    Mỗi nhóm (commercial, large, retail) giữ hai deque đơn điệu cho min/max của
+    `weeks` tuần gần nhất, nên một báo cáo mới chỉ tốn O(1) khấu hao.
+    Cùng quy tắc với cot_index: nhãn tuần W-FRI, báo cáo sau trong cùng tuần thay
+    báo cáo trước, max == min → NaN. Trạng thái lưu được bằng to_dict/from_dict.
+    """
+
+    GROUPS = {
+        'commercial': ('commercial_long', 'commercial_short'),
+        'large': ('noncommercial_long', 'noncommercial_short'),
+        'retail': ('retail_long', 'retail_short'),
+    }
+
+    def __init__(self, weeks=26):
+        self.weeks = weeks
+        self.n = 0              # số tuần đã nạp
+        self.last_week = None   # nhãn tuần (thứ Sáu) cuối cùng
+        self.last = None        # kết quả tuần cuối
+        # adj value của `weeks` tuần gần nhất (cần khi thay báo cáo trong tuần)
+        self._window = {g: deque(maxlen=weeks) for g in self.GROUPS}
+        self._min = {g: deque() for g in self.GROUPS}   # (vị trí tuần, giá trị) tăng dần
+        self._max = {g: deque() for g in self.GROUPS}   # (vị trí tuần, giá trị) giảm dần
+
+    @classmethod
+    def from_history(cls, cot_df, weeks=26):
+        """Khởi tạo từ lịch sử: chỉ cần nạp `weeks` tuần cuối của cot_index."""
+        stream = cls(weeks)
+        df = cot_index(cot_df, weeks)
+        df['open_interest'] = df['open_interest'].fillna(0)
+        for row in df.tail(weeks).to_dict('records'):
+            stream.update(row)
+        return stream
+
+    def update(self, row):
+        """
+        Nạp một báo cáo (dict/Series có cột 'date' và các cột vị thế đã đổi tên).
+        Trả về dict {'date', 'cot_index_commercial', 'cot_index_large', 'cot_index_retail'}
+        của tuần chứa báo cáo; báo cáo cũ hơn tuần cuối hoặc thiếu dữ liệu bị bỏ qua.
+        """
+        cols = [c for pair in self.GROUPS.values() for c in pair] + ['open_interest']
+        values = [row[c] for c in cols]
+        if any(pd.isna(v) for v in values) or pd.isna(row['date']):
+            return self.last
+
+        date = pd.Timestamp(row['date']).normalize()
+        week = date + pd.Timedelta(days=(4 - date.dayofweek) % 7)
+        if self.last_week is not None and week < self.last_week:
+            return self.last
+
+        oi = float(row['open_interest']) or np.nan   # OI = 0 → NaN
+        adj = {g: (float(row[l]) - float(row[s])) / oi for g, (l, s) in self.GROUPS.items()}
+
+        if week == self.last_week:
+            # Báo cáo mới hơn trong cùng tuần: thay giá trị tuần cuối
+            for g in self.GROUPS:
+                self._window[g][-1] = adj[g]
+                self._rebuild(g)
+        else:
+            self.n += 1
+            for g in self.GROUPS:
+                self._window[g].append(adj[g])
+                self._push(g, adj[g])
+
+        self.last_week = week
+        self.last = {'date': week}
+        for g in self.GROUPS:
+            self.last[f'cot_index_{g}'] = self._index(g, adj[g])
+        return self.last
+
+    def _push(self, g, value):
+        pos = self.n - 1
+        lo, hi = self._min[g], self._max[g]
+        # Bỏ các tuần đã ra khỏi cửa sổ
+        while lo and lo[0][0] <= pos - self.weeks:
+            lo.popleft()
+        while hi and hi[0][0] <= pos - self.weeks:
+            hi.popleft()
+        if np.isnan(value):
+            return  # NaN không tham gia min/max (giống rolling)
+        while lo and lo[-1][1] >= value:
+            lo.pop()
+        lo.append((pos, value))
+        while hi and hi[-1][1] <= value:
+            hi.pop()
+        hi.append((pos, value))
+
+    def _rebuild(self, g):
+        self._min[g].clear()
+        self._max[g].clear()
+        n, window = self.n, list(self._window[g])
+        for k, value in enumerate(window):
+            self.n = n - len(window) + k + 1
+            self._push(g, value)
+        self.n = n
+
+    def _index(self, g, value):
+        if not self._min[g] or np.isnan(value):
+            return np.nan
+        min_val, max_val = self._min[g][0][1], self._max[g][0][1]
+        if max_val == min_val:
+            return np.nan  # tránh chia 0
+        return 100 * (value - min_val) / (max_val - min_val)
+
+    def to_dict(self):
+        return {
+            'weeks': self.weeks,
+            'n': self.n,
+            'last_week': None if self.last_week is None else self.last_week.isoformat(),
+            'window': {g: [None if np.isnan(v) else v for v in self._window[g]] for g in self.GROUPS},
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        """Khôi phục trạng thái; deque min/max được dựng lại từ cửa sổ đã lưu."""
+        stream = cls(state['weeks'])
+        stream.n = state['n']
+        stream.last_week = None if state['last_week'] is None else pd.Timestamp(state['last_week'])
+        for g in cls.GROUPS:
+            stream._window[g].extend(np.nan if v is None else v for v in state['window'][g])
+            stream._rebuild(g)
+        if stream.last_week is not None:
+            stream.last = {'date': stream.last_week}
+            for g in cls.GROUPS:
+                stream.last[f'cot_index_{g}'] = stream._index(g, stream._window[g][-1])
+        return stream
@@ -1,4 +1,100 @@
+import numpy as np
+
+from technical.ohlcv import OHLCV
+
+
+def moving_average_array(close, windows=(30, 60, 90)):
+    """
+    Tính SMA cho nhiều cửa sổ cùng lúc từ một lần cumsum.
+    Trả về mảng (n, len(windows)); NaN khi chưa đủ `w` nến hoặc trong cửa sổ có NaN
+    (giống rolling(window=w).mean()).
+    """
+    values = np.asarray(close, dtype=np.float64)
+    n = len(values)
+    nan = np.isnan(values)
+
+    # Tổng tích luỹ (NaN thay bằng 0) và số NaN tích luỹ, thêm phần tử 0 ở đầu
+    csum = np.concatenate(([0.0], np.cumsum(np.where(nan, 0.0, values))))
+    cnan = np.concatenate(([0], np.cumsum(nan)))
+
+    out = np.full((n, len(windows)), np.nan)
+    for j, w in enumerate(windows):
+        if w <= 0 or w > n:
+            continue
+        sums = csum[w:] - csum[:-w]
+        bad = (cnan[w:] - cnan[:-w]) > 0
+        out[w - 1:, j] = np.where(bad, np.nan, sums / w)
+    return out
+
+
 def moving_averages(df, windows=[30, 60, 90]):
-    for w in windows:
-        df[f'MA{w}'] = df['close'].rolling(window=w).mean()
-    return df
\ No newline at end of file
+    """
+    Trả về DataFrame mới có thêm cột MA{w} cho mỗi cửa sổ (không sửa df gốc).
+    Với OHLCV: trả về mảng (n, len(windows)) như moving_average_array.
+    """
+    if isinstance(df, OHLCV):
+        return moving_average_array(df.close, windows)
+    ma = moving_average_array(df['close'].to_numpy(), windows)
+    return df.assign(**{f'MA{w}': ma[:, j] for j, w in enumerate(windows)})
+
+
+class RollingMeans:
+    """
+    SMA tăng dần: giữ ring buffer của `max(windows)` giá đóng cửa gần nhất và
+    tổng chạy cho từng cửa sổ, mỗi nến mới cập nhật mọi MA trong O(1) mỗi cửa sổ.
+    """
+
+    def __init__(self, windows=(30, 60, 90)):
+        self.windows = tuple(windows)
+        self.size = max(self.windows)
+        self._buf = np.full(self.size, np.nan)
+        self._sums = np.zeros(len(self.windows))
+        self._nans = np.zeros(len(self.windows), dtype=np.int64)
+        self.n = 0
+
+    @classmethod
+    def from_series(cls, close, windows=(30, 60, 90)):
+        """Khởi tạo từ lịch sử giá (chỉ giữ lại phần cuối cần cho ring buffer)."""
+        state = cls(windows)
+        values = np.asarray(close, dtype=np.float64)
+        for v in values[-state.size:]:
+            state.update(v)
+        return state
+
+    def update(self, close):
+        """Thêm một giá đóng cửa, trả về mảng MA hiện tại theo thứ tự `windows`."""
+        close = float(close)
+        for j, w in enumerate(self.windows):
+            # Giá rời khỏi cửa sổ w (nếu đã đủ w nến)
+            if self.n >= w:
+                old = self._buf[(self.n - w) % self.size]
+                if np.isnan(old):
+                    self._nans[j] -= 1
+                else:
+                    self._sums[j] -= old
+            if np.isnan(close):
+                self._nans[j] += 1
+            else:
+                self._sums[j] += close
+
+        self._buf[self.n % self.size] = close
+        self.n += 1
+
+        # Mỗi vòng buffer tính lại tổng để tránh sai số cộng dồn
+        if self.n % self.size == 0:
+            self._resync()
+        return self.values()
+
+    def values(self):
+        """MA hiện tại của mọi cửa sổ (NaN nếu chưa đủ nến hoặc có NaN)."""
+        w = np.asarray(self.windows, dtype=np.float64)
+        ready = (self.n >= w) & (self._nans == 0)
+        return np.where(ready, self._sums / w, np.nan)
+
+    def _resync(self):
+        for j, w in enumerate(self.windows):
+            k = min(w, self.n)
+            idx = (self.n - 1 - np.arange(k)) % self.size
+            window = self._buf[idx]
+            self._nans[j] = np.isnan(window).sum()
+            self._sums[j] = np.nansum(window)
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+class OHLCV:
+    """
+    Chuỗi nến dạng cột trên các mảng NumPy liên tục, chỉ đọc.
+    - time: int64 nanosecond epoch UTC (timestamp chỉ parse một lần khi nạp)
+    - open/high/low/close/volume: float64 (hoặc float32 nếu chọn dtype), volume có thể None
+    - tz: múi giờ để hiển thị / tính tháng, quý, năm (giống cột time tz-aware của DataFrame)
+    Cắt lát (bars[a:b], tail) trả về view, không sao chép.
+    """
+
+    __slots__ = ('time', 'open', 'high', 'low', 'close', 'volume', 'tz')
+
+    def __init__(self, time, open, high, low, close, volume=None, tz='UTC', dtype=np.float64):
+        self.time = _readonly(np.ascontiguousarray(time, dtype=np.int64))
+        self.open = _readonly(np.ascontiguousarray(open, dtype=dtype))
+        self.high = _readonly(np.ascontiguousarray(high, dtype=dtype))
+        self.low = _readonly(np.ascontiguousarray(low, dtype=dtype))
+        self.close = _readonly(np.ascontiguousarray(close, dtype=dtype))
+        self.volume = None if volume is None else _readonly(np.ascontiguousarray(volume, dtype=dtype))
+        self.tz = tz
+
+        n = len(self.time)
+        if any(len(a) != n for a in (self.open, self.high, self.low, self.close)) or \
+                (self.volume is not None and len(self.volume) != n):
+            raise ValueError("OHLCV arrays must have the same length")
+
+    @classmethod
+    def from_frame(cls, df, dtype=np.float64):
+        """Dựng từ DataFrame có cột time + open/high/low/close[/volume] (time phải tăng dần)."""
+        times = df['time']
+        if not pd.api.types.is_datetime64_any_dtype(times):
+            times = pd.to_datetime(times, utc=True)
+        tz = str(times.dt.tz) if times.dt.tz is not None else None
+        # Chuẩn hoá về ns: cột tz-aware có thể mang đơn vị s/ms/us (pandas 3)
+        ns = pd.DatetimeIndex(times).as_unit('ns').asi8
+        if len(ns) > 1 and (np.diff(ns) < 0).any():
+            raise ValueError("time must be sorted ascending")
+        volume = df['volume'].to_numpy() if 'volume' in df.columns else None
+        return cls(ns, df['open'].to_numpy(), df['high'].to_numpy(), df['low'].to_numpy(),
+                   df['close'].to_numpy(), volume, tz, dtype)
+
+    def to_frame(self):
+        """DataFrame như load_asset_data trả về (cột time tz-aware)."""
+        data = {'time': self.times()}
+        for name in PRICE_FIELDS:
+            values = getattr(self, name)
+            if values is not None:
+                data[name] = values
+        return pd.DataFrame(data)
+
+    def times(self):
+        """DatetimeIndex theo tz của chuỗi."""
+        index = pd.DatetimeIndex(self.time.view('datetime64[ns]'))
+        return index.tz_localize('UTC').tz_convert(self.tz) if self.tz else index
+
+    def timestamp(self, i):
+        """Timestamp của nến i (theo tz của chuỗi)."""
+        ts = pd.Timestamp(int(self.time[i]), tz='UTC')
+        return ts.tz_convert(self.tz) if self.tz else ts.tz_localize(None)
+
+    def tail(self, n):
+        return self[max(len(self) - n, 0):]
+
+    def __len__(self):
+        return len(self.time)
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError("OHLCV only supports slicing")
+        new = object.__new__(OHLCV)
+        for name in ('time', 'open', 'high', 'low', 'close', 'volume'):
+            values = getattr(self, name)
+            setattr(new, name, None if values is None else values[key])
+        new.tz = self.tz
+        return new
+
+    def __repr__(self):
+        if not len(self):
+            return f"OHLCV(0 bars, tz={self.tz})"
+        return (f"OHLCV({len(self)} bars, {self.timestamp(0)} → {self.timestamp(-1)}, "
+                f"{self.close.dtype}, tz={self.tz})")
+
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in ('time',) + PRICE_FIELDS
+                   if getattr(self, name) is not None)
+
+
+def _readonly(values):
+    # View chỉ đọc (không sao chép): hàm kỹ thuật không thể sửa dữ liệu gốc
+    view = values.view()
+    view.flags.writeable = False
+    return view
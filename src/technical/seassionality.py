@@ -0,0 +1,207 @@
+import datetime
+import threading
+
+import numpy as np
+import pandas as pd
+
+from technical.ohlcv import OHLCV
+
+# Các khoảng nhìn lại (năm) dùng trong báo cáo
+PERIODS = (20, 15, 10, 5, 2)
+
+# Cache theo symbol: (symbol, start_year, value_col) → (khoá nến cuối, pivot dùng chung, chỉ đọc)
+_SEASONALITY_CACHE = {}
+_SEASONALITY_LOCK = threading.Lock()
+_SEASONALITY_STATS = {'hits': 0, 'misses': 0}
+
+
+def seasonality_matrix(df, date_col='time', start_year=2005, value_col='close'):
+    """
+    Dựng ma trận % thay đổi theo năm × tháng bằng NumPy.
+    Trả về (years, months, matrix): matrix[i, j] là % thay đổi của tháng months[j]
+    năm years[i] (NaN nếu không có). Cùng quy tắc với seasonality_pivot_table.
+    df có thể là DataFrame hoặc OHLCV (khi đó date_col bị bỏ qua).
+    """
+    if isinstance(df, OHLCV):
+        # time int64 UTC: năm theo tz của chuỗi, ngày theo UTC (như nhánh DataFrame)
+        years_all = df.times().year.to_numpy()
+        utc = df.time.view('datetime64[ns]')
+        column = getattr(df, value_col)
+    else:
+        dates = pd.to_datetime(df[date_col])
+        years_all = dates.dt.year.to_numpy()
+        # datetime64 theo UTC, không qua Timestamp object (tz-aware → bỏ tz sau khi đổi sang UTC)
+        utc_dates = dates.dt.tz_convert('UTC').dt.tz_localize(None) if dates.dt.tz is not None else dates
+        utc = utc_dates.to_numpy(dtype='datetime64[ns]')
+        column = df[value_col].to_numpy()
+
+    # Giữ từ start_year, kèm 2 nến cuối của năm trước để tính % tháng đầu tiên
+    prev = np.flatnonzero(years_all == start_year - 1)[-2:]
+    rows = np.r_[prev, np.flatnonzero(years_all >= start_year)]
+    values = np.asarray(column, dtype=np.float64)[rows]
+    pct = np.full(len(values), np.nan)
+    if len(values) > 1:
+        pct[1:] = (values[1:] / values[:-1] - 1) * 100
+
+    # Nến được gán cho tháng kết thúc kỳ (time + MonthEnd(1)): ngày cuối tháng → tháng sau
+    days = utc.astype('datetime64[D]')[rows] + np.timedelta64(1, 'D')
+    month_index = days.astype('datetime64[M]').astype(np.int64)   # số tháng kể từ 1970-01
+    year = month_index // 12 + 1970
+    month = month_index % 12 + 1
+
+    # Giá trị hợp lệ đầu tiên của mỗi (năm, tháng) — như pivot_table(aggfunc='first')
+    ok = ~np.isnan(pct)
+    year, month, pct = year[ok], month[ok], pct[ok]
+    years = np.unique(year)
+    months = np.unique(month)
+    cell = np.searchsorted(years, year) * 12 + (month - 1)
+    _, first = np.unique(cell, return_index=True)
+
+    matrix = np.full((len(years), 12), np.nan)
+    matrix.reshape(-1)[cell[first]] = pct[first]
+    matrix = matrix[:, months - 1]
+
+    # Bỏ năm start_year - 1 (chỉ dùng làm mốc)
+    keep = years != start_year - 1
+    return years[keep], months, matrix[keep]
+
+
+def seasonality_pivot_table(df, date_col='time', start_year=2005, value_col='close'):
+    """
+    Bảng pivot % thay đổi theo tháng: index = year, columns = month.
+    """
+    years, months, matrix = seasonality_matrix(df, date_col, start_year, value_col)
+    pivot = pd.DataFrame(
+        matrix,
+        index=pd.Index(years.astype(np.int32), name='year'),
+        columns=pd.Index(months.astype(np.int32), name='month'),
+    )
+    return pivot
+
+
+def lookback_averages(years, matrix, current_year=None, periods=PERIODS):
+    """
+    Trung bình theo tháng cho mọi khoảng nhìn lại trong một lượt cumsum theo trục năm.
+    Trả về mảng (len(periods), số tháng): dòng k là trung bình các năm >= current_year - periods[k].
+    """
+    years = np.asarray(years)
+    if current_year is None:
+        current_year = years.max() if len(years) else 0
+
+    sums, counts = _suffix_totals(matrix)
+    start = np.searchsorted(years, current_year - np.asarray(periods), side='left')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts[start] > 0, sums[start] / counts[start], np.nan)
+
+
+def monthly_avg_for_periods(pivot_table, current_year=None):
+    """
+    Trung bình % thay đổi của từng tháng trong 20/15/10/5/2 năm gần nhất.
+    Trả về dict {'avg_20y': Series theo tháng, ...}.
+    """
+    avgs = lookback_averages(pivot_table.index.to_numpy(), pivot_table.to_numpy(dtype=np.float64), current_year)
+    return {f'avg_{p}y': pd.Series(avgs[k], index=pivot_table.columns) for k, p in enumerate(PERIODS)}
+
+
+def seasonality_pivot_with_avg_periods(df, date_col='time', start_year=2005, value_col='close',
+                                       current_year=None, return_pivot=True):
+    pivot = seasonality_pivot_table(df, date_col, start_year, value_col)
+    avgs = monthly_avg_for_periods(pivot, current_year)
+    return (pivot, avgs) if return_pivot else avgs
+
+
+def monthly_avg_for_periods_by_month(pivot_table, current_year=None, current_month=None):
+    """
+    Trung bình % thay đổi của tháng hiện tại (mặc định tháng theo đồng hồ hệ thống)
+    trong 20/15/10/5/2 năm gần nhất. Trả về dict {'avg_20y': float, ...}.
+    """
+    if current_month is None:
+        current_month = datetime.datetime.now().month
+    if current_month not in pivot_table.columns:
+        return {f'avg_{p}y': np.nan for p in PERIODS}
+
+    column = pivot_table[current_month].to_numpy(dtype=np.float64)[:, None]
+    avgs = lookback_averages(pivot_table.index.to_numpy(), column, current_year)
+    return {f'avg_{p}y': float(avgs[k, 0]) for k, p in enumerate(PERIODS)}
+
+
+def cached_seasonality_pivot(symbol, df, date_col='time', start_year=2005, value_col='close'):
+    """
+    seasonality_pivot_table có cache theo symbol: chỉ dựng lại khi nến cuối thay đổi
+    (số nến, thời gian hoặc giá của nến cuối).
+    """
+    key = (symbol, start_year, value_col)
+    if not len(df):
+        last = (0,)
+    elif isinstance(df, OHLCV):
+        last = (len(df), int(df.time[-1]), float(getattr(df, value_col)[-1]))
+    else:
+        last = (len(df), pd.Timestamp(df[date_col].iloc[-1]).value, float(df[value_col].iloc[-1]))
+    with _SEASONALITY_LOCK:
+        entry = _SEASONALITY_CACHE.get(key)
+        if entry is not None and entry[0] == last:
+            _SEASONALITY_STATS['hits'] += 1
+            return entry[1]
+        _SEASONALITY_STATS['misses'] += 1
+
+    pivot = seasonality_pivot_table(df, date_col, start_year, value_col)
+    with _SEASONALITY_LOCK:
+        _SEASONALITY_CACHE[key] = (last, pivot)
+    return pivot
+
+
+def seasonality_cache_info():
+    with _SEASONALITY_LOCK:
+        return {**_SEASONALITY_STATS, 'entries': len(_SEASONALITY_CACHE)}
+
+
+def clear_seasonality_cache():
+    with _SEASONALITY_LOCK:
+        _SEASONALITY_CACHE.clear()
+        _SEASONALITY_STATS.update(hits=0, misses=0)
+
+
+def seasonal_averages_batch(data, current_month=None, start_year=2005, timeframe='1M_data'):
+    """
+    Tính trung bình 20/15/10/5/2 năm của tháng hiện tại cho cả danh mục một lần.
+    - data: dict {symbol: {'asset_data': {timeframe: df}}} như load_portfolio_data trả về.
+    Ma trận các symbol được xếp chồng trên trục năm chung để cumsum một lượt.
+    Trả về DataFrame index = symbol, cột avg_20y … avg_2y.
+    """
+    if current_month is None:
+        current_month = datetime.datetime.now().month
+
+    symbols, columns = [], []
+    for symbol, datasets in data.items():
+        pivot = cached_seasonality_pivot(symbol, datasets['asset_data'][timeframe], 'time', start_year)
+        col = pivot[current_month] if current_month in pivot.columns else pd.Series(np.nan, index=pivot.index)
+        symbols.append(symbol)
+        columns.append(col)
+
+    result_cols = [f'avg_{p}y' for p in PERIODS]
+    if not symbols:
+        return pd.DataFrame(columns=result_cols)
+
+    # Ma trận năm × symbol trên trục năm chung
+    panel = pd.concat(columns, axis=1, keys=range(len(symbols))).sort_index()
+    years = panel.index.to_numpy()
+    matrix = panel.to_numpy(dtype=np.float64)
+
+    # Năm hiện tại của mỗi symbol = năm cuối trong pivot của nó
+    sums, counts = _suffix_totals(matrix)
+    current_year = np.array([c.index.max() if len(c) else 0 for c in columns])
+    start = np.searchsorted(years, current_year[None, :] - np.asarray(PERIODS)[:, None])
+    cols = np.arange(len(symbols))[None, :]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avgs = np.where(counts[start, cols] > 0, sums[start, cols] / counts[start, cols], np.nan)
+
+    return pd.DataFrame(avgs.T, index=pd.Index(symbols, name='symbol'), columns=result_cols)
+
+
+def _suffix_totals(matrix):
+    """Tổng và số giá trị hợp lệ tích luỹ từ năm cuối về đầu, thêm một dòng 0 ở cuối."""
+    nan = np.isnan(matrix)
+    zeros = np.zeros((1, matrix.shape[1]))
+    sums = np.vstack([np.cumsum(np.where(nan, 0.0, matrix)[::-1], axis=0)[::-1], zeros])
+    counts = np.vstack([np.cumsum(~nan[::-1], axis=0)[::-1], zeros.astype(np.int64)])
+    return sums, counts
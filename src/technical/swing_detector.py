@@ -0,0 +1,330 @@
+#./indicator/swing_detector.py
+from bisect import bisect_left, bisect_right
+from collections import deque
+
+import pandas as pd
+
+from technical.swing_points import SWING_WINDOWS
+
+
+class SwingDetector:
+    """
+    Phát hiện swing high/low theo từng nến (streaming).
+    - Swing thô được xác nhận khi đã đóng đủ `window` nến bên phải.
+    - Swing hợp lệ và bộ lọc đỉnh/đáy liên tiếp được cập nhật tăng dần,
+      mỗi nến chỉ tốn O(window) (khấu hao).
+    - swing_highs()/swing_lows() trả về đúng các điểm mà swing_high_low đánh dấu
+      'valid_swing_high'/'valid_swing_low' trên toàn bộ chuỗi đã nạp
+      (kể cả các nến cuối có cửa sổ phải bị cắt).
+    - to_dict()/from_dict() để lưu và tiếp tục trạng thái.
+    """
+
+    def __init__(self, timeframe='D', window=None):
+        if window is None:
+            if timeframe not in SWING_WINDOWS:
+                raise ValueError("Invalid timeframe")
+            window = SWING_WINDOWS[timeframe]
+        self.window = window
+        self.n = 0
+        self._bars = deque(maxlen=2 * window + 1)   # (high, low, time) các nến gần nhất
+
+        # Swing thô gần nhất (idx, price) và các swing chờ swing đối diện phía sau
+        self._last_high = None
+        self._last_low = None
+        self._pending_highs = []    # (idx, price, time, giá swing low liền trước)
+        self._pending_lows = []
+
+        # Swing hợp lệ (trước khi lọc), theo thứ tự chỉ số
+        self._vh, self._vh_price, self._vh_time = [], [], []
+        self._vl, self._vl_price, self._vl_time = [], [], []
+
+        # Trạng thái bộ lọc liên tiếp: con trỏ, quyết định (None/True/False), vị trí được giữ
+        self._hi_ptr, self._hi_keep, self._hi_kept = 0, [], []
+        self._lo_ptr, self._lo_keep, self._lo_kept = 0, [], []
+
+    # ------------------------------------------------------------------
+    # Nạp dữ liệu
+    # ------------------------------------------------------------------
+    def update(self, high, low, time=None):
+        """Nạp một nến mới (theo thứ tự thời gian)."""
+        self._bars.append((float(high), float(low), time))
+        self.n += 1
+
+        c = self.n - 1 - self.window   # nến vừa đủ `window` nến bên phải
+        if c >= 0:
+            pos = len(self._bars) - 1 - self.window
+            self._on_bar(c, pos, len(self._bars))
+        self._advance_lows()
+
+    def extend(self, df):
+        """Nạp lần lượt mọi nến của DataFrame (cột 'high', 'low', tuỳ chọn 'time')."""
+        times = df['time'] if 'time' in df else [None] * len(df)
+        for h, l, t in zip(df['high'].to_numpy(), df['low'].to_numpy(), times):
+            self.update(h, l, t)
+        return self
+
+    # ------------------------------------------------------------------
+    # Kết quả
+    # ------------------------------------------------------------------
+    def swing_highs(self):
+        """Danh sách (index, time, high) các swing high hợp lệ sau lọc."""
+        return self._snapshot()[0]
+
+    def swing_lows(self):
+        """Danh sách (index, time, low) các swing low hợp lệ sau lọc."""
+        return self._snapshot()[1]
+
+    def recent(self, count=2, bar=None):
+        """
+        `count` swing high/low cuối cùng: (highs, lows), mỗi phần tử (index, time, price).
+        bar=(high, low, time): nến đang hình thành, chỉ được xét tạm rồi bỏ đi.
+        """
+        if bar is None:
+            return self._snapshot(count)
+        bars, n, checkpoint = list(self._bars), self.n, self._checkpoint()
+        try:
+            self.update(*bar)
+            return self._snapshot(count)
+        finally:
+            self._bars.clear()
+            self._bars.extend(bars)
+            self.n = n
+            self._rollback(checkpoint)
+
+    # ------------------------------------------------------------------
+    # Lưu / khôi phục trạng thái
+    # ------------------------------------------------------------------
+    def to_dict(self):
+        state = {k: v for k, v in self.__dict__.items() if k != '_bars'}
+        state['_bars'] = list(self._bars)
+        state['_pending_highs'] = [list(p) for p in self._pending_highs]
+        state['_pending_lows'] = [list(p) for p in self._pending_lows]
+        # Thời gian lưu dạng chuỗi ISO để dump JSON được
+        for key in ('_vh_time', '_vl_time'):
+            state[key] = [_dump_time(t) for t in state[key]]
+        state['_bars'] = [[h, l, _dump_time(t)] for h, l, t in state['_bars']]
+        for key in ('_pending_highs', '_pending_lows'):
+            state[key] = [[i, p, _dump_time(t), prev] for i, p, t, prev in state[key]]
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        det = cls(window=state['window'])
+        for key, value in state.items():
+            if key not in ('_bars', 'window'):
+                setattr(det, key, list(value) if isinstance(value, list) else value)
+        det._bars.extend((h, l, _load_time(t)) for h, l, t in state['_bars'])
+        det._vh_time = [_load_time(t) for t in state['_vh_time']]
+        det._vl_time = [_load_time(t) for t in state['_vl_time']]
+        det._pending_highs = [(i, p, _load_time(t), prev) for i, p, t, prev in state['_pending_highs']]
+        det._pending_lows = [(i, p, _load_time(t), prev) for i, p, t, prev in state['_pending_lows']]
+        det._last_high = tuple(state['_last_high']) if state['_last_high'] else None
+        det._last_low = tuple(state['_last_low']) if state['_last_low'] else None
+        return det
+
+    # ------------------------------------------------------------------
+    # Swing thô → swing hợp lệ
+    # ------------------------------------------------------------------
+    def _on_bar(self, c, pos, end):
+        # Nến c (vị trí pos trong buffer) so với các nến [pos-window, end) còn lại
+        bars = self._bars
+        high, low, time = bars[pos]
+        start = max(pos - self.window, 0)
+        left = [bars[k] for k in range(start, pos)]
+        right = [bars[k] for k in range(pos + 1, end)]
+        is_high = _beats(high, [b[0] for b in left], [b[0] for b in right], True)
+        is_low = _beats(low, [b[1] for b in left], [b[1] for b in right], False)
+
+        prev_low = self._last_low[1] if self._last_low else None
+        prev_high = self._last_high[1] if self._last_high else None
+
+        if is_high:
+            self._pending_highs.append((c, high, time, prev_low))
+        if is_low:
+            self._pending_lows.append((c, low, time, prev_high))
+
+        # Swing low mới xác nhận các swing high đang chờ (và ngược lại)
+        if is_low:
+            self._pending_highs = self._resolve(self._pending_highs, c, low, True)
+        if is_high:
+            self._pending_lows = self._resolve(self._pending_lows, c, high, False)
+
+        if is_high:
+            self._last_high = (c, high)
+        if is_low:
+            self._last_low = (c, low)
+
+    def _resolve(self, pending, c, after_price, is_high):
+        rest = []
+        for item in pending:
+            idx, price, time, before_price = item
+            if idx >= c:
+                rest.append(item)
+                continue
+            if before_price is None:
+                continue
+            if is_high and before_price < price and after_price < price:
+                self._push_high(idx, price, time)
+            elif not is_high and before_price > price and after_price > price:
+                self._push_low(idx, price, time)
+        return rest
+
+    # ------------------------------------------------------------------
+    # Lọc đỉnh / đáy liên tiếp
+    # ------------------------------------------------------------------
+    def _push_high(self, idx, price, time):
+        self._vh.append(idx)
+        self._vh_price.append(price)
+        self._vh_time.append(time)
+        self._hi_keep.append(None)
+
+        m = len(self._vh) - 1
+        if self._hi_ptr != m - 1:
+            return
+        cur = m - 1
+        # Đỉnh dùng các đáy hợp lệ (chưa lọc) để kiểm tra "có đáy ở giữa"
+        between = bisect_right(self._vl, self._vh[cur]) < bisect_left(self._vl, idx)
+        if between:
+            self._decide_high(cur, True)
+            self._hi_ptr = m
+        elif self._vh_price[cur] > price:
+            self._decide_high(cur, True)
+            self._hi_keep[m] = False   # bỏ đỉnh sau
+            self._hi_ptr = m + 1
+        else:
+            self._decide_high(cur, False)
+            self._hi_ptr = m
+
+    def _decide_high(self, pos, keep):
+        self._hi_keep[pos] = keep
+        if keep:
+            self._hi_kept.append(self._vh[pos])
+
+    def _push_low(self, idx, price, time):
+        self._vl.append(idx)
+        self._vl_price.append(price)
+        self._vl_time.append(time)
+        self._lo_keep.append(None)
+
+    def _advance_lows(self):
+        # Cặp đáy (cur, next) chỉ được quyết định khi mọi đỉnh nằm trước `next`
+        # đã có trạng thái lọc cuối cùng
+        while self._lo_ptr + 1 < len(self._vl):
+            cur = self._lo_ptr
+            nxt = cur + 1
+            q = bisect_left(self._vh, self._vl[nxt])
+            if q > self._hi_ptr:
+                return
+            if q == len(self._vh) and q > 0 and self._hi_keep[q - 1] is not True:
+                return  # đỉnh cuối tạm thời luôn được giữ → chưa chắc chắn
+            between = bisect_right(self._hi_kept, self._vl[cur]) < bisect_left(self._hi_kept, self._vl[nxt])
+            if between:
+                self._lo_keep[cur] = True
+                self._lo_kept.append(cur)
+                self._lo_ptr = nxt
+            elif self._vl_price[cur] < self._vl_price[nxt]:
+                self._lo_keep[cur] = True
+                self._lo_kept.append(cur)
+                self._lo_keep[nxt] = False
+                self._lo_ptr = nxt + 1
+            else:
+                self._lo_keep[cur] = False
+                self._lo_ptr = nxt
+
+    # ------------------------------------------------------------------
+    # Ảnh chụp kết quả (gồm các nến cuối chưa đủ cửa sổ phải)
+    # ------------------------------------------------------------------
+    def _snapshot(self, count=None):
+        checkpoint = self._checkpoint()
+        try:
+            # Các nến cuối được xét với cửa sổ phải bị cắt, giống swing_high_low
+            first = max(self.n - self.window, 0)
+            size = len(self._bars)
+            for c in range(first, self.n):
+                self._on_bar(c, size - (self.n - c), size)
+
+            # Đỉnh cuối luôn được giữ dù chưa (hoặc đã bị) loại bởi bộ lọc
+            extra = self._vh[-1] if self._vh and self._hi_keep[-1] is not True else None
+            highs = self._hi_kept if count is None else self._hi_kept[-count:]
+            highs = highs + ([extra] if extra is not None else [])
+            highs = [bisect_left(self._vh, idx) for idx in highs[-count if count else 0:]]
+            lows = self._lows_with_tail(extra, count)
+            return (
+                [(self._vh[p], self._vh_time[p], self._vh_price[p]) for p in highs],
+                [(self._vl[p], self._vl_time[p], self._vl_price[p]) for p in lows],
+            )
+        finally:
+            self._rollback(checkpoint)
+
+    def _lows_with_tail(self, extra, count=None):
+        kept = list(self._lo_kept if count is None else self._lo_kept[-count:])
+        if not self._vl:
+            return kept
+
+        def high_between(a, b):
+            # Có đỉnh đã lọc nằm giữa hai đáy? (gồm cả đỉnh cuối tạm giữ)
+            if bisect_right(self._hi_kept, a) < bisect_left(self._hi_kept, b):
+                return True
+            return extra is not None and a < extra < b
+
+        # Chạy phần đuôi chưa quyết định của bộ lọc đáy với tập đỉnh đã lọc
+        i = self._lo_ptr
+        n = len(self._vl)
+        while i < n:
+            if i == n - 1:
+                kept.append(i)
+                break
+            if high_between(self._vl[i], self._vl[i + 1]):
+                kept.append(i)
+                i += 1
+            elif self._vl_price[i] < self._vl_price[i + 1]:
+                kept.append(i)
+                i += 2
+            else:
+                i += 1
+        if kept[-1] != n - 1:
+            kept.append(n - 1)   # đáy cuối luôn được giữ
+        return kept[-count if count else 0:]
+
+    def _checkpoint(self):
+        return {
+            'last': (self._last_high, self._last_low),
+            'pending': (list(self._pending_highs), list(self._pending_lows)),
+            'sizes': (len(self._vh), len(self._vl), len(self._hi_kept), len(self._lo_kept)),
+            'ptr': (self._hi_ptr, self._lo_ptr),
+            'keep': (self._hi_keep[self._hi_ptr:], self._lo_keep[self._lo_ptr:]),
+        }
+
+    def _rollback(self, cp):
+        self._last_high, self._last_low = cp['last']
+        self._pending_highs, self._pending_lows = cp['pending']
+        n_vh, n_vl, n_hk, n_lk = cp['sizes']
+        for lst in (self._vh, self._vh_price, self._vh_time):
+            del lst[n_vh:]
+        for lst in (self._vl, self._vl_price, self._vl_time):
+            del lst[n_vl:]
+        del self._hi_kept[n_hk:]
+        del self._lo_kept[n_lk:]
+        self._hi_ptr, self._lo_ptr = cp['ptr']
+        self._hi_keep[self._hi_ptr:] = cp['keep'][0]
+        self._lo_keep[self._lo_ptr:] = cp['keep'][1]
+
+
+def _beats(price, left, right, greater):
+    # Cùng quy tắc NaN với raw_swing_points: NaN bên cạnh bị bỏ qua, nhưng bên
+    # trái có nến mà toàn NaN → không phải swing; chính nến NaN → không phải swing
+    if price != price:
+        return False
+    left_valid = [p for p in left if p == p]
+    if left and not left_valid:
+        return False
+    others = left_valid + [p for p in right if p == p]
+    return all(price > p for p in others) if greater else all(price < p for p in others)
+
+
+def _dump_time(t):
+    return None if t is None else pd.Timestamp(t).isoformat()
+
+
+def _load_time(t):
+    return None if t is None else pd.Timestamp(t)
@@ -1,158 +1,212 @@
 #./indicator/swing_high_low.py
 import numpy as np
 
+# Số nến mỗi bên dùng để xác định swing theo timeframe
+SWING_WINDOWS = {'D': 5, 'W': 4, 'M': 3}
+
+
+def raw_swing_points(highs, lows, window):
+    """
+    Tìm swing high/low thô bằng NumPy (không vòng lặp Python theo từng nến).
+    Nến i là swing high nếu high[i] lớn hơn mọi high trong `window` nến hai bên
+    (cửa sổ bị cắt ở hai đầu chuỗi), tương tự swing low với low.
+    Trả về 2 mảng bool (swing_high, swing_low).
+    """
+    highs = np.asarray(highs, dtype=np.float64)
+    lows = np.asarray(lows, dtype=np.float64)
+    n = len(highs)
+
+    # Max/min của `window` nến bên trái và bên phải (không tính chính nến i).
+    # fmax/fmin bỏ qua NaN như pandas .max()/.min(); một bên toàn NaN → NaN
+    left_max, right_max = np.full(n, np.nan), np.full(n, np.nan)
+    left_min, right_min = np.full(n, np.nan), np.full(n, np.nan)
+    for k in range(1, min(window, n - 1) + 1):
+        np.fmax(left_max[k:], highs[:-k], out=left_max[k:])
+        np.fmax(right_max[:-k], highs[k:], out=right_max[:-k])
+        np.fmin(left_min[k:], lows[:-k], out=left_min[k:])
+        np.fmin(right_min[:-k], lows[k:], out=right_min[:-k])
+    if n:
+        # Nến đầu không có bên trái, nến cuối không có bên phải
+        left_max[0] = right_max[-1] = -np.inf
+        left_min[0] = right_min[-1] = np.inf
+
+    # Giống max(trái, phải) của bản gốc: trái NaN → NaN (không phải swing), phải NaN → trái
+    max_around = np.where(np.isnan(left_max), np.nan, np.fmax(left_max, right_max))
+    min_around = np.where(np.isnan(left_min), np.nan, np.fmin(left_min, right_min))
+    return highs > max_around, lows < min_around
+
+
 def swing_high_low(df, timeframe='D'):
     """
     Tính swing high/low và lọc đỉnh/đáy hợp lệ theo logic đã cho.
     Trả về df với 2 cột mới: 'valid_swing_high', 'valid_swing_low' (bool).
+    Với OHLCV (không thêm cột được) dùng swing_point_indices.
     """
     df = df.reset_index(drop=True)
 
-    if(timeframe == 'D'):
-        window = 5
-    elif(timeframe == 'W'):
-        window = 4
-    elif(timeframe == 'M'):
-        window = 3
-    else:
+    if timeframe not in SWING_WINDOWS:
         raise ValueError("Invalid timeframe")
-    highs = df['high']
-    lows = df['low']
-
-    swing_highs = []
-    swing_lows = []
-    n = len(df)
+    window = SWING_WINDOWS[timeframe]
 
     # Tìm điểm swing high/low thô
-    for i in range(n):
-        start = max(i - window, 0)
-        end = min(i + window + 1, n)
+    swing_highs, swing_lows = raw_swing_points(df['high'].to_numpy(), df['low'].to_numpy(), window)
 
-        max_around = highs[start:i].max() if i > start else -np.inf
-        max_around = max(max_around, highs[i+1:end].max() if i+1 < end else -np.inf)
+    df['swing_high'] = swing_highs
+    df['swing_low'] = swing_lows
 
-        min_around = lows[start:i].min() if i > start else np.inf
-        min_around = min(min_around, lows[i+1:end].min() if i+1 < end else np.inf)
+    valid_highs, valid_lows = valid_swing_points(
+        swing_highs, swing_lows, df['high'].to_numpy(), df['low'].to_numpy()
+    )
 
-        swing_highs.append(highs[i] > max_around)
-        swing_lows.append(lows[i] < min_around)
+    df['valid_swing_high'] = np.isin(np.arange(len(df)), valid_highs)
+    df['valid_swing_low'] = np.isin(np.arange(len(df)), valid_lows)
 
-    df['swing_high'] = swing_highs
-    df['swing_low'] = swing_lows
+    return df
 
-    swing_high_indices = df.index[df['swing_high']].tolist()
-    swing_low_indices = df.index[df['swing_low']].tolist()
-
-    # Hàm kiểm tra swing high hợp lệ
-    def is_valid_swing_high(sh_idx):
-        lows_before = [idx for idx in swing_low_indices if idx < sh_idx]
-        lows_after = [idx for idx in swing_low_indices if idx > sh_idx]
-        if not lows_before or not lows_after:
-            return False
-        low_before_idx = max(lows_before)
-        low_after_idx = min(lows_after)
-        high_price = df.at[sh_idx, 'high']
-        low_before_price = df.at[low_before_idx, 'low']
-        low_after_price = df.at[low_after_idx, 'low']
-        return low_before_price < high_price and low_after_price < high_price
-
-    # Hàm kiểm tra swing low hợp lệ
-    def is_valid_swing_low(sl_idx):
-        highs_before = [idx for idx in swing_high_indices if idx < sl_idx]
-        highs_after = [idx for idx in swing_high_indices if idx > sl_idx]
-        if not highs_before or not highs_after:
-            return False
-        high_before_idx = max(highs_before)
-        high_after_idx = min(highs_after)
-        low_price = df.at[sl_idx, 'low']
-        high_before_price = df.at[high_before_idx, 'high']
-        high_after_price = df.at[high_after_idx, 'high']
-        return high_before_price > low_price and high_after_price > low_price
-
-    valid_swing_highs = [(idx, is_valid_swing_high(idx)) for idx in swing_high_indices]
-    valid_swing_lows = [(idx, is_valid_swing_low(idx)) for idx in swing_low_indices]
-
-    df['valid_swing_high'] = False
-    for idx, valid in valid_swing_highs:
-        df.at[idx, 'valid_swing_high'] = valid
-
-    df['valid_swing_low'] = False
-    for idx, valid in valid_swing_lows:
-        df.at[idx, 'valid_swing_low'] = valid
-
-    # Lọc loại bỏ các đỉnh liên tiếp không hợp lệ
-    def filter_consecutive_highs():
-        valid_highs = df.index[df['valid_swing_high']].tolist()
-        valid_lows = df.index[df['valid_swing_low']].tolist()
-        filtered_highs = []
-
-        i = 0
-        while i < len(valid_highs):
-            curr_high = valid_highs[i]
-
-            if i == len(valid_highs) - 1:
-                filtered_highs.append(curr_high)
-                break
-
-            next_high = valid_highs[i + 1]
-            lows_between = [low for low in valid_lows if curr_high < low < next_high]
-
-            if lows_between:
-                filtered_highs.append(curr_high)
-                i += 1
-            else:
-                curr_high_price = df.at[curr_high, 'high']
-                next_high_price = df.at[next_high, 'high']
-
-                if curr_high_price > next_high_price:
-                    filtered_highs.append(curr_high)
-                    i += 2  # bỏ next_high
-                else:
-                    i += 1  # bỏ curr_high, giữ next_high
-
-        if valid_highs[-1] not in filtered_highs:
-            filtered_highs.append(valid_highs[-1])
-
-        df['valid_swing_high'] = False
-        df.loc[filtered_highs, 'valid_swing_high'] = True
-
-    # Lọc loại bỏ các đáy liên tiếp không hợp lệ
-    def filter_consecutive_lows():
-        valid_lows = df.index[df['valid_swing_low']].tolist()
-        valid_highs = df.index[df['valid_swing_high']].tolist()
-        filtered_lows = []
-
-        i = 0
-        while i < len(valid_lows):
-            curr_low = valid_lows[i]
-
-            if i == len(valid_lows) - 1:
-                filtered_lows.append(curr_low)
-                break
-
-            next_low = valid_lows[i + 1]
-            highs_between = [high for high in valid_highs if curr_low < high < next_low]
-
-            if highs_between:
-                filtered_lows.append(curr_low)
-                i += 1
-            else:
-                curr_low_price = df.at[curr_low, 'low']
-                next_low_price = df.at[next_low, 'low']
-
-                if curr_low_price < next_low_price:
-                    filtered_lows.append(curr_low)
-                    i += 2  # bỏ next_low
-                else:
-                    i += 1  # bỏ curr_low, giữ next_low
-
-        if valid_lows[-1] not in filtered_lows:
-            filtered_lows.append(valid_lows[-1])
-
-        df['valid_swing_low'] = False
-        df.loc[filtered_lows, 'valid_swing_low'] = True
-
-    filter_consecutive_highs()
-    filter_consecutive_lows()
-
-    return df
\ No newline at end of file
+
+def swing_high_low_tail(df, timeframe='D', count=2, size=256):
+    """
+    Như swing_high_low nhưng chỉ tính trên đoạn cuối ngắn nhất đủ để `count`
+    đỉnh/đáy hợp lệ cuối cùng giống hệt khi tính trên toàn bộ lịch sử.
+    Đoạn bắt đầu từ `size` nến và nhân đôi tới khi thoả (tệ nhất là toàn bộ df).
+    Trả về df của đoạn cuối đó (index reset) với các cột như swing_high_low.
+    """
+    if timeframe not in SWING_WINDOWS:
+        raise ValueError("Invalid timeframe")
+    start = _tail_start(df['high'].to_numpy(dtype=np.float64), df['low'].to_numpy(dtype=np.float64),
+                        SWING_WINDOWS[timeframe], count, size)
+    return swing_high_low(df.iloc[start:], timeframe)
+
+
+def swing_point_indices(highs, lows, timeframe='D', tail=False, count=2, size=256):
+    """
+    Bản mảng của swing_high_low / swing_high_low_tail (dùng cho OHLCV, không dựng DataFrame).
+    Trả về 2 mảng chỉ số (valid_highs, valid_lows) theo vị trí trong `highs` / `lows`;
+    tail=True: chỉ `count` điểm cuối được đảm bảo giống khi tính trên toàn bộ chuỗi.
+    """
+    if timeframe not in SWING_WINDOWS:
+        raise ValueError("Invalid timeframe")
+    window = SWING_WINDOWS[timeframe]
+    highs = np.asarray(highs, dtype=np.float64)
+    lows = np.asarray(lows, dtype=np.float64)
+
+    start = _tail_start(highs, lows, window, count, size) if tail else 0
+    highs, lows = highs[start:], lows[start:]
+    swing_highs, swing_lows = raw_swing_points(highs, lows, window)
+    valid_highs, valid_lows = valid_swing_points(swing_highs, swing_lows, highs, lows)
+    return valid_highs + start, valid_lows + start
+
+
+def _tail_start(highs, lows, window, count, size):
+    # Vị trí đầu đoạn cuối ngắn nhất (từ `size` nến, nhân đôi) cho kết quả chính xác
+    n = len(highs)
+    while True:
+        start = max(n - size, 0)
+        part_highs, part_lows = highs[start:], lows[start:]
+        swing_highs, swing_lows = raw_swing_points(part_highs, part_lows, window)
+        if start == 0 or _tail_is_exact(swing_highs, swing_lows, part_highs, part_lows, window, count):
+            return start
+        size *= 2
+
+
+def _tail_is_exact(swing_highs, swing_lows, highs, lows, window, count):
+    # Các điểm gần đầu đoạn bị sai vì thiếu lịch sử; kiểm tra xem `count` điểm
+    # cuối có nằm sau các điểm "đồng bộ" hay không:
+    # 1. Nến từ vị trí `window` trở đi có swing thô chính xác.
+    # 2. Pivot nằm sau swing high và swing low chính xác đầu tiên → tính hợp lệ chính xác.
+    # 3. Bộ lọc liên tiếp: pivot j không thể bị bỏ qua khi cặp (j-1, j) không "nhảy",
+    #    nên từ j trở đi kết quả lọc giống khi chạy từ đầu lịch sử.
+    sh_idx = np.flatnonzero(swing_highs)
+    sl_idx = np.flatnonzero(swing_lows)
+    first_high = sh_idx[sh_idx >= window]
+    first_low = sl_idx[sl_idx >= window]
+    if len(first_high) == 0 or len(first_low) == 0:
+        return False
+    exact_from = max(first_high[0], first_low[0])
+
+    valid_highs = _validate_pivots(sh_idx, sl_idx, highs, lows, is_high=True)
+    valid_lows = _validate_pivots(sl_idx, sh_idx, lows, highs, is_high=False)
+    filtered_highs = _filter_consecutive(valid_highs, valid_lows, highs, is_high=True)
+    filtered_lows = _filter_consecutive(valid_lows, filtered_highs, lows, is_high=False)
+
+    sync_high = _sync_point(valid_highs, valid_lows, highs, exact_from, is_high=True)
+    if sync_high is None or np.sum(filtered_highs >= sync_high) < count:
+        return False
+    sync_low = _sync_point(valid_lows, filtered_highs, lows, max(exact_from, sync_high), is_high=False)
+    return sync_low is not None and np.sum(filtered_lows >= sync_low) >= count
+
+
+def _sync_point(pivots, opposite, prices, exact_from, is_high):
+    # Pivot đầu tiên (sau exact_from) mà cặp với pivot liền trước không "nhảy"
+    pivots = pivots[pivots > exact_from]
+    if len(pivots) < 2:
+        return None
+    curr, nxt = pivots[:-1], pivots[1:]
+    has_between = np.searchsorted(opposite, curr, side='right') < np.searchsorted(opposite, nxt, side='left')
+    better = prices[curr] > prices[nxt] if is_high else prices[curr] < prices[nxt]
+    steps = np.flatnonzero(has_between | ~better)
+    return nxt[steps[0]] if len(steps) else None
+
+
+def valid_swing_points(swing_highs, swing_lows, highs, lows):
+    """
+    Kiểm tra swing hợp lệ và lọc các đỉnh/đáy liên tiếp trên mảng chỉ số đã sắp xếp.
+    - Swing high hợp lệ khi swing low liền trước và liền sau đều thấp hơn nó
+      (tương tự cho swing low).
+    - Hai đỉnh hợp lệ liên tiếp không có đáy hợp lệ nào ở giữa → giữ đỉnh cao hơn
+      (đáy: giữ đáy thấp hơn). Đỉnh được lọc trước, đáy lọc dựa trên đỉnh đã lọc.
+    Trả về 2 mảng chỉ số (valid_highs, valid_lows).
+    """
+    highs = np.asarray(highs, dtype=np.float64)
+    lows = np.asarray(lows, dtype=np.float64)
+    sh_idx = np.flatnonzero(swing_highs)
+    sl_idx = np.flatnonzero(swing_lows)
+
+    valid_highs = _validate_pivots(sh_idx, sl_idx, highs, lows, is_high=True)
+    valid_lows = _validate_pivots(sl_idx, sh_idx, lows, highs, is_high=False)
+
+    # Lọc loại bỏ các đỉnh liên tiếp không hợp lệ, rồi tới các đáy
+    valid_highs = _filter_consecutive(valid_highs, valid_lows, highs, is_high=True)
+    valid_lows = _filter_consecutive(valid_lows, valid_highs, lows, is_high=False)
+
+    return valid_highs, valid_lows
+
+
+def _validate_pivots(pivots, opposite, prices, opposite_prices, is_high):
+    # Swing đối diện gần nhất bên trái (< pivot) và bên phải (> pivot)
+    if len(pivots) == 0 or len(opposite) == 0:
+        return pivots[:0]
+    before = np.searchsorted(opposite, pivots, side='left') - 1
+    after = np.searchsorted(opposite, pivots, side='right')
+    has_both = (before >= 0) & (after < len(opposite))
+
+    price = prices[pivots]
+    price_before = opposite_prices[opposite[np.clip(before, 0, None)]]
+    price_after = opposite_prices[opposite[np.clip(after, None, len(opposite) - 1)]]
+    if is_high:
+        ok = (price_before < price) & (price_after < price)
+    else:
+        ok = (price_before > price) & (price_after > price)
+    return pivots[has_both & ok]
+
+
+def _filter_consecutive(pivots, opposite, prices, is_high):
+    n = len(pivots)
+    if n < 2:
+        return pivots
+
+    curr, nxt = pivots[:-1], pivots[1:]
+    # Có swing đối diện nằm giữa hai pivot liên tiếp?
+    has_between = np.searchsorted(opposite, curr, side='right') < np.searchsorted(opposite, nxt, side='left')
+    better = prices[curr] > prices[nxt] if is_high else prices[curr] < prices[nxt]
+
+    # Giữ curr và bỏ next (nhảy 2 bước). Trong một chuỗi liên tiếp các bước
+    # như vậy, pivot bị bỏ xen kẽ: vị trí lẻ tính từ đầu chuỗi.
+    jump = ~has_between & better
+    j = np.arange(n - 1)
+    run_start = np.maximum.accumulate(np.where(jump & np.r_[True, ~jump[:-1]], j, 0))
+    skipped = np.r_[False, jump & ((j - run_start) % 2 == 0)]
+
+    keep = np.r_[has_between | better, True] & ~skipped
+    keep[-1] = True  # pivot cuối luôn được giữ
+    return pivots[keep]
@@ -0,0 +1,304 @@
+"""bar_cache.py
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Persistent, incremental on‑disk cache for OHLCV bars downloaded with
+``price_loaders.tradingview.load_asset_price``.
+
+Each ``(TradingView symbol, timeframe)`` pair lives in its own directory::
+
+    <root>/<FX_EURUSD>/<1D>/meta.json
+    <root>/<FX_EURUSD>/<1D>/00000.npz      # closed segment (never rewritten)
+    <root>/<FX_EURUSD>/<1D>/00001.npz      # tail segment (rewritten on append)
+
+Segments are columnar ``.npz`` archives (one array per column, time stored as
+int64 nanoseconds UTC) holding at most ``segment_size`` rows. On a warm run
+only the bars newer than the last cached timestamp are requested, the
+still‑forming last bar is replaced, and only the tail segment is rewritten.
+
+Classes
+-------
+BarCache
+    The cache itself. ``BarCache.load(tv_symbol, bars, timeframe, fetch)``
+    is a drop‑in replacement for ``load_asset_price(tv_symbol, bars,
+    timeframe, None)``.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import threading
+import time
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+###############################################################################
+# 1️⃣  Độ dài (ước lượng) của một bar theo timeframe                          #
+###############################################################################
+# 👉  Dùng để ước lượng số bar mới cần tải kể từ timestamp cuối trong cache.   #
+#      Giá trị được chọn *nhỏ hơn hoặc bằng* độ dài thực để luôn tải dư.       #
+###############################################################################
+BAR_SECONDS: dict[str, int] = {
+    "1D": 86_400,
+    "1W": 7 * 86_400,
+    "1M": 28 * 86_400,
+    "3M": 89 * 86_400,
+    "12M": 365 * 86_400,
+}
+
+Fetcher = Callable[[str, int, str, None], "pd.DataFrame | None"]
+
+###############################################################################
+# 2️⃣  BarCache                                                               #
+###############################################################################
+
+class BarCache:
+    """On‑disk incremental cache keyed by TradingView symbol and timeframe.
+
+    Parameters
+    ----------
+    root : str, default="data/cache/bars"
+        Thư mục gốc chứa cache.
+    last_bar_ttl : float, default=900
+        Số giây mà bar cuối (đang hình thành) được coi là còn "tươi". Trong
+        khoảng này ``load`` trả về dữ liệu cache mà không gọi mạng.
+    segment_size : int, default=4096
+        Số dòng tối đa mỗi segment. Chỉ segment cuối được ghi lại khi append.
+    overlap_bars : int, default=2
+        Số bar tải dư so với ước lượng để chắc chắn chồng lên bar cuối cache.
+    """
+
+    def __init__(
+        self,
+        root: str = "data/cache/bars",
+        last_bar_ttl: float = 900,
+        segment_size: int = 4096,
+        overlap_bars: int = 2,
+    ) -> None:
+        self.root = root
+        self.last_bar_ttl = last_bar_ttl
+        self.segment_size = segment_size
+        self.overlap_bars = overlap_bars
+
+        self.hits = 0           # trả từ cache, không gọi mạng
+        self.refreshes = 0      # cache có sẵn, chỉ tải phần đuôi
+        self.misses = 0         # tải toàn bộ lịch sử
+        self.bars_fetched = 0   # tổng số bar nhận từ mạng
+
+        self._lock = threading.Lock()
+        self._key_locks: dict[tuple[str, str], threading.RLock] = {}
+
+    # ------------------------------------------------------------------
+    # API công khai
+    # ------------------------------------------------------------------
+    def load(
+        self,
+        tv_symbol: str,
+        bars: int,
+        timeframe: str,
+        fetch: Fetcher,
+    ) -> pd.DataFrame | None:
+        """Return the last *bars* bars of *tv_symbol*, fetching only what is new.
+
+        Parameters
+        ----------
+        tv_symbol : str
+            Mã TradingView đầy đủ, ví dụ ``"FX:EURUSD"``.
+        bars : int
+            Số bar cần trả về (giống ``look_back_bars``).
+        timeframe : str
+            ``"1D"``, ``"1W"``, ``"1M"``…
+        fetch : callable
+            Hàm có chữ ký của ``load_asset_price`` dùng khi cần gọi mạng.
+        """
+
+        with self._key_lock(tv_symbol, timeframe):
+            meta = self._read_meta(tv_symbol, timeframe)
+
+            # ---------- Miss: chưa có cache hoặc cache nông hơn yêu cầu ----
+            if meta is None or (meta["rows"] < bars and meta["depth"] < bars):
+                return self._full_fetch(tv_symbol, bars, timeframe, fetch)
+
+            # ---------- Hit: bar cuối vẫn còn trong TTL --------------------
+            if time.time() - meta["fetched_at"] < self.last_bar_ttl:
+                self._count("hits")
+                return self._read_frame(tv_symbol, timeframe, meta).tail(bars).reset_index(drop=True)
+
+            # ---------- Refresh: chỉ tải các bar mới -----------------------
+            elapsed = time.time() - meta["last_time"] / 1e9
+            step = BAR_SECONDS.get(timeframe, 86_400)
+            n_new = max(math.ceil(elapsed / step), 0) + self.overlap_bars
+            fresh = fetch(tv_symbol, n_new, timeframe, None)
+            if fresh is None or fresh.empty:
+                self._count("hits")
+                return self._read_frame(tv_symbol, timeframe, meta).tail(bars).reset_index(drop=True)
+
+            fresh = self._normalize(fresh)
+            self._count("bars_fetched", len(fresh))
+            if fresh["time"].iloc[0].value > meta["last_time"]:
+                # Khoảng trống giữa cache và dữ liệu mới → tải lại từ đầu
+                return self._full_fetch(tv_symbol, max(bars, meta["depth"]), timeframe, fetch)
+
+            self._count("refreshes")
+            self._append(tv_symbol, timeframe, meta, fresh)
+            return self._read_frame(tv_symbol, timeframe, meta).tail(bars).reset_index(drop=True)
+
+    def stats(self) -> dict[str, float]:
+        """Return hit / refresh / miss counters and the network‑free hit rate."""
+
+        total = self.hits + self.refreshes + self.misses
+        return {
+            "hits": self.hits,
+            "refreshes": self.refreshes,
+            "misses": self.misses,
+            "bars_fetched": self.bars_fetched,
+            "hit_rate": (self.hits + self.refreshes) / total if total else 0.0,
+        }
+
+    def invalidate(self, tv_symbol: str, timeframe: str) -> None:
+        """Drop the cached series of ``(tv_symbol, timeframe)``."""
+
+        with self._key_lock(tv_symbol, timeframe):
+            folder = self._folder(tv_symbol, timeframe)
+            if os.path.isdir(folder):
+                # meta.json xoá trước: dừng giữa chừng → cache miss, không phải
+                # meta trỏ tới segment đã mất
+                meta = os.path.join(folder, "meta.json")
+                if os.path.exists(meta):
+                    os.remove(meta)
+                for name in os.listdir(folder):
+                    os.remove(os.path.join(folder, name))
+
+    # ------------------------------------------------------------------
+    # Nội bộ: tải / ghi
+    # ------------------------------------------------------------------
+    def _full_fetch(
+        self, tv_symbol: str, bars: int, timeframe: str, fetch: Fetcher
+    ) -> pd.DataFrame | None:
+        df = fetch(tv_symbol, bars, timeframe, None)
+        self._count("misses")
+        if df is None or df.empty:
+            return df
+
+        df = self._normalize(df)
+        self._count("bars_fetched", len(df))
+        self.invalidate(tv_symbol, timeframe)
+        meta = {"rows": 0, "segments": 0, "columns": list(df.columns), "depth": bars}
+        self._write_segments(tv_symbol, timeframe, meta, df, first_segment=0)
+        return df.tail(bars).reset_index(drop=True)
+
+    def _append(
+        self, tv_symbol: str, timeframe: str, meta: dict, fresh: pd.DataFrame
+    ) -> None:
+        """Replace rows ``>= fresh.time[0]`` in the tail segment and append."""
+
+        cut = fresh["time"].iloc[0]
+        seg_no = meta["segments"] - 1
+        tail = self._read_segment(tv_symbol, timeframe, seg_no, meta["columns"])
+
+        # Phần chồng lấn vượt qua đầu segment đuôi → lùi thêm segment trước
+        while seg_no > 0 and tail["time"].iloc[0] >= cut:
+            seg_no -= 1
+            prev = self._read_segment(tv_symbol, timeframe, seg_no, meta["columns"])
+            tail = pd.concat([prev, tail], ignore_index=True)
+
+        meta["rows"] -= len(tail)
+        tail = tail[tail["time"] < cut]
+        merged = pd.concat([tail, fresh[meta["columns"]]], ignore_index=True)
+        self._write_segments(tv_symbol, timeframe, meta, merged, first_segment=seg_no)
+
+    def _write_segments(
+        self,
+        tv_symbol: str,
+        timeframe: str,
+        meta: dict,
+        df: pd.DataFrame,
+        first_segment: int,
+    ) -> None:
+        folder = self._folder(tv_symbol, timeframe)
+        os.makedirs(folder, exist_ok=True)
+
+        # Ghi mọi segment ra file tạm trước, rồi mới thay vào chỗ và ghi
+        # meta.json sau cùng: lỗi giữa chừng khi ghi file tạm không chạm tới
+        # các segment mà meta hiện tại đang mô tả
+        staged: list[tuple[str, str]] = []
+        seg_no = first_segment
+        for start in range(0, len(df), self.segment_size):
+            chunk = df.iloc[start:start + self.segment_size]
+            arrays = {
+                col: (
+                    chunk[col].array.asi8 if col == "time" else chunk[col].to_numpy()
+                )
+                for col in meta["columns"]
+            }
+            path = os.path.join(folder, f"{seg_no:05d}.npz")
+            tmp = path + ".tmp.npz"
+            np.savez(tmp, **arrays)
+            staged.append((tmp, path))
+            seg_no += 1
+
+        for tmp, path in staged:
+            os.replace(tmp, path)
+
+        meta["rows"] += len(df)
+        meta["segments"] = seg_no
+        meta["last_time"] = int(df["time"].iloc[-1].value)
+        meta["fetched_at"] = time.time()
+        self._write_meta(tv_symbol, timeframe, meta)
+
+    # ------------------------------------------------------------------
+    # Nội bộ: đọc
+    # ------------------------------------------------------------------
+    def _read_frame(self, tv_symbol: str, timeframe: str, meta: dict) -> pd.DataFrame:
+        parts = [
+            self._read_segment(tv_symbol, timeframe, i, meta["columns"])
+            for i in range(meta["segments"])
+        ]
+        return pd.concat(parts, ignore_index=True)
+
+    def _read_segment(
+        self, tv_symbol: str, timeframe: str, seg_no: int, columns: list[str]
+    ) -> pd.DataFrame:
+        path = os.path.join(self._folder(tv_symbol, timeframe), f"{seg_no:05d}.npz")
+        with np.load(path) as npz:
+            data = {col: npz[col] for col in columns}
+        data["time"] = pd.to_datetime(data["time"], utc=True)
+        return pd.DataFrame(data, columns=columns)
+
+    def _read_meta(self, tv_symbol: str, timeframe: str) -> dict | None:
+        path = os.path.join(self._folder(tv_symbol, timeframe), "meta.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_meta(self, tv_symbol: str, timeframe: str, meta: dict) -> None:
+        path = os.path.join(self._folder(tv_symbol, timeframe), "meta.json")
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, path)
+
+    # ------------------------------------------------------------------
+    # Tiện ích
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+        df = df.copy()
+        df["time"] = pd.to_datetime(df["time"], utc=True).astype("datetime64[ns, UTC]")
+        return df.sort_values("time").drop_duplicates("time", keep="last").reset_index(drop=True)
+
+    def _folder(self, tv_symbol: str, timeframe: str) -> str:
+        safe = re.sub(r"[^A-Za-z0-9]+", "_", tv_symbol).strip("_")
+        return os.path.join(self.root, safe, timeframe)
+
+    def _key_lock(self, tv_symbol: str, timeframe: str) -> threading.RLock:
+        with self._lock:
+            return self._key_locks.setdefault((tv_symbol, timeframe), threading.RLock())
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
@@ -0,0 +1,146 @@
+"""cot_ingest.py
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Incremental ingestion of CFTC legacy‑futures reports into a
+:class:`~utils.cot_store.CotStore`.
+
+Instead of rebuilding ``legacy_fut`` with ``cot_all_reports`` every week, new
+reports are appended to the store: only report dates newer than each market's
+high‑water mark are added, and source files that have not changed since the
+last run (same size and mtime) are not even read. Re‑running an ingestion is
+therefore idempotent.
+
+Two kinds of text files are understood:
+
+* yearly / historical archives (``annual.txt``, ``FUT86_16.txt``…) with the
+  CFTC header row;
+* the headerless weekly file ``deafut.txt`` published by the CFTC.
+
+Functions
+---------
+ingest_directory(store, folder, patterns)
+    Ingest every new or changed CFTC text file found in *folder*.
+
+read_legacy_txt(path)
+    Read one CFTC text file, keeping only the columns the store uses.
+
+refresh_from_cftc(store, year)
+    Download the current year's legacy report with ``cot_reports`` and append
+    whatever is new.
+"""
+
+from __future__ import annotations
+
+import glob
+import os
+
+import pandas as pd
+
+from utils.cot_store import COT_COLUMNS, MARKET_COLUMN, CotStore
+
+# Vị trí cột trong file không có header (deafut.txt) theo định dạng legacy
+_HEADERLESS_POSITIONS: dict[int, str] = {
+    0: MARKET_COLUMN,
+    2: "As of Date in Form YYYY-MM-DD",
+    7: "Open Interest (All)",
+    8: "Noncommercial Positions-Long (All)",
+    9: "Noncommercial Positions-Short (All)",
+    11: "Commercial Positions-Long (All)",
+    12: "Commercial Positions-Short (All)",
+    15: "Nonreportable Positions-Long (All)",
+    16: "Nonreportable Positions-Short (All)",
+}
+
+###############################################################################
+# 1️⃣  Hàm ingest_directory                                                   #
+###############################################################################
+
+def ingest_directory(
+    store: CotStore,
+    folder: str,
+    patterns: tuple[str, ...] = ("*.txt", "*.csv"),
+) -> dict[str, int]:
+    """Append every new or changed CFTC text file in *folder* to *store*.
+
+    Parameters
+    ----------
+    store : CotStore
+        Store đích (thường mở bằng ``CotStore.open(root)``).
+    folder : str
+        Thư mục chứa file CFTC (hoặc thư mục giả lập khi test offline).
+    patterns : tuple[str, ...]
+        Mẫu tên file cần quét.
+
+    Returns
+    -------
+    dict[str, int]
+        Tổng số dòng mới được thêm cho mỗi thị trường.
+    """
+
+    paths = sorted({p for pattern in patterns for p in glob.glob(os.path.join(folder, pattern))})
+
+    # Đọc mọi file mới / đã đổi trước, rồi append một lần: thứ tự file trong
+    # thư mục không ảnh hưởng tới high‑water mark của từng thị trường.
+    changed: dict[str, dict] = {}
+    frames: list[pd.DataFrame] = []
+    for path in paths:
+        name = os.path.basename(path)
+        stat = os.stat(path)
+        fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if store.sources.get(name) == fingerprint:
+            continue  # file không đổi kể từ lần nạp trước
+
+        rows = read_legacy_txt(path)
+        frames.append(rows)
+        changed[name] = fingerprint
+        print(f"📥 Read {name}: {len(rows)} rows")
+
+    added = store.append(pd.concat(frames, ignore_index=True)) if frames else {}
+    for name, fingerprint in changed.items():
+        store.record_source(name, fingerprint)
+
+    print(f"✅ COT store up to date: {sum(added.values())} new rows in {len(added)} markets")
+    return added
+
+###############################################################################
+# 2️⃣  Hàm read_legacy_txt                                                    #
+###############################################################################
+
+def read_legacy_txt(path: str) -> pd.DataFrame:
+    """Read a CFTC legacy‑futures text file, projected to the stored columns.
+
+    File có header được đọc theo tên cột; file không header (``deafut.txt``)
+    được đọc theo vị trí cột chuẩn của báo cáo legacy.
+    """
+
+    with open(path, encoding="utf-8", errors="replace") as f:
+        has_header = MARKET_COLUMN in f.readline()
+
+    if has_header:
+        return pd.read_csv(path, usecols=[MARKET_COLUMN, *COT_COLUMNS], low_memory=False)
+
+    df = pd.read_csv(
+        path,
+        header=None,
+        usecols=list(_HEADERLESS_POSITIONS),
+        low_memory=False,
+    )
+    return df.rename(columns=_HEADERLESS_POSITIONS)[[MARKET_COLUMN, *COT_COLUMNS]]
+
+###############################################################################
+# 3️⃣  Hàm refresh_from_cftc                                                  #
+###############################################################################
+
+def refresh_from_cftc(store: CotStore, year: int | None = None) -> dict[str, int]:
+    """Download one year of legacy futures reports and append what is new.
+
+    Chỉ tải file của năm *year* (mặc định năm hiện tại) thay vì toàn bộ lịch
+    sử như ``cot_all_reports``.
+    """
+
+    from cot_reports import cot_year  # import muộn: chỉ cần khi lên mạng
+
+    year = year or pd.Timestamp.utcnow().year
+    legacy_year = cot_year(year, cot_report_type="legacy_fut", store_txt=False, verbose=False)
+    added = store.append(legacy_year)
+    print(f"✅ COT {year}: {sum(added.values())} new rows in {len(added)} markets")
+    return added
@@ -0,0 +1,327 @@
+"""cot_store.py
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Compact, market‑partitioned store for the CFTC *legacy futures* COT table.
+
+The raw ``legacy_fut`` DataFrame returned by ``cot_reports`` has ~130 columns
+and decades of rows for every market; :func:`utils.data_loader.load_cot_data`
+only needs the report date and seven position columns. :class:`CotStore`
+keeps exactly those columns, one partition per market, with the market name
+as a categorical. Looking up a symbol resolves its report name against the
+(few hundred) market names once and then reads whole partitions, instead of
+running ``str.contains`` over every row of the table.
+
+On disk a store is a directory::
+
+    <root>/manifest.json                 # markets → file, rows, last date
+    <root>/markets/<EURO_FX_CHICAGO_...>_<hash>.npz
+
+Partitions are loaded lazily the first time a market is requested. The
+manifest also records a per‑market high‑water mark (``last_date``) so new
+weekly reports can be appended without touching older data (see
+:mod:`utils.cot_ingest`).
+
+Classes
+-------
+CotStore
+    ``CotStore.from_legacy(legacy_fut)`` / ``CotStore.open(root)`` build or
+    open a store; ``store.get(report_name)`` returns the matching rows and
+    ``store.append(rows)`` adds only report dates newer than the store holds.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+###############################################################################
+# 1️⃣  Cột được giữ lại                                                       #
+###############################################################################
+MARKET_COLUMN = "Market and Exchange Names"
+
+COT_COLUMNS: dict[str, str] = {
+    "As of Date in Form YYYY-MM-DD": "date",
+    "Commercial Positions-Long (All)": "commercial_long",
+    "Commercial Positions-Short (All)": "commercial_short",
+    "Noncommercial Positions-Long (All)": "noncommercial_long",
+    "Noncommercial Positions-Short (All)": "noncommercial_short",
+    "Nonreportable Positions-Long (All)": "retail_long",
+    "Nonreportable Positions-Short (All)": "retail_short",
+    "Open Interest (All)": "open_interest",
+}
+
+###############################################################################
+# 2️⃣  CotStore                                                               #
+###############################################################################
+
+class CotStore:
+    """Market‑partitioned COT table holding only the columns the loader uses.
+
+    Parameters
+    ----------
+    root : str | None, default=None
+        Thư mục lưu store. *None* → store chỉ nằm trong bộ nhớ.
+    """
+
+    def __init__(self, root: str | None = None) -> None:
+        self.root = root
+        self._manifest: dict[str, dict] = {}
+        self._partitions: dict[str, pd.DataFrame] = {}
+        self._resolved: dict[str, list[str]] = {}
+        self._lock = threading.Lock()
+        # File nguồn đã nạp: tên → {"size", "mtime_ns"} (dùng bởi cot_ingest)
+        self.sources: dict[str, dict] = {}
+
+    # ------------------------------------------------------------------
+    # Khởi tạo
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_legacy(cls, legacy_fut: pd.DataFrame, root: str | None = None) -> "CotStore":
+        """Build a store from a raw ``legacy_fut`` DataFrame.
+
+        Chỉ 8 cột trong :data:`COT_COLUMNS` cùng tên thị trường được giữ lại.
+        Nếu có *root*, store được ghi xuống đĩa ngay.
+        """
+
+        store = cls(root)
+        for market, part in _split_by_market(legacy_fut).items():
+            store._partitions[market] = part
+            store._manifest[market] = _manifest_entry(market, part)
+        if root is not None:
+            store.save()
+        return store
+
+    @classmethod
+    def open(cls, root: str) -> "CotStore":
+        """Open an on‑disk store; partitions are read on first access."""
+
+        store = cls(root)
+        path = os.path.join(root, "manifest.json")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            store._manifest = manifest["markets"]
+            store.sources = manifest.get("sources", {})
+        return store
+
+    # ------------------------------------------------------------------
+    # Truy vấn
+    # ------------------------------------------------------------------
+    @property
+    def markets(self) -> list[str]:
+        """All market names in the store, sorted."""
+
+        return sorted(self._manifest)
+
+    def resolve(self, report_name: str) -> list[str]:
+        """Return the markets whose name contains *report_name* (case‑insensitive).
+
+        Cùng ngữ nghĩa với ``str.contains(report_name, case=False)`` trong
+        ``load_cot_data`` nhưng chỉ quét danh sách tên thị trường, và kết quả
+        được nhớ lại cho những lần gọi sau.
+        """
+
+        key = report_name.lower()
+        with self._lock:
+            if key not in self._resolved:
+                pattern = re.compile(report_name, re.IGNORECASE)
+                self._resolved[key] = [m for m in self.markets if pattern.search(m)]
+            return self._resolved[key]
+
+    def partition(self, market: str) -> pd.DataFrame:
+        """Return the (read‑only, shared) partition of one exact *market* name."""
+
+        with self._lock:
+            part = self._partitions.get(market)
+            if part is None:
+                if market not in self._manifest:
+                    raise KeyError(f"Market '{market}' is not in the COT store.")
+                part = self._read_partition(market)
+                self._partitions[market] = part
+            return part
+
+    def get(self, report_name: str) -> pd.DataFrame:
+        """Return a copy of every row whose market name contains *report_name*.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Cột ``market`` (categorical), ``date`` (UTC) và 7 cột vị thế theo
+            tên đã chuẩn hoá trong :data:`COT_COLUMNS`. Rỗng nếu không khớp.
+        """
+
+        markets = self.resolve(report_name)
+        if not markets:
+            return _empty_frame()
+        parts = [self.partition(m) for m in markets]
+        if len(parts) == 1:
+            return parts[0].copy()
+        df = pd.concat(parts, ignore_index=True)
+        df["market"] = df["market"].astype(str).astype("category")
+        return df
+
+    def high_water_mark(self, market: str) -> pd.Timestamp | None:
+        """Latest report date stored for *market* (``None`` if unknown)."""
+
+        entry = self._manifest.get(market)
+        if entry is None or entry["last_date"] is None:
+            return None
+        return pd.Timestamp(entry["last_date"], tz="UTC")
+
+    # ------------------------------------------------------------------
+    # Cập nhật
+    # ------------------------------------------------------------------
+    def append(self, legacy_rows: pd.DataFrame) -> dict[str, int]:
+        """Append rows newer than each market's high‑water mark.
+
+        Parameters
+        ----------
+        legacy_rows : pandas.DataFrame
+            Các dòng theo định dạng *legacy_fut* (tên cột gốc của CFTC), ví dụ
+            một file năm hoặc báo cáo tuần mới nhất.
+
+        Returns
+        -------
+        dict[str, int]
+            Số dòng thực sự được thêm cho mỗi thị trường. Gọi lại với cùng dữ
+            liệu sẽ trả về ``{}`` (idempotent).
+        """
+
+        added: dict[str, int] = {}
+        for market, new in _split_by_market(legacy_rows).items():
+            mark = self.high_water_mark(market)
+            if mark is not None:
+                new = new[new["date"] > mark]
+            new = new.drop_duplicates("date").sort_values("date", kind="stable")
+            if new.empty:
+                continue
+
+            if market in self._manifest:
+                merged = pd.concat([self.partition(market), new], ignore_index=True)
+                merged["market"] = pd.Categorical([market] * len(merged))
+            else:
+                merged = new.reset_index(drop=True)
+
+            with self._lock:
+                self._partitions[market] = merged
+                self._manifest[market] = _manifest_entry(market, merged)
+                self._resolved.clear()
+            if self.root is not None:
+                os.makedirs(os.path.join(self.root, "markets"), exist_ok=True)
+                self._write_partition(market, merged)
+            added[market] = len(new)
+
+        if added and self.root is not None:
+            self._write_manifest()
+        return added
+
+    def record_source(self, name: str, fingerprint: dict) -> None:
+        """Remember that source file *name* has been ingested."""
+
+        self.sources[name] = fingerprint
+        if self.root is not None:
+            self._write_manifest()
+
+    def memory_usage(self) -> int:
+        """Bytes held by the partitions currently loaded in memory."""
+
+        return int(sum(p.memory_usage(deep=True).sum() for p in self._partitions.values()))
+
+    # ------------------------------------------------------------------
+    # Ghi / đọc đĩa
+    # ------------------------------------------------------------------
+    def save(self, root: str | None = None) -> None:
+        """Write every loaded partition and the manifest under *root*."""
+
+        self.root = root or self.root
+        if self.root is None:
+            raise ValueError("CotStore has no root directory to save to.")
+
+        os.makedirs(os.path.join(self.root, "markets"), exist_ok=True)
+        for market, part in self._partitions.items():
+            self._write_partition(market, part)
+        self._write_manifest()
+
+    def _write_partition(self, market: str, part: pd.DataFrame) -> None:
+        entry = self._manifest[market] = _manifest_entry(market, part)
+        path = os.path.join(self.root, "markets", entry["file"])
+        arrays = {
+            col: part[col].array.asi8 if col == "date" else part[col].to_numpy()
+            for col in COT_COLUMNS.values()
+        }
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    def _read_partition(self, market: str) -> pd.DataFrame:
+        path = os.path.join(self.root, "markets", self._manifest[market]["file"])
+        with np.load(path) as npz:
+            data = {col: npz[col] for col in COT_COLUMNS.values()}
+        data["date"] = pd.to_datetime(data["date"], utc=True)
+        df = pd.DataFrame(data)
+        df.insert(0, "market", pd.Categorical([market] * len(df)))
+        return df
+
+    def _write_manifest(self) -> None:
+        path = os.path.join(self.root, "manifest.json")
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "columns": list(COT_COLUMNS.values()),
+                    "markets": self._manifest,
+                    "sources": self.sources,
+                },
+                f,
+                indent=1,
+            )
+        os.replace(tmp, path)
+
+###############################################################################
+# 3️⃣  Helper nội bộ                                                          #
+###############################################################################
+
+def _split_by_market(legacy_fut: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """Project *legacy_fut* to the stored columns and split it per market."""
+
+    df = legacy_fut[[MARKET_COLUMN, *COT_COLUMNS]].rename(columns=COT_COLUMNS)
+    df = df.rename(columns={MARKET_COLUMN: "market"})
+    df["market"] = df["market"].astype(str).str.strip().astype("category")
+    df["date"] = pd.to_datetime(df["date"], utc=True).astype("datetime64[ns, UTC]")
+    for col in list(COT_COLUMNS.values())[1:]:
+        df[col] = pd.to_numeric(df[col], downcast="integer")
+
+    parts: dict[str, pd.DataFrame] = {}
+    for market, part in df.groupby("market", observed=True, sort=False):
+        part = part.reset_index(drop=True)
+        part["market"] = pd.Categorical([market] * len(part))
+        parts[str(market)] = part
+    return parts
+
+
+def _manifest_entry(market: str, part: pd.DataFrame) -> dict:
+    return {
+        "file": _partition_file(market),
+        "rows": len(part),
+        "last_date": part["date"].max().strftime("%Y-%m-%d") if len(part) else None,
+    }
+
+
+def _partition_file(market: str) -> str:
+    # Tên dễ đọc + hash của tên đầy đủ: "S&P 500 - CME" và "S&P 500 / CME"
+    # rút gọn giống nhau nhưng không được ghi đè file của nhau
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", market).strip("_")
+    digest = hashlib.sha1(market.encode("utf-8")).hexdigest()[:10]
+    return f"{slug}_{digest}.npz"
+
+
+def _empty_frame() -> pd.DataFrame:
+    df = pd.DataFrame({col: [] for col in COT_COLUMNS.values()})
+    df["date"] = pd.to_datetime(df["date"], utc=True)
+    df.insert(0, "market", pd.Categorical([]))
+    return df
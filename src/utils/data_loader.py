@@ -6,31 +6,80 @@ crypto, stock).
 
 Functions
 ---------
-load_portfolio_data(category, years, legacy_fut)
+load_portfolio_data(category, years, legacy_fut, max_workers, resample, ohlcv)
     Entry‑point that orchestrates loading price, economic, and COT data for
-    every symbol that belongs to *category*.
-
-load_asset_data(symbol, years)
-    Download daily / weekly / monthly OHLCV data for a single *symbol*.
-
-load_economic_data(symbol, look_back_bars)
+    every symbol that belongs to *category*. With ``max_workers > 1`` every
+    network request is dispatched to a bounded thread pool.
+
+compare_fetch_modes(category, years, legacy_fut, max_workers)
+    Run the serial and the concurrent loader back to back and report the
+    wall‑clock time of each.
+
+enable_bar_cache(root, last_bar_ttl) / disable_bar_cache()
+    Route every price download through an on‑disk incremental
+    :class:`~utils.bar_cache.BarCache`.
+
+enable_price_client(pool_size, batch_size, url) / disable_price_client()
+    Download through a pooled, multiplexing
+    :class:`~utils.price_client.PriceClient` instead of one connection per
+    ``load_asset_price`` call.
+
+enable_request_scheduler(rate, …) / disable_request_scheduler()
+    Send every TradingView request through one rate‑limited
+    :class:`~utils.request_scheduler.RequestScheduler` (token bucket, price
+    before macro, retry with jittered backoff).
+
+load_asset_data(symbol, years, executor, resample, ohlcv)
+    Download daily / weekly / monthly OHLCV data for a single *symbol*. With
+    ``resample=True`` only the daily series is downloaded and the weekly /
+    monthly bars are rebuilt locally (see :mod:`utils.resampling`). With
+    ``ohlcv=True`` the bars are returned as read‑only
+    :class:`technical.ohlcv.OHLCV` arrays instead of DataFrames.
+
+load_economic_data(symbol, look_back_bars, executor, usd_conversion)
     Fetch a predefined set of macro‑economic indicators that correspond to the
     country / currency behind *symbol*. Automatically converts monetary values
-    to USD using the most recent FX rate where required.
+    to USD using the most recent FX rate (or, with ``usd_conversion="asof"``,
+    the FX rate on each observation's date) where required. Indicator series
+    and FX rates are shared process‑wide, so each country is downloaded once.
+
+COUNTRY_MAP / economic_indicators(country_code)
+    Symbol → (country, currency) map and the indicator set of a country,
+    shared with :mod:`utils.macro_panel`.
+
+macro_cache_info() / clear_macro_cache()
+    Inspect or reset the process‑wide indicator / FX cache.
 
 load_cot_data(symbol, years, legacy_fut)
     Extract COT (Commitment of Traders) data from an already‑loaded CFTC
-    *legacy_fut* DataFrame.
+    *legacy_fut* DataFrame or from a :class:`~utils.cot_store.CotStore`.
 
 convert_to_usd(value, is_usd_quote, exchange_rate)
     Helper to convert a numeric *value* to USD given the direction of the FX
     quote.
+
+convert_frame_to_usd(df, is_usd_quote, fx_times, fx_close, asof)
+    Vectorized form of :func:`convert_to_usd` over a whole OHLC block, with the
+    latest rate or an as‑of join on each row's date.
 """
 
 from __future__ import annotations
 
+import threading
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Hashable
+
+import numpy as np
 import pandas as pd
-from price_loaders.tradingview import load_asset_price
+
+from utils.bar_cache import BarCache
+from utils.cot_store import COT_COLUMNS, CotStore
+from utils.price_client import TV_URL, PriceClient
+from utils.request_scheduler import MACRO, PRICE, RequestScheduler
+from utils.resampling import resample_ohlcv
+
+from technical.ohlcv import OHLCV
 
 ###############################################################################
 # 1️⃣  Danh mục tài sản (PORTFOLIO)                                            #
@@ -74,6 +123,118 @@ PORTFOLIO: dict[str, list[str]] = {
     ],
 }
 
+# Cache giá trên đĩa (tắt mặc định, bật bằng :func:`enable_bar_cache`)
+BAR_CACHE: BarCache | None = None
+
+
+def enable_bar_cache(root: str = "data/cache/bars", last_bar_ttl: float = 900) -> BarCache:
+    """Serve price bars from an incremental on‑disk cache and return it.
+
+    Sau khi bật, mỗi lần gọi :func:`load_asset_data` chỉ tải các bar mới hơn
+    timestamp cuối trong cache; ``BAR_CACHE.stats()`` cho biết hit / miss.
+    """
+
+    global BAR_CACHE
+    BAR_CACHE = BarCache(root=root, last_bar_ttl=last_bar_ttl)
+    return BAR_CACHE
+
+
+def disable_bar_cache() -> None:
+    """Go back to downloading the full history on every call."""
+
+    global BAR_CACHE
+    BAR_CACHE = None
+
+# Client giữ kết nối dùng lại (tắt mặc định, bật bằng :func:`enable_price_client`)
+PRICE_CLIENT: PriceClient | None = None
+
+
+def enable_price_client(pool_size: int = 4, batch_size: int = 8, url: str = TV_URL) -> PriceClient:
+    """Fetch prices through a pool of reusable sessions and return the client.
+
+    Các request của một symbol được ghép trên cùng kết nối; request lẻ (chỉ
+    số vĩ mô, tỷ giá) mượn một kết nối đã xác thực thay vì mở kết nối mới.
+    ``PRICE_CLIENT.stats()`` cho biết số kết nối đã mở / dùng lại.
+    """
+
+    global PRICE_CLIENT
+    disable_price_client()
+    PRICE_CLIENT = PriceClient(url, pool_size=pool_size, batch_size=batch_size)
+    return PRICE_CLIENT
+
+
+def disable_price_client() -> None:
+    """Close the pooled sessions and go back to ``load_asset_price``."""
+
+    global PRICE_CLIENT
+    if PRICE_CLIENT is not None:
+        PRICE_CLIENT.close()
+    PRICE_CLIENT = None
+
+
+def _load_price(tv_symbol: str, bars: int, timeframe: str, tz: str | None = None) -> pd.DataFrame | None:
+    """``load_asset_price`` through :data:`PRICE_CLIENT` when it is enabled."""
+
+    if PRICE_CLIENT is not None:
+        return PRICE_CLIENT.fetch(tv_symbol, bars, timeframe, tz)
+    # Import khi cần: các phần không tải mạng (panel, quy đổi, COT) dùng được
+    # mà không cần price_loaders
+    from price_loaders.tradingview import load_asset_price
+
+    return load_asset_price(tv_symbol, bars, timeframe, tz)
+
+# Bộ lập lịch request (tắt mặc định, bật bằng :func:`enable_request_scheduler`)
+SCHEDULER: RequestScheduler | None = None
+
+
+def enable_request_scheduler(
+    rate: float = 4.0,
+    burst: float | None = None,
+    workers: int = 8,
+    max_retries: int = 4,
+    base_delay: float = 0.5,
+    max_delay: float = 30.0,
+    fetch=None,
+) -> RequestScheduler:
+    """Route every TradingView request through a rate‑limited scheduler and return it.
+
+    Mọi request giá / vĩ mô / tỷ giá đi chung một token bucket (*rate*
+    request mỗi giây), giá được ưu tiên trước vĩ mô và lỗi tạm thời được thử
+    lại với backoff; ``SCHEDULER.stats()`` cho biết độ trễ và số lần thử lại.
+    *fetch* thay nguồn mặc định (``load_asset_price`` hoặc :data:`PRICE_CLIENT`),
+    ví dụ :class:`~utils.request_scheduler.FakeSource`.
+    """
+
+    global SCHEDULER
+    disable_request_scheduler()
+    SCHEDULER = RequestScheduler(
+        fetch or _load_price,
+        rate=rate,
+        burst=burst,
+        workers=workers,
+        max_retries=max_retries,
+        base_delay=base_delay,
+        max_delay=max_delay,
+    )
+    return SCHEDULER
+
+
+def disable_request_scheduler() -> None:
+    """Stop the scheduler and call the price source directly again."""
+
+    global SCHEDULER
+    if SCHEDULER is not None:
+        SCHEDULER.close()
+    SCHEDULER = None
+
+
+def _price_fetcher(priority: int = PRICE):
+    """The price source, or its scheduled equivalent at *priority*."""
+
+    if SCHEDULER is None:
+        return _load_price
+    return SCHEDULER.fetcher(priority)
+
 ###############################################################################
 # 2️⃣  Hàm load_portfolio_data                                                #
 ###############################################################################
@@ -81,7 +242,10 @@ PORTFOLIO: dict[str, list[str]] = {
 def load_portfolio_data(
     category: str,
     years: int,
-    legacy_fut: pd.DataFrame,
+    legacy_fut: pd.DataFrame | CotStore,
+    max_workers: int | None = None,
+    resample: bool = False,
+    ohlcv: bool = False,
 ) -> dict[str, dict[str, pd.DataFrame | None]]:
     """Load price, macro‑economic, and COT data for every symbol in *category*.
 
@@ -91,8 +255,18 @@ def load_portfolio_data(
         Tên nhóm tài sản, phải tồn tại trong :data:`PORTFOLIO`.
     years : int
         Số năm dữ liệu lịch sử cần lấy (áp dụng cho giá và COT).
-    legacy_fut : pandas.DataFrame
-        DataFrame chứa toàn bộ dữ liệu COT (bảng *legacy_fut* đã tải sẵn).
+    legacy_fut : pandas.DataFrame | CotStore
+        DataFrame chứa toàn bộ dữ liệu COT (bảng *legacy_fut* đã tải sẵn),
+        hoặc :class:`CotStore` tương ứng để tra cứu theo thị trường.
+    max_workers : int | None, default=None
+        Số request mạng tối đa chạy đồng thời. *None* hoặc ``<= 1`` giữ
+        nguyên chế độ tuần tự; lớn hơn 1 thì mọi lệnh gọi giá / chỉ số vĩ mô /
+        tỷ giá của tất cả symbol được đưa vào một thread pool có giới hạn.
+    resample : bool, default=False
+        Chỉ tải dữ liệu ngày rồi dựng bar tuần / tháng tại chỗ.
+    ohlcv : bool, default=False
+        Trả giá dưới dạng :class:`technical.ohlcv.OHLCV` (mảng cột chỉ đọc)
+        thay cho DataFrame; xem :func:`load_asset_data`.
 
     Returns
     -------
@@ -104,52 +278,222 @@ def load_portfolio_data(
     if category not in PORTFOLIO:
         raise ValueError(f"Category '{category}' not found in PORTFOLIO.")
 
-    results: dict[str, dict[str, pd.DataFrame | None]] = {}
-
-    for symbol in PORTFOLIO[category]:
-        print(f"⏳ Loading data for {symbol}…")
+    symbols = PORTFOLIO[category]
+    started = time.perf_counter()
 
-        # -----------------------------------------------------
-        # 2.1. Giá tài sản
-        # -----------------------------------------------------
-        try:
-            asset_data = load_asset_data(symbol, years)
-        except Exception as exc:  # noqa: BLE001  # broad but intentional
-            print(f"❌ Failed to load asset data for {symbol}: {exc}")
-            asset_data = None
-
-        # -----------------------------------------------------
-        # 2.2. Dữ liệu kinh tế vĩ mô
-        # -----------------------------------------------------
-        try:
-            economic_data = load_economic_data(symbol, look_back_bars=1)
-        except Exception as exc:  # noqa: BLE001
-            print(f"❌ Failed to load economic data for {symbol}: {exc}")
-            economic_data = None
-
-        # -----------------------------------------------------
-        # 2.3. Báo cáo COT
-        # -----------------------------------------------------
-        try:
-            cot_data = load_cot_data(symbol, years, legacy_fut)
-        except Exception as exc:  # noqa: BLE001
-            print(f"❌ Failed to load COT data for {symbol}: {exc}")
-            cot_data = None
-
-        # Gộp kết quả
-        results[symbol] = {
-            "asset_data": asset_data,
-            "economic_data": economic_data,
-            "cot_data": cot_data,
+    if max_workers is None or max_workers <= 1:
+        mode = "serial"
+        results = {
+            symbol: _load_symbol_data(symbol, years, legacy_fut, resample=resample, ohlcv=ohlcv)
+            for symbol in symbols
         }
+    else:
+        # Hai pool riêng biệt: *fetch_pool* giới hạn số request đang bay,
+        # *symbol_pool* chỉ điều phối và chờ kết quả → không bao giờ deadlock
+        # vì task trong fetch_pool không chờ task nào khác.
+        mode = f"concurrent, max_workers={max_workers}"
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="fetch"
+        ) as fetch_pool, ThreadPoolExecutor(
+            max_workers=len(symbols), thread_name_prefix="symbol"
+        ) as symbol_pool:
+            futures = {
+                symbol: symbol_pool.submit(
+                    _load_symbol_data, symbol, years, legacy_fut, fetch_pool, resample, ohlcv
+                )
+                for symbol in symbols
+            }
+            # Giữ đúng thứ tự symbol như trong PORTFOLIO
+            results = {symbol: future.result() for symbol, future in futures.items()}
+
+    elapsed = time.perf_counter() - started
+    print(f"⏱️ Loaded {len(symbols)} symbols of '{category}' in {elapsed:.2f}s ({mode})")
 
     return results
 
+
+def compare_fetch_modes(
+    category: str,
+    years: int,
+    legacy_fut: pd.DataFrame | CotStore,
+    max_workers: int = 8,
+) -> dict[str, float]:
+    """Time the serial and the concurrent loader for *category*.
+
+    Both modes download the full dataset, so this doubles the network load;
+    use it only to measure the benefit of ``max_workers`` on a given link.
+
+    Returns
+    -------
+    dict[str, float]
+        ``{"serial": seconds, "concurrent": seconds, "speedup": ratio}``.
+    """
+
+    timings: dict[str, float] = {}
+    for mode, workers in (("serial", None), ("concurrent", max_workers)):
+        started = time.perf_counter()
+        load_portfolio_data(category, years, legacy_fut, max_workers=workers)
+        timings[mode] = time.perf_counter() - started
+
+    timings["speedup"] = (
+        timings["serial"] / timings["concurrent"] if timings["concurrent"] else float("nan")
+    )
+    print(
+        f"⏱️ serial={timings['serial']:.2f}s  "
+        f"concurrent={timings['concurrent']:.2f}s  "
+        f"speedup×{timings['speedup']:.1f}"
+    )
+    return timings
+
+
+def _load_symbol_data(
+    symbol: str,
+    years: int,
+    legacy_fut: pd.DataFrame | CotStore,
+    executor: Executor | None = None,
+    resample: bool = False,
+    ohlcv: bool = False,
+) -> dict[str, pd.DataFrame | None]:
+    """Load the three datasets of one *symbol*, isolating each failure."""
+
+    print(f"⏳ Loading data for {symbol}…")
+
+    # -----------------------------------------------------
+    # 2.1. Giá tài sản
+    # -----------------------------------------------------
+    try:
+        asset_data = load_asset_data(symbol, years, executor=executor, resample=resample, ohlcv=ohlcv)
+    except Exception as exc:  # noqa: BLE001  # broad but intentional
+        print(f"❌ Failed to load asset data for {symbol}: {exc}")
+        asset_data = None
+
+    # -----------------------------------------------------
+    # 2.2. Dữ liệu kinh tế vĩ mô
+    # -----------------------------------------------------
+    try:
+        economic_data = load_economic_data(symbol, look_back_bars=1, executor=executor)
+    except Exception as exc:  # noqa: BLE001
+        print(f"❌ Failed to load economic data for {symbol}: {exc}")
+        economic_data = None
+
+    # -----------------------------------------------------
+    # 2.3. Báo cáo COT
+    # -----------------------------------------------------
+    try:
+        cot_data = load_cot_data(symbol, years, legacy_fut)
+    except Exception as exc:  # noqa: BLE001
+        print(f"❌ Failed to load COT data for {symbol}: {exc}")
+        cot_data = None
+
+    # Gộp kết quả
+    return {
+        "asset_data": asset_data,
+        "economic_data": economic_data,
+        "cot_data": cot_data,
+    }
+
+
+def _fetch_many(
+    requests: dict[Hashable, tuple[str, int, str]],
+    executor: Executor | None = None,
+    cache: BarCache | None = None,
+    shared: bool = False,
+) -> dict[Hashable, pd.DataFrame | None]:
+    """Run ``load_asset_price`` for every ``(symbol, bars, timeframe)`` request.
+
+    Without *executor* the requests run one after another; otherwise they are
+    all submitted first and then gathered, so they overlap on the network.
+    With *cache* each request goes through :meth:`BarCache.load`; with
+    *shared* it goes through the process‑wide macro cache. When
+    :data:`SCHEDULER` is enabled the downloads are queued on it (price
+    requests before shared macro / FX ones). With :data:`PRICE_CLIENT` alone
+    the plain requests are multiplexed over its pooled sessions in one call.
+    Exceptions propagate to the caller exactly as in the serial path.
+    """
+
+    if PRICE_CLIENT is not None and SCHEDULER is None and cache is None and not shared:
+        return PRICE_CLIENT.fetch_many(requests)
+
+    def fetch(tv_symbol: str, bars: int, timeframe: str) -> pd.DataFrame | None:
+        if shared:
+            return _fetch_shared(tv_symbol, bars, timeframe)
+        if cache is not None:
+            return cache.load(tv_symbol, bars, timeframe, _price_fetcher(PRICE))
+        return _price_fetcher(PRICE)(tv_symbol, bars, timeframe, None)
+
+    if executor is None:
+        return {key: fetch(*request) for key, request in requests.items()}
+
+    futures = {key: executor.submit(fetch, *request) for key, request in requests.items()}
+    return {key: future.result() for key, future in futures.items()}
+
+# Cache chỉ số vĩ mô / tỷ giá dùng chung trong cả tiến trình.
+# Key ``(tv_symbol, bars, timeframe)`` – với chỉ số vĩ mô, ``tv_symbol`` là
+# ``ECONOMICS:<country><indicator>`` nên key tương đương
+# ``(country_code, indicator, timeframe)``. Giá trị là *Future* để các thread
+# cùng chờ một request đang bay thay vì gửi trùng.
+_MACRO_CACHE: dict[tuple[str, int, str], Future] = {}
+_MACRO_LOCK = threading.Lock()
+_MACRO_STATS = {"hits": 0, "misses": 0}
+
+
+def _fetch_shared(tv_symbol: str, bars: int, timeframe: str) -> pd.DataFrame | None:
+    """Fetch through :data:`_MACRO_CACHE`, downloading each key at most once."""
+
+    key = (tv_symbol, bars, timeframe)
+    with _MACRO_LOCK:
+        future = _MACRO_CACHE.get(key)
+        owner = future is None
+        if owner:
+            future = _MACRO_CACHE[key] = Future()
+            _MACRO_STATS["misses"] += 1
+        else:
+            _MACRO_STATS["hits"] += 1
+
+    if owner:
+        try:
+            result = _price_fetcher(MACRO)(tv_symbol, bars, timeframe, None)
+        except BaseException as exc:  # noqa: BLE001  # lỗi không được cache
+            with _MACRO_LOCK:
+                _MACRO_CACHE.pop(key, None)
+            future.set_exception(exc)
+        else:
+            if result is None or result.empty:
+                # Kết quả rỗng (thường do lỗi tải) không được cache: lần sau tải lại
+                with _MACRO_LOCK:
+                    _MACRO_CACHE.pop(key, None)
+            future.set_result(result)
+
+    df = future.result()
+    # Trả bản sao để caller có thể chỉnh sửa mà không ảnh hưởng cache
+    return None if df is None else df.copy()
+
+
+def macro_cache_info() -> dict[str, int]:
+    """Return hit / miss counters and the number of cached macro series."""
+
+    with _MACRO_LOCK:
+        return {**_MACRO_STATS, "size": len(_MACRO_CACHE)}
+
+
+def clear_macro_cache() -> None:
+    """Forget every cached indicator / FX series (e.g. before a new day)."""
+
+    with _MACRO_LOCK:
+        _MACRO_CACHE.clear()
+        _MACRO_STATS.update(hits=0, misses=0)
+
 ###############################################################################
 # 3️⃣  Hàm load_asset_data                                                    #
 ###############################################################################
 
-def load_asset_data(symbol: str, years: int) -> dict[str, pd.DataFrame]:
+def load_asset_data(
+    symbol: str,
+    years: int,
+    executor: Executor | None = None,
+    resample: bool = False,
+    ohlcv: bool = False,
+) -> dict[str, pd.DataFrame | OHLCV]:
     """Download daily/weekly/monthly price data for *symbol*.
 
     Parameters
@@ -158,11 +502,21 @@ def load_asset_data(symbol: str, years: int) -> dict[str, pd.DataFrame]:
         Mã giao dịch (ví dụ ``"EURUSD"`` hoặc ``"6E1!"``).
     years : int
         Số năm quá khứ cần tải.
+    executor : concurrent.futures.Executor | None, default=None
+        Nếu có, 3 timeframe được tải song song trên *executor*.
+    resample : bool, default=False
+        Chỉ tải 1D; 1W và 1M được dựng lại bằng
+        :func:`utils.resampling.resample_ohlcv` theo mốc tuần / tháng của
+        TradingView (tiết kiệm 2/3 số request giá).
+    ohlcv : bool, default=False
+        Trả về :class:`technical.ohlcv.OHLCV` (time int64 UTC, giá float64,
+        chỉ đọc) thay cho DataFrame. Các hàm ``technical`` / ``reporting``
+        nhận trực tiếp kiểu này mà không sao chép bảng.
 
     Returns
     -------
-    dict[str, pandas.DataFrame]
-        Bao gồm 3 DataFrame: ``{"1D_data": …, "1W_data": …, "1M_data": …}``.
+    dict[str, pandas.DataFrame | OHLCV]
+        Bao gồm 3 chuỗi nến: ``{"1D_data": …, "1W_data": …, "1M_data": …}``.
 
     Raises
     ------
@@ -208,17 +562,37 @@ def load_asset_data(symbol: str, years: int) -> dict[str, pd.DataFrame]:
 
     # ----------- Tải dữ liệu -------------------------------------------------
     prefix = prefix_map[symbol]
-    data_1d = load_asset_price(f"{prefix}{symbol}", days, "1D", None)
-    data_1w = load_asset_price(f"{prefix}{symbol}", weeks, "1W", None)
-    data_1m = load_asset_price(f"{prefix}{symbol}", months, "1M", None)
+    requests = {"1D": (f"{prefix}{symbol}", days, "1D")}
+    if not resample:
+        requests["1W"] = (f"{prefix}{symbol}", weeks, "1W")
+        requests["1M"] = (f"{prefix}{symbol}", months, "1M")
+    frames = _fetch_many(requests, executor, cache=BAR_CACHE)
+
+    data_1d = frames["1D"]
+    if resample and data_1d is not None and not data_1d.empty:
+        data_1d["time"] = _utc_time(data_1d["time"])
+        frames["1W"] = resample_ohlcv(data_1d, "1W").tail(weeks).reset_index(drop=True)
+        frames["1M"] = resample_ohlcv(data_1d, "1M").tail(months).reset_index(drop=True)
+    data_1w, data_1m = frames.get("1W"), frames.get("1M")
 
     # ----------- Kiểm tra dữ liệu ------------------------------------------
     for tf, df in {"1D": data_1d, "1W": data_1w, "1M": data_1m}.items():
         if df is None or df.empty:
             raise ValueError(f"{tf} data for {symbol} is empty.")
-        df["time"] = pd.to_datetime(df["time"], utc=True)
+        df["time"] = _utc_time(df["time"])
+
+    result = {"1D_data": data_1d, "1W_data": data_1w, "1M_data": data_1m}
+    if ohlcv:
+        result = {key: OHLCV.from_frame(df) for key, df in result.items()}
+    return result
+
 
-    return {"1D_data": data_1d, "1W_data": data_1w, "1M_data": data_1m}
+def _utc_time(times: pd.Series) -> pd.Series:
+    """Parse *times* to UTC once; columns that are already UTC are returned as is."""
+
+    if isinstance(times.dtype, pd.DatetimeTZDtype) and str(times.dt.tz) == "UTC":
+        return times
+    return pd.to_datetime(times, utc=True)
 
 ###############################################################################
 # 4️⃣  Helper convert_to_usd                                                 #
@@ -236,50 +610,34 @@ def convert_to_usd(value: float, is_usd_quote: bool, exchange_rate: float) -> fl
         return value
     return value * exchange_rate if is_usd_quote else value / exchange_rate
 
-###############################################################################
-# 5️⃣  Hàm load_economic_data                                                #
-###############################################################################
 
-def load_economic_data(symbol: str, look_back_bars: int = 1) -> dict[str, pd.DataFrame]:
-    """Fetch macro‑economic indicators for *symbol* and convert to USD.
+# Ánh xạ symbol → (mã quốc gia, tiền tệ bản địa) cho dữ liệu vĩ mô
+COUNTRY_MAP: dict[str, tuple[str, str]] = {
+    # Spot forex
+    "EURUSD": ("EU", "EUR"),
+    "GBPUSD": ("GB", "GBP"),
+    "AUDUSD": ("AU", "AUD"),
+    "NZDUSD": ("NZ", "NZD"),
+    "USDJPY": ("JP", "JPY"),
+    "USDCAD": ("CA", "CAD"),
+    "USDCHF": ("CH", "CHF"),
+    # Futures indices
+    "DX1!": ("US", "USD"),
+    "6E1!": ("EU", "EUR"),
+    "6B1!": ("GB", "GBP"),
+    "6A1!": ("AU", "AUD"),
+    "6N1!": ("NZ", "NZD"),
+    "6J1!": ("JP", "JPY"),
+    "6C1!": ("CA", "CAD"),
+    "6S1!": ("CH", "CHF"),
+}
 
-    Parameters
-    ----------
-    symbol : str
-        Mã giao dịch (forex hoặc future) để suy ra quốc gia / đồng tiền.
-    look_back_bars : int, default=1
-        Số bar lịch sử cần tải cho mỗi chỉ số. Đối với chuỗi tháng/quý, *1* là
-        đủ để lấy giá trị mới nhất.
-    """
 
-    # --------------- 5.1. Ánh xạ symbol → (mã quốc gia, tiền tệ bản địa) ----
-    country_map: dict[str, tuple[str, str]] = {
-        # Spot forex
-        "EURUSD": ("EU", "EUR"),
-        "GBPUSD": ("GB", "GBP"),
-        "AUDUSD": ("AU", "AUD"),
-        "NZDUSD": ("NZ", "NZD"),
-        "USDJPY": ("JP", "JPY"),
-        "USDCAD": ("CA", "CAD"),
-        "USDCHF": ("CH", "CHF"),
-        # Futures indices
-        "DX1!": ("US", "USD"),
-        "6E1!": ("EU", "EUR"),
-        "6B1!": ("GB", "GBP"),
-        "6A1!": ("AU", "AUD"),
-        "6N1!": ("NZ", "NZD"),
-        "6J1!": ("JP", "JPY"),
-        "6C1!": ("CA", "CAD"),
-        "6S1!": ("CH", "CHF"),
-    }
-    if symbol not in country_map:
-        raise ValueError(f"Symbol '{symbol}' is not supported in country_map.")
+def economic_indicators(country_code: str) -> dict[str, tuple[str, str]]:
+    """Indicator name → ``(TradingView symbol, timeframe)`` for *country_code*."""
 
-    country_code, base_currency = country_map[symbol]
     prefix = "ECONOMICS:"
-
-    # --------------- 5.2. Danh sách indicator cần tải -----------------------
-    indicators: dict[str, tuple[str, str]] = {
+    return {
         "GDP_Growth": (f"{prefix}{country_code}GDPYY", "3M"),
         "Interest_Rate": (f"{prefix}{country_code}INTR", "1M"),
         "Inflation_Rate": (f"{prefix}{country_code}IRYY", "1M"),
@@ -296,20 +654,119 @@ def load_economic_data(symbol: str, look_back_bars: int = 1) -> dict[str, pd.Dat
         ),
     }
 
-    economic_data: dict[str, pd.DataFrame] = {}
-    for name, (econ_symbol, timeframe) in indicators.items():
-        print(f"Loading {name} → {econ_symbol} ({timeframe})")
-        df = load_asset_price(econ_symbol, look_back_bars, timeframe, None)
-        if df is not None and not df.empty:
-            df["time"] = pd.to_datetime(df["time"], utc=True)
-            economic_data[name] = df
-        else:
-            print(f"⚠️ No data for {name} ({econ_symbol})")
 
-    # --------------- 5.3. Tính tỷ giá mới nhất để quy đổi sang USD ----------
+# Chỉ số mang giá trị tiền tệ bản địa → quy đổi sang USD
+USD_INDICATORS: tuple[str, ...] = ("Money_Supply", "Trade_Balance")
+MONEY_COLUMNS: tuple[str, ...] = ("open", "high", "low", "close")
+
+# Số ngày FX tải thêm trước quan sát sớm nhất khi quy đổi as‑of
+_FX_MARGIN_DAYS = 10
+
+
+def fx_lookup(exchange_rate_df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """Sorted ``(int64 ns UTC times, close)`` arrays of an FX frame.
+
+    Dựng một lần rồi dùng chung cho mọi chỉ số cần quy đổi. Bar có giá đóng
+    cửa NaN bị bỏ để tra cứu luôn rơi vào tỷ giá hợp lệ gần nhất.
+    """
+
+    times = _ns(exchange_rate_df["time"])
+    close = exchange_rate_df["close"].to_numpy(dtype=float)
+    valid = ~np.isnan(close)
+    if not valid.all():
+        times, close = times[valid], close[valid]
+    if len(times) > 1 and (np.diff(times) < 0).any():
+        order = np.argsort(times, kind="stable")
+        times, close = times[order], close[order]
+    return times, close
+
+
+def convert_frame_to_usd(
+    df: pd.DataFrame,
+    is_usd_quote: bool,
+    fx_times: np.ndarray,
+    fx_close: np.ndarray,
+    asof: bool = False,
+    columns: tuple[str, ...] = MONEY_COLUMNS,
+) -> pd.DataFrame:
+    """Return a copy of *df* with *columns* converted to USD in one array operation.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Chuỗi chỉ số có cột ``time`` (UTC) và các cột giá trị.
+    is_usd_quote : bool
+        ``True`` nếu cặp FX dạng ``BASE/USD`` (nhân), ``False`` nếu ``USD/BASE`` (chia).
+    fx_times, fx_close : numpy.ndarray
+        Kết quả của :func:`fx_lookup`.
+    asof : bool, default=False
+        ``False`` → mọi dòng dùng tỷ giá mới nhất (như :func:`convert_to_usd`);
+        ``True`` → mỗi dòng dùng giá đóng cửa FX gần nhất *tại hoặc trước* ngày
+        của nó. Dòng trước bar FX đầu tiên không có tỷ giá → NaN (không giữ
+        giá trị bằng tiền bản địa).
+    """
+
+    cols = [c for c in columns if c in df.columns]
+    out = df.copy()
+    if not cols or not len(df) or not len(fx_close):
+        return out
+
+    block = df[cols].to_numpy(dtype=float)
+    if asof:
+        pos = np.searchsorted(fx_times, _ns(df["time"]), side="right") - 1
+        rate = np.where(pos >= 0, fx_close[np.maximum(pos, 0)], np.nan)[:, None]
+    else:
+        rate = np.full((len(df), 1), fx_close[-1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[cols] = block * rate if is_usd_quote else block / rate
+    return out
+
+
+def _ns(times: pd.Series) -> np.ndarray:
+    # int64 nanosecond UTC, bất kể đơn vị datetime64 của cột
+    return pd.DatetimeIndex(pd.to_datetime(times, utc=True)).as_unit("ns").asi8
+
+###############################################################################
+# 5️⃣  Hàm load_economic_data                                                #
+###############################################################################
+
+def load_economic_data(
+    symbol: str,
+    look_back_bars: int = 1,
+    executor: Executor | None = None,
+    usd_conversion: str = "latest",
+) -> dict[str, pd.DataFrame]:
+    """Fetch macro‑economic indicators for *symbol* and convert to USD.
+
+    Parameters
+    ----------
+    symbol : str
+        Mã giao dịch (forex hoặc future) để suy ra quốc gia / đồng tiền.
+    look_back_bars : int, default=1
+        Số bar lịch sử cần tải cho mỗi chỉ số. Đối với chuỗi tháng/quý, *1* là
+        đủ để lấy giá trị mới nhất.
+    executor : concurrent.futures.Executor | None, default=None
+        Nếu có, 11 chỉ số và tỷ giá FX được tải song song trên *executor*.
+    usd_conversion : {"latest", "asof"}, default="latest"
+        ``"latest"`` quy đổi cả lịch sử theo tỷ giá mới nhất; ``"asof"`` dùng
+        tỷ giá đóng cửa tại ngày của từng quan sát (tải đủ lịch sử FX ngày).
+    """
+
+    if usd_conversion not in ("latest", "asof"):
+        raise ValueError("usd_conversion must be 'latest' or 'asof'.")
+
+    # --------------- 5.1. Ánh xạ symbol → (mã quốc gia, tiền tệ bản địa) ----
+    if symbol not in COUNTRY_MAP:
+        raise ValueError(f"Symbol '{symbol}' is not supported in country_map.")
+
+    country_code, base_currency = COUNTRY_MAP[symbol]
+
+    # --------------- 5.2. Danh sách indicator cần tải -----------------------
+    indicators = economic_indicators(country_code)
+
+    # --------------- 5.3. Chọn cặp FX để quy đổi sang USD -------------------
     if base_currency == "USD":  # Đơn vị gốc đã là USD
-        exchange_rate_df = None
-        is_usd_quote = True
+        forex_symbol, is_usd_quote = None, True
     else:
         pair1, pair2 = f"{base_currency}USD", f"USD{base_currency}"
         if pair1 in PORTFOLIO.get("forex", []):
@@ -319,32 +776,55 @@ def load_economic_data(symbol: str, look_back_bars: int = 1) -> dict[str, pd.Dat
         else:
             forex_symbol, is_usd_quote = None, True
 
-        exchange_rate_df = (
-            load_asset_price(f"FX:{forex_symbol}", look_back_bars, "1D", None)
-            if forex_symbol
-            else None
-        )
-        if exchange_rate_df is not None:
-            exchange_rate_df["time"] = pd.to_datetime(exchange_rate_df["time"], utc=True)
+    # Gửi request chỉ số (và tỷ giá, ở chế độ latest) cùng lúc
+    requests: dict[str, tuple[str, int, str]] = {}
+    for name, (econ_symbol, timeframe) in indicators.items():
+        print(f"Loading {name} → {econ_symbol} ({timeframe})")
+        requests[name] = (econ_symbol, look_back_bars, timeframe)
+    if forex_symbol and usd_conversion == "latest":
+        requests["__fx__"] = (f"FX:{forex_symbol}", look_back_bars, "1D")
+    frames = _fetch_many(requests, executor, shared=True)
+    if forex_symbol and usd_conversion == "asof":
+        # Số bar FX ngày tính từ quan sát sớm nhất của các chỉ số cần quy đổi
+        starts = [
+            pd.to_datetime(frames[key]["time"], utc=True).min()
+            for key in USD_INDICATORS
+            if frames.get(key) is not None and not frames[key].empty
+        ]
+        if starts:
+            # Theo ngày lịch (FX có thể có bar cuối tuần) + biên an toàn
+            fx_bars = (pd.Timestamp.now(tz="UTC") - min(starts)).days + _FX_MARGIN_DAYS
+            frames.update(_fetch_many({"__fx__": (f"FX:{forex_symbol}", fx_bars, "1D")}, executor, shared=True))
+
+    economic_data: dict[str, pd.DataFrame] = {}
+    for name, (econ_symbol, timeframe) in indicators.items():
+        df = frames[name]
+        if df is not None and not df.empty:
+            df["time"] = pd.to_datetime(df["time"], utc=True)
+            economic_data[name] = df
+        else:
+            print(f"⚠️ No data for {name} ({econ_symbol})")
+
+    exchange_rate_df = frames.get("__fx__")
+    if exchange_rate_df is not None:
+        exchange_rate_df["time"] = pd.to_datetime(exchange_rate_df["time"], utc=True)
 
     # --------------- 5.4. Quy đổi các chỉ số giá trị tiền tệ sang USD -------
-    if exchange_rate_df is not None and not exchange_rate_df.empty:
-        latest_idx = exchange_rate_df["time"].idxmax()
-        latest_rate = exchange_rate_df.loc[latest_idx, "close"]
+    fx_times, fx_close = fx_lookup(exchange_rate_df) if exchange_rate_df is not None else ([], [])
+    if len(fx_close):
+        # Tra cứu tỷ giá dựng một lần, dùng chung cho mọi chỉ số
         print(
             "Latest FX rate",
             f"({forex_symbol})",
-            f"{exchange_rate_df.loc[latest_idx, 'time'].date()}: {latest_rate}",
+            f"{pd.Timestamp(fx_times[-1], tz='UTC').date()}: {fx_close[-1]}",
         )
 
-        for key in ("Money_Supply", "Trade_Balance"):
+        for key in USD_INDICATORS:
             if key in economic_data:
-                df_conv = economic_data[key].copy()
-                for col in ("open", "high", "low", "close"):
-                    df_conv[col] = df_conv[col].apply(
-                        lambda v: convert_to_usd(v, is_usd_quote, latest_rate)
-                    )
-                economic_data[key] = df_conv
+                economic_data[key] = convert_frame_to_usd(
+                    economic_data[key], is_usd_quote, fx_times, fx_close,
+                    asof=usd_conversion == "asof",
+                )
     else:
         print("⚠️ No FX data available → skip USD conversion")
 
@@ -354,7 +834,11 @@ def load_economic_data(symbol: str, look_back_bars: int = 1) -> dict[str, pd.Dat
 # 6️⃣  Hàm load_cot_data                                                     #
 ###############################################################################
 
-def load_cot_data(symbol: str, years: int, legacy_fut: pd.DataFrame) -> pd.DataFrame:  # noqa: D401,E501
+def load_cot_data(
+    symbol: str,
+    years: int,
+    legacy_fut: pd.DataFrame | CotStore,
+) -> pd.DataFrame:  # noqa: D401
     """Extract COT records that correspond to *symbol* from *legacy_fut*.
 
     Parameters
@@ -363,8 +847,10 @@ def load_cot_data(symbol: str, years: int, legacy_fut: pd.DataFrame) -> pd.DataF
         Spot symbol hoặc mã futures (TradingView style).
     years : int
         Số năm lịch sử cần giữ lại.
-    legacy_fut : pandas.DataFrame
-        Toàn bộ dữ liệu COT (định dạng legacy) tải từ CFTC.
+    legacy_fut : pandas.DataFrame | CotStore
+        Toàn bộ dữ liệu COT (định dạng legacy) tải từ CFTC, hoặc một
+        :class:`CotStore` đã chiếu cột và phân vùng theo thị trường. Với
+        store, kết quả chỉ gồm cột ``market`` và 8 cột đã chuẩn hoá.
     """
 
     # --------------- 6.1. Ánh xạ symbol → tên báo cáo COT -------------------
@@ -398,25 +884,19 @@ def load_cot_data(symbol: str, years: int, legacy_fut: pd.DataFrame) -> pd.DataF
     report_name: str = cot_names[symbol]
 
     # --------------- 6.2. Lọc legacy_fut theo report_name -------------------
-    mask = legacy_fut["Market and Exchange Names"].str.contains(
-        report_name, case=False, na=False
-    )
-    cot_raw = legacy_fut.loc[mask].copy()
+    if isinstance(legacy_fut, CotStore):
+        # Đọc thẳng các partition đã đánh chỉ mục theo thị trường
+        cot_raw = legacy_fut.get(report_name)
+    else:
+        mask = legacy_fut["Market and Exchange Names"].str.contains(
+            report_name, case=False, na=False
+        )
+        cot_raw = legacy_fut.loc[mask].copy()
     if cot_raw.empty:
         raise ValueError(f"❌ No COT data found for '{symbol}' ({report_name})")
 
     # --------------- 6.3. Chuẩn hóa cột -------------------------------------
-    rename_map = {
-        "As of Date in Form YYYY-MM-DD": "date",
-        "Commercial Positions-Long (All)": "commercial_long",
-        "Commercial Positions-Short (All)": "commercial_short",
-        "Noncommercial Positions-Long (All)": "noncommercial_long",
-        "Noncommercial Positions-Short (All)": "noncommercial_short",
-        "Nonreportable Positions-Long (All)": "retail_long",
-        "Nonreportable Positions-Short (All)": "retail_short",
-        "Open Interest (All)": "open_interest",
-    }
-    cot_raw.rename(columns=rename_map, inplace=True)
+    cot_raw.rename(columns=COT_COLUMNS, inplace=True)
 
     cot_raw["date"] = pd.to_datetime(cot_raw["date"], utc=True)
 
@@ -0,0 +1,297 @@
+"""indicator_cache.py
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Content‑addressed memoization for the ``technical`` / ``reporting`` functions.
+
+A call is identified by the function name, the parameters and a cheap
+*fingerprint* of every DataFrame / OHLCV / Series / ndarray argument::
+
+    (rows, columns, dtypes, last timestamp, blake2b(first row + last N rows))
+
+so a symbol whose frames did not change since the previous run is served
+from cache and only updated symbols are recomputed. Only the head row and
+the tail of each column are hashed: edits buried in the middle of a long
+history are *not* detected (call ``clear()`` after rewriting history).
+
+Results live in a bounded in‑memory LRU and, optionally, in a pickle tier on
+disk (``<disk_dir>/<ab>/<key>.pkl``) that survives across notebook runs.
+DataFrame / Series / ndarray results are copied on the way in and out, so
+callers may mutate what they receive.
+
+Classes / functions
+-------------------
+fingerprint(obj)
+    Hashable fingerprint of an argument.
+IndicatorCache
+    ``cache.call(func, *args, **kwargs)``, ``cache.memoize(func)``,
+    ``cache.stats()``, ``cache.clear()``.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from technical.ohlcv import OHLCV, PRICE_FIELDS
+
+###############################################################################
+# 1️⃣  Fingerprint                                                            #
+###############################################################################
+# 👉  Chỉ băm nến đầu + `TAIL_ROWS` nến cuối của mỗi cột: O(1) theo độ dài.     #
+###############################################################################
+TAIL_ROWS = 64
+
+
+def fingerprint(obj: Any, tail_rows: int = TAIL_ROWS) -> Any:
+    """Return a hashable, picklable fingerprint of *obj*.
+
+    DataFrame / OHLCV / Series / ndarray → tuple mô tả hình dạng + digest phần đầu/cuối;
+    list / tuple / dict → fingerprint từng phần tử; giá trị khác → chính nó
+    (phải hashable, ví dụ str / int / float / None).
+    """
+
+    if isinstance(obj, pd.DataFrame):
+        digest = hashlib.blake2b(digest_size=16)
+        for col in obj.columns:
+            _hash_array(digest, obj[col], tail_rows)
+        last = _last_time(obj["time"]) if "time" in obj.columns else None
+        return (
+            "frame",
+            obj.shape,
+            tuple(map(str, obj.columns)),
+            tuple(map(str, obj.dtypes)),
+            last,
+            digest.hexdigest(),
+        )
+    if isinstance(obj, OHLCV):
+        digest = hashlib.blake2b(digest_size=16)
+        fields = [f for f in ("time",) + PRICE_FIELDS if getattr(obj, f) is not None]
+        for field in fields:
+            _hash_values(digest, getattr(obj, field), tail_rows)
+        last = int(obj.time[-1]) if len(obj) else None
+        return ("ohlcv", len(obj), tuple(fields), str(obj.close.dtype), obj.tz, last, digest.hexdigest())
+    if isinstance(obj, pd.Series):
+        digest = hashlib.blake2b(digest_size=16)
+        _hash_array(digest, obj, tail_rows)
+        return ("series", len(obj), str(obj.name), str(obj.dtype), digest.hexdigest())
+    if isinstance(obj, np.ndarray):
+        digest = hashlib.blake2b(digest_size=16)
+        flat = obj.reshape(len(obj), -1) if obj.ndim else obj.reshape(1, 1)
+        digest.update(np.ascontiguousarray(flat[:1]).tobytes())
+        digest.update(np.ascontiguousarray(flat[-tail_rows:]).tobytes())
+        return ("array", obj.shape, str(obj.dtype), digest.hexdigest())
+    if isinstance(obj, (list, tuple)):
+        return (type(obj).__name__, tuple(fingerprint(v, tail_rows) for v in obj))
+    if isinstance(obj, dict):
+        return ("dict", tuple(sorted((str(k), fingerprint(v, tail_rows)) for k, v in obj.items())))
+    hash(obj)   # TypeError nếu không dùng được làm khoá
+    return obj
+
+
+def _hash_array(digest: "hashlib._Hash", series: pd.Series, tail_rows: int) -> None:
+    values = series.to_numpy()
+    if values.dtype == object or len(values) == 0:
+        # Cột object / rỗng: băm theo giá trị pandas (chậm hơn nhưng hiếm)
+        part = pd.concat([series.iloc[:1], series.iloc[-tail_rows:]])
+        digest.update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+        return
+    if values.dtype.kind == "M":
+        values = values.view(np.int64)
+    _hash_values(digest, values, tail_rows)
+
+
+def _hash_values(digest: "hashlib._Hash", values: np.ndarray, tail_rows: int) -> None:
+    digest.update(np.ascontiguousarray(values[:1]).tobytes())
+    digest.update(np.ascontiguousarray(values[-tail_rows:]).tobytes())
+
+
+def _last_time(times: pd.Series) -> int | None:
+    if len(times) == 0 or not pd.api.types.is_datetime64_any_dtype(times):
+        return None
+    return int(pd.Timestamp(times.iloc[-1]).value)
+
+
+###############################################################################
+# 2️⃣  IndicatorCache                                                         #
+###############################################################################
+
+class IndicatorCache:
+    """Bounded LRU of function results with an optional on‑disk tier.
+
+    Parameters
+    ----------
+    maxsize : int, default=512
+        Số kết quả tối đa giữ trong bộ nhớ (LRU).
+    disk_dir : str | None, default=None
+        Thư mục cho tầng đĩa; ``None`` → chỉ dùng bộ nhớ.
+    version : str, default="1"
+        Thêm vào mọi khoá; đổi khi logic chỉ báo thay đổi để bỏ cache cũ.
+    tail_rows : int, default=64
+        Số dòng cuối được băm trong fingerprint.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 512,
+        disk_dir: str | None = None,
+        version: str = "1",
+        tail_rows: int = TAIL_ROWS,
+    ) -> None:
+        self.maxsize = maxsize
+        self.disk_dir = disk_dir
+        self.version = version
+        self.tail_rows = tail_rows
+
+        self.hits = 0         # trả từ bộ nhớ
+        self.disk_hits = 0    # trả từ đĩa (rồi nạp lại vào bộ nhớ)
+        self.misses = 0       # phải tính lại
+        self.evictions = 0    # bị đẩy khỏi LRU
+
+        self._entries: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # API công khai
+    # ------------------------------------------------------------------
+    def call(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Return ``func(*args, **kwargs)``, computing it only on a cache miss."""
+
+        key = self.key(func, args, kwargs)
+        found, value = self._lookup(key)
+        if found:
+            return _detach(value)
+
+        value = func(*args, **kwargs)
+        self.put(key, value)
+        return value
+
+    def memoize(self, func: Callable) -> Callable:
+        """Decorator form of :meth:`call`."""
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            return self.call(func, *args, **kwargs)
+
+        wrapper.cache = self
+        return wrapper
+
+    def key(self, func: Callable | str, args: tuple = (), kwargs: dict | None = None) -> str:
+        """Hex key of a call (function name + fingerprint of the arguments)."""
+
+        name = func if isinstance(func, str) else f"{func.__module__}.{func.__qualname__}"
+        parts = (
+            self.version,
+            name,
+            fingerprint(tuple(args), self.tail_rows),
+            fingerprint(dict(kwargs or {}), self.tail_rows),
+        )
+        return hashlib.blake2b(repr(parts).encode(), digest_size=20).hexdigest()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        found, value = self._lookup(key)
+        return _detach(value) if found else default
+
+    def put(self, key: str, value: Any) -> None:
+        """Store *value* under *key* in memory (and on disk if enabled)."""
+
+        value = _detach(value)
+        with self._lock:
+            self._remember(key, value)
+        if self.disk_dir is not None:
+            self._write_disk(key, value)
+
+    def stats(self) -> dict[str, float]:
+        """Return hit / disk hit / miss counters and the overall hit rate."""
+
+        with self._lock:
+            total = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "hit_rate": (self.hits + self.disk_hits) / total if total else 0.0,
+            }
+
+    def clear(self, disk: bool = False) -> None:
+        """Drop the in‑memory entries and counters (and the disk tier if *disk*)."""
+
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = self.evictions = 0
+        if disk and self.disk_dir is not None and os.path.isdir(self.disk_dir):
+            for folder, _, files in os.walk(self.disk_dir):
+                for name in files:
+                    if name.endswith(".pkl"):
+                        os.remove(os.path.join(folder, name))
+
+    # ------------------------------------------------------------------
+    # Nội bộ
+    # ------------------------------------------------------------------
+    def _lookup(self, key: str) -> tuple[bool, Any]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+
+        if self.disk_dir is not None:
+            found, value = self._read_disk(key)
+            if found:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._remember(key, value)
+                return True, value
+
+        with self._lock:
+            self.misses += 1
+        return False, None
+
+    def _remember(self, key: str, value: Any) -> None:
+        # Gọi khi đang giữ self._lock
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.pkl")
+
+    def _read_disk(self, key: str) -> tuple[bool, Any]:
+        path = self._path(key)
+        if not os.path.exists(path):
+            return False, None
+        try:
+            with open(path, "rb") as f:
+                return True, pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            # File hỏng / đang ghi dở → coi như miss
+            return False, None
+
+    def _write_disk(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+
+def _detach(value: Any) -> Any:
+    # Bản sao cho các kiểu có thể bị sửa tại chỗ; kiểu bất biến trả nguyên
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+        return value.copy()
+    if isinstance(value, list):
+        return [_detach(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _detach(v) for k, v in value.items()}
+    return value
@@ -0,0 +1,344 @@
+"""macro_panel.py
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Point‑in‑time macro panel (country × indicator × date) aligned to price bars.
+
+:func:`build_macro_panel` loads the full history of every indicator for every
+country in :data:`utils.data_loader.COUNTRY_MAP` (one representative symbol
+per country, monetary series converted to USD as‑of each observation) and
+stacks them into one ``float64`` array.
+
+Each observation is placed on the date it could have been *known*, not on
+the period it describes::
+
+    available = period start + period length + release lag
+
+(e.g. March CPI, stamped 1 March, becomes usable on 1 April + 15 days).
+TradingView does not publish release dates, so :data:`RELEASE_LAGS` is a
+conservative approximation per timeframe. The period length of a series is
+the longer of the timeframe carried for its country / indicator
+(:data:`TIMEFRAMES`, :data:`COUNTRY_TIMEFRAMES`) and the one inferred from the
+spacing of its own timestamps, so a quarterly series is never treated as
+monthly. Values are forward‑filled along
+the date axis, so the panel at date *t* holds the latest value known at *t*.
+
+:meth:`MacroPanel.align` joins the panel onto any bar calendar (daily,
+weekly, monthly, DataFrame / OHLCV / DatetimeIndex) with a vectorized as‑of
+search: a bar only sees values available at or before its own timestamp
+(the bar's open), so there is no look‑ahead. The search result of each
+calendar is cached by the hash of its timestamps, so repeated alignments to
+the same bars reduce to one fancy‑indexing step.
+
+Classes / functions
+-------------------
+MacroPanel
+    ``panel.align(bars)``, ``panel.align_frame(bars, country)``,
+    ``panel.to_frame(country)``.
+build_macro_panel(countries, years, executor, usd_conversion, release_lags)
+    Download and assemble the panel.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Any, Mapping
+
+import numpy as np
+import pandas as pd
+
+from technical.ohlcv import OHLCV
+from utils.data_loader import COUNTRY_MAP, economic_indicators, load_economic_data
+
+###############################################################################
+# 1️⃣  Lịch công bố                                                          #
+###############################################################################
+# Độ dài một kỳ theo timeframe của chỉ số
+PERIODS: dict[str, pd.DateOffset] = {
+    "1M": pd.DateOffset(months=1),
+    "3M": pd.DateOffset(months=3),
+    "12M": pd.DateOffset(years=1),
+}
+
+# Độ trễ công bố sau khi kỳ kết thúc (xấp xỉ, thận trọng)
+RELEASE_LAGS: dict[str, pd.Timedelta] = {
+    "1M": pd.Timedelta(days=15),
+    "3M": pd.Timedelta(days=30),
+    "12M": pd.Timedelta(days=90),
+}
+
+# Timeframe mặc định của từng chỉ số
+TIMEFRAMES: dict[str, str] = {name: tf for name, (_, tf) in economic_indicators("US").items()}
+
+# Chỉ số công bố theo quý ở một số quốc gia (như manifest của get_data.py)
+COUNTRY_TIMEFRAMES: dict[tuple[str, str], str] = {
+    ("AU", "Inflation_Rate"): "3M",
+    ("AU", "CPI"): "3M",
+    ("NZ", "Inflation_Rate"): "3M",
+    ("NZ", "CPI"): "3M",
+    ("NZ", "PPI"): "3M",
+    ("NZ", "Unemployment"): "3M",
+}
+
+# Khoảng cách trung vị tối đa (ngày) giữa hai quan sát của mỗi timeframe
+_SPACING_DAYS: dict[str, int] = {"1M": 40, "3M": 120}
+
+###############################################################################
+# 2️⃣  MacroPanel                                                             #
+###############################################################################
+
+class MacroPanel:
+    """Forward‑filled ``(country × indicator × date)`` array of known values.
+
+    Parameters
+    ----------
+    countries : tuple[str, ...]
+        Mã quốc gia theo trục 0 (``"EU"``, ``"GB"``…).
+    indicators : tuple[str, ...]
+        Tên chỉ số theo trục 1.
+    times : numpy.ndarray
+        Ngày công bố (int64 ns UTC, tăng dần) theo trục 2.
+    values : numpy.ndarray
+        Mảng ``(len(countries), len(indicators), len(times))``; NaN khi chưa
+        có giá trị nào được công bố.
+    cache_size : int, default=32
+        Số lịch bar giữ kết quả tra cứu as‑of.
+    """
+
+    def __init__(
+        self,
+        countries: tuple[str, ...],
+        indicators: tuple[str, ...],
+        times: np.ndarray,
+        values: np.ndarray,
+        cache_size: int = 32,
+    ) -> None:
+        times = np.ascontiguousarray(times, dtype=np.int64)
+        if values.shape != (len(countries), len(indicators), len(times)):
+            raise ValueError("values must have shape (countries, indicators, times)")
+        if len(times) > 1 and (np.diff(times) <= 0).any():
+            raise ValueError("times must be strictly increasing")
+        self.countries = tuple(countries)
+        self.indicators = tuple(indicators)
+        self.times = times
+        # Lưu theo ngày (date, country, indicator) để tra cứu lấy cả dòng liền
+        # nhau; dòng 0 toàn NaN: bar trước lần công bố đầu tiên trỏ vào đây
+        rows = np.moveaxis(values.astype(np.float64), 2, 0)
+        self._rows = np.concatenate([np.full((1,) + rows.shape[1:], np.nan), rows])
+        self._rows.flags.writeable = False
+        self.cache_size = cache_size
+        self._positions: OrderedDict[tuple[int, str], np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def values(self) -> np.ndarray:
+        """Read‑only ``(country, indicator, date)`` view."""
+
+        return self._rows[1:].transpose(1, 2, 0)
+
+    # ------------------------------------------------------------------
+    # Dựng panel
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_economic_data(
+        cls,
+        data: Mapping[str, Mapping[str, pd.DataFrame | None]],
+        release_lags: Mapping[str, pd.Timedelta] | None = None,
+        value: str = "close",
+    ) -> "MacroPanel":
+        """Stack ``{country: load_economic_data(...)}`` into a point‑in‑time panel.
+
+        Parameters
+        ----------
+        data : dict[str, dict[str, DataFrame]]
+            Mỗi quốc gia → ``{tên chỉ số: DataFrame có cột time + value}``.
+        release_lags : dict[str, Timedelta] | None
+            Độ trễ công bố theo timeframe (mặc định :data:`RELEASE_LAGS`).
+        value : str, default="close"
+            Cột dùng làm giá trị của chỉ số.
+        """
+
+        lags = {**RELEASE_LAGS, **(release_lags or {})}
+        countries = tuple(data)
+        names = [n for n in TIMEFRAMES if any(n in (frames or {}) for frames in data.values())]
+        names += [n for frames in data.values() for n in (frames or {}) if n not in names]
+        indicators = tuple(dict.fromkeys(names))
+        slot = {name: i for i, name in enumerate(indicators)}
+
+        series: list[tuple[int, int, np.ndarray, np.ndarray]] = []
+        for c, country in enumerate(countries):
+            for name, df in (data[country] or {}).items():
+                if df is None or df.empty:
+                    continue
+                period = pd.DatetimeIndex(pd.to_datetime(df["time"], utc=True))
+                tf = _timeframe(country, name, period)
+                available = (period + PERIODS[tf] + lags[tf]).as_unit("ns").asi8
+                order = np.argsort(available, kind="stable")
+                series.append((c, slot[name], available[order], df[value].to_numpy(dtype=float)[order]))
+
+        times = np.unique(np.concatenate([s[2] for s in series])) if series else np.empty(0, np.int64)
+        values = np.full((len(countries), len(indicators), len(times)), np.nan)
+        for c, i, available, vals in series:
+            values[c, i, np.searchsorted(times, available)] = vals
+        return cls(countries, indicators, times, _ffill(values))
+
+    # ------------------------------------------------------------------
+    # Ghép vào lịch bar
+    # ------------------------------------------------------------------
+    def positions(self, bars: Any) -> np.ndarray:
+        """Index (into :attr:`times`, ``-1`` = nothing known yet) for every bar.
+
+        Kết quả được cache theo hash của dãy timestamp, nên gọi lại với cùng
+        lịch bar chỉ tốn chi phí băm.
+        """
+
+        ns = _bar_ns(bars)
+        key = (len(ns), hashlib.blake2b(ns.tobytes(), digest_size=16).hexdigest())
+        with self._lock:
+            cached = self._positions.get(key)
+            if cached is not None:
+                self._positions.move_to_end(key)
+                return cached
+
+        # Giá trị công bố tại hoặc trước thời điểm mở bar → không nhìn trước
+        pos = np.searchsorted(self.times, ns, side="right") - 1
+        pos.flags.writeable = False
+        with self._lock:
+            self._positions[key] = pos
+            while len(self._positions) > self.cache_size:
+                self._positions.popitem(last=False)
+        return pos
+
+    def align(
+        self,
+        bars: Any,
+        countries: str | list[str] | None = None,
+        indicators: str | list[str] | None = None,
+    ) -> np.ndarray:
+        """Return ``(country, indicator, bar)`` values known at each bar.
+
+        Parameters
+        ----------
+        bars : DataFrame | OHLCV | DatetimeIndex | Series | ndarray
+            Lịch bar (cột ``time`` nếu là DataFrame).
+        countries, indicators : str | list[str] | None
+            Lọc trục quốc gia / chỉ số (mặc định: tất cả).
+        """
+
+        rows = self._rows
+        if countries is not None or indicators is not None:
+            rows = rows[:, _select(self.countries, countries)][:, :, _select(self.indicators, indicators)]
+        return rows[self.positions(bars) + 1].transpose(1, 2, 0)
+
+    def align_frame(self, bars: Any, country: str, indicators: list[str] | None = None) -> pd.DataFrame:
+        """Indicators of *country* as columns next to *bars* (same index / length)."""
+
+        names = list(self.indicators if indicators is None else indicators)
+        values = self.align(bars, [country], names)[0].T
+        index = bars.index if isinstance(bars, (pd.DataFrame, pd.Series)) else None
+        return pd.DataFrame(values, columns=names, index=index)
+
+    def to_frame(self, country: str) -> pd.DataFrame:
+        """Point‑in‑time table of *country*: one row per release date."""
+
+        df = pd.DataFrame(self.values[self.countries.index(country)].T, columns=list(self.indicators))
+        df.insert(0, "time", pd.DatetimeIndex(self.times.view("datetime64[ns]")).tz_localize("UTC"))
+        return df
+
+    def nbytes(self) -> int:
+        return self._rows.nbytes + self.times.nbytes
+
+    def __repr__(self) -> str:
+        span = ""
+        if len(self.times):
+            first = pd.Timestamp(int(self.times[0]), tz="UTC").date()
+            last = pd.Timestamp(int(self.times[-1]), tz="UTC").date()
+            span = f", {first} → {last}"
+        return (f"MacroPanel({len(self.countries)} countries × {len(self.indicators)} indicators × "
+                f"{len(self.times)} dates{span})")
+
+
+def _timeframe(country: str, name: str, period: pd.DatetimeIndex) -> str:
+    """Longer of the carried timeframe and the one implied by *period* spacing."""
+
+    tf = COUNTRY_TIMEFRAMES.get((country, name), TIMEFRAMES.get(name, "1M"))
+    if len(period) > 1:
+        spacing = np.median(np.diff(np.sort(period.as_unit("ns").asi8))) / 86_400e9
+        inferred = next((t for t, days in _SPACING_DAYS.items() if spacing <= days), "12M")
+        tf = max(tf, inferred, key=list(PERIODS).index)
+    return tf
+
+
+def _ffill(values: np.ndarray) -> np.ndarray:
+    # Forward‑fill theo trục cuối, không vòng lặp Python
+    idx = np.where(np.isnan(values), 0, np.arange(values.shape[-1]))
+    np.maximum.accumulate(idx, axis=-1, out=idx)
+    # Trước giá trị đầu tiên idx = 0 → vẫn NaN
+    return np.take_along_axis(values, idx, axis=-1)
+
+
+def _select(labels: tuple[str, ...], chosen: str | list[str] | None) -> list[int]:
+    if chosen is None:
+        return list(range(len(labels)))
+    if isinstance(chosen, str):
+        chosen = [chosen]
+    return [labels.index(label) for label in chosen]
+
+
+def _bar_ns(bars: Any) -> np.ndarray:
+    """int64 nanosecond UTC timestamps of a bar calendar."""
+
+    if isinstance(bars, OHLCV):
+        return bars.time
+    if isinstance(bars, pd.DataFrame):
+        bars = bars["time"]
+    if isinstance(bars, np.ndarray) and bars.dtype == np.int64:
+        return bars
+    if not pd.api.types.is_datetime64_any_dtype(bars):
+        bars = pd.to_datetime(bars, utc=True)
+    # Cột đã là datetime: lấy thẳng int64 (tz‑aware → UTC; naive coi như UTC)
+    index = pd.DatetimeIndex(bars)
+    return index.as_unit("ns").asi8
+
+###############################################################################
+# 3️⃣  Tải + dựng panel                                                       #
+###############################################################################
+
+def build_macro_panel(
+    countries: list[str] | None = None,
+    years: int = 30,
+    executor: Executor | None = None,
+    usd_conversion: str = "asof",
+    release_lags: Mapping[str, pd.Timedelta] | None = None,
+) -> MacroPanel:
+    """Load the full indicator history of every country and build the panel.
+
+    Parameters
+    ----------
+    countries : list[str] | None
+        Mã quốc gia (mặc định: mọi quốc gia trong ``COUNTRY_MAP``).
+    years : int, default=30
+        Số năm lịch sử cho mỗi chỉ số (``years × 12`` bar tháng).
+    executor : concurrent.futures.Executor | None
+        Tải các chỉ số của một quốc gia song song.
+    usd_conversion : {"asof", "latest"}, default="asof"
+        Cách quy đổi chỉ số tiền tệ sang USD (xem :func:`load_economic_data`).
+    release_lags : dict[str, Timedelta] | None
+        Ghi đè :data:`RELEASE_LAGS`.
+    """
+
+    # Một symbol đại diện cho mỗi quốc gia (ưu tiên spot, đứng trước trong map)
+    representative: dict[str, str] = {}
+    for symbol, (code, _) in COUNTRY_MAP.items():
+        representative.setdefault(code, symbol)
+    codes = list(representative) if countries is None else countries
+    unknown = [code for code in codes if code not in representative]
+    if unknown:
+        raise ValueError(f"Countries not in country_map: {unknown}")
+
+    data = {
+        code: load_economic_data(representative[code], years * 12, executor, usd_conversion)
+        for code in codes
+    }
+    return MacroPanel.from_economic_data(data, release_lags)
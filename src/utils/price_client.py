@@ -0,0 +1,705 @@
+"""price_client.py
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Pooled TradingView price‑source client.
+
+``price_loaders.tradingview.load_asset_price`` opens a new WebSocket for every
+call (TCP + TLS + upgrade + auth), which dominates the small macro requests.
+:class:`PriceClient` keeps a pool of authenticated sessions and reuses them:
+
+* a **session** is one WebSocket connection to the chart data feed;
+* several ``(symbol, bars, timeframe)`` requests are **multiplexed** over one
+  session, each in its own chart session (``cs_*``), and are answered
+  concurrently by the server;
+* a batch is split across up to ``pool_size`` sessions that stay open
+  between calls; a session that breaks is discarded and a batch that failed
+  on a reused (possibly stale) session is retried once on a fresh one.
+
+``PriceClient.fetch`` has the ``load_asset_price`` signature and returns the
+same frame (``time`` UTC + open / high / low / close / volume), so it plugs
+into :class:`~utils.bar_cache.BarCache`, the request scheduler and
+:mod:`utils.data_loader` unchanged. Only the standard library is used for the
+WebSocket transport.
+
+:class:`LocalTradingViewServer` is a local stand‑in that speaks the same
+subset of the protocol with a configurable handshake cost and per‑request
+latency, so :func:`compare_connection_modes` can benchmark the pool offline.
+
+Classes / functions
+-------------------
+PriceClient
+    ``client.fetch(...)``, ``client.fetch_many({key: request})``,
+    ``client.stats()``, ``client.close()``.
+SessionPool / Session
+    Pool of reusable sessions / one multiplexed connection.
+LocalTradingViewServer
+    Offline stand‑in server (``with LocalTradingViewServer() as server``).
+compare_connection_modes(requests, …)
+    Time "one connection per request" against the pooled client.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import itertools
+import json
+import os
+import re
+import socket
+import socketserver
+import ssl
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Hashable, Iterator
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+TV_URL = "wss://data.tradingview.com/socket.io/websocket"
+TV_HEADERS = {"Origin": "https://www.tradingview.com"}
+ANON_TOKEN = "unauthorized_user_token"
+
+Request = tuple[str, int, str]
+
+###############################################################################
+# 1️⃣  WebSocket tối giản (RFC 6455) dùng chung cho client và server         #
+###############################################################################
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_OP_CONT, _OP_TEXT, _OP_CLOSE, _OP_PING, _OP_PONG = 0x0, 0x1, 0x8, 0x9, 0xA
+
+
+def _accept_key(key: str) -> str:
+    return base64.b64encode(hashlib.sha1((key + _WS_GUID).encode()).digest()).decode()
+
+
+def _xor(data: bytes, mask: bytes) -> bytes:
+    n = len(data)
+    pad = (mask * (n // 4 + 1))[:n]
+    return (int.from_bytes(data, "big") ^ int.from_bytes(pad, "big")).to_bytes(n, "big")
+
+
+def _write_frame(sock: socket.socket, opcode: int, payload: bytes, mask: bool) -> None:
+    n = len(payload)
+    head = bytearray([0x80 | opcode])
+    bit = 0x80 if mask else 0
+    if n < 126:
+        head.append(bit | n)
+    elif n < 1 << 16:
+        head += bytes([bit | 126]) + n.to_bytes(2, "big")
+    else:
+        head += bytes([bit | 127]) + n.to_bytes(8, "big")
+    if mask:
+        key = os.urandom(4)
+        head += key
+        payload = _xor(payload, key)
+    sock.sendall(bytes(head) + payload)
+
+
+class _Reader:
+    """Buffered exact reads over a socket."""
+
+    def __init__(self, sock: socket.socket, buffer: bytes = b"") -> None:
+        self.sock = sock
+        self.buffer = bytearray(buffer)
+
+    def exact(self, n: int) -> bytes:
+        while len(self.buffer) < n:
+            chunk = self.sock.recv(max(65536, n - len(self.buffer)))
+            if not chunk:
+                raise ConnectionError("connection closed by peer")
+            self.buffer += chunk
+        data = bytes(self.buffer[:n])
+        del self.buffer[:n]
+        return data
+
+    def frame(self) -> tuple[bool, int, bytes]:
+        b0, b1 = self.exact(2)
+        n = b1 & 0x7F
+        if n == 126:
+            n = int.from_bytes(self.exact(2), "big")
+        elif n == 127:
+            n = int.from_bytes(self.exact(8), "big")
+        key = self.exact(4) if b1 & 0x80 else None
+        payload = self.exact(n)
+        return bool(b0 & 0x80), b0 & 0x0F, _xor(payload, key) if key else payload
+
+
+class WebSocket:
+    """Blocking text WebSocket client (``ws://`` or ``wss://``)."""
+
+    def __init__(self, url: str, headers: dict[str, str] | None = None, timeout: float = 20.0) -> None:
+        parts = urlsplit(url)
+        secure = parts.scheme == "wss"
+        host = parts.hostname or "localhost"
+        port = parts.port or (443 if secure else 80)
+        sock = socket.create_connection((host, port), timeout=timeout)
+        if secure:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=host)
+        self.sock = sock
+        self.timeout = timeout
+        self._send_lock = threading.Lock()
+
+        key = base64.b64encode(os.urandom(16)).decode()
+        lines = [
+            f"GET {parts.path or '/'}{'?' + parts.query if parts.query else ''} HTTP/1.1",
+            f"Host: {host}:{port}",
+            "Upgrade: websocket",
+            "Connection: Upgrade",
+            f"Sec-WebSocket-Key: {key}",
+            "Sec-WebSocket-Version: 13",
+        ] + [f"{k}: {v}" for k, v in (headers or {}).items()]
+        sock.sendall(("\r\n".join(lines) + "\r\n\r\n").encode())
+
+        raw = b""
+        while b"\r\n\r\n" not in raw:
+            chunk = sock.recv(4096)
+            if not chunk:
+                raise ConnectionError("handshake failed: connection closed")
+            raw += chunk
+        head, rest = raw.split(b"\r\n\r\n", 1)
+        status, *fields = head.decode("latin-1").split("\r\n")
+        reply = {k.strip().lower(): v.strip() for k, v in (f.split(":", 1) for f in fields if ":" in f)}
+        if " 101 " not in status + " " or reply.get("sec-websocket-accept") != _accept_key(key):
+            sock.close()
+            raise ConnectionError(f"WebSocket upgrade refused: {status}")
+        self._reader = _Reader(sock, rest)
+
+    def send(self, text: str) -> None:
+        with self._send_lock:
+            _write_frame(self.sock, _OP_TEXT, text.encode("utf-8"), mask=True)
+
+    def recv(self, timeout: float | None = None) -> str:
+        """Read one text message; *timeout* caps this read (default: the connect timeout)."""
+
+        self.sock.settimeout(self.timeout if timeout is None else min(timeout, self.timeout))
+        parts: list[bytes] = []
+        while True:
+            fin, opcode, payload = self._reader.frame()
+            if opcode == _OP_PING:
+                with self._send_lock:
+                    _write_frame(self.sock, _OP_PONG, payload, mask=True)
+                continue
+            if opcode == _OP_PONG:
+                continue
+            if opcode == _OP_CLOSE:
+                raise ConnectionError("connection closed by server")
+            parts.append(payload)
+            if fin:
+                return b"".join(parts).decode("utf-8")
+
+    def close(self) -> None:
+        try:
+            with self._send_lock:
+                _write_frame(self.sock, _OP_CLOSE, b"", mask=True)
+        except OSError:
+            pass
+        self.sock.close()
+
+###############################################################################
+# 2️⃣  Khung tin nhắn TradingView (``~m~<len>~m~<json>``)                     #
+###############################################################################
+_FRAME = re.compile(r"~m~(\d+)~m~")
+
+
+def encode(method: str, params: list) -> str:
+    """Wrap one ``{"m": method, "p": params}`` message in TradingView framing."""
+
+    return _wrap(json.dumps({"m": method, "p": params}, separators=(",", ":")))
+
+
+def decode(text: str) -> list[str]:
+    """Split a WebSocket payload into the framed messages it contains."""
+
+    messages, pos = [], 0
+    while True:
+        match = _FRAME.match(text, pos)
+        if match is None:
+            return messages
+        start = match.end()
+        pos = start + int(match.group(1))
+        messages.append(text[start:pos])
+
+
+def _wrap(payload: str) -> str:
+    return f"~m~{len(payload)}~m~{payload}"
+
+###############################################################################
+# 3️⃣  Session – một kết nối, nhiều request song song                         #
+###############################################################################
+_ERRORS = {"symbol_error": ValueError, "series_error": ValueError, "critical_error": RuntimeError}
+
+
+class Session:
+    """One authenticated connection that multiplexes chart requests.
+
+    Parameters
+    ----------
+    url : str
+        Địa chỉ WebSocket của data feed.
+    token : str
+        Token xác thực (mặc định: người dùng ẩn danh).
+    timeout : float
+        Thời gian chờ tối đa (giây) cho mỗi lần đọc socket.
+    batch_timeout : float
+        Thời gian tối đa (giây) cho cả một lượt :meth:`fetch_many`. Heartbeat
+        làm mới timeout đọc socket nên chỉ timeout đọc thì một lượt có thể
+        treo mãi; quá hạn → ``TimeoutError`` và session bị bỏ.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, url: str = TV_URL, token: str = ANON_TOKEN, timeout: float = 20.0,
+                 headers: dict[str, str] | None = None, batch_timeout: float = 120.0) -> None:
+        self.ws = WebSocket(url, headers=TV_HEADERS if headers is None else headers, timeout=timeout)
+        self.batch_timeout = batch_timeout
+        self.ws.send(encode("set_auth_token", [token]))
+        self.uses = 0
+        self.last_used = time.monotonic()
+
+    def fetch_many(self, requests: list[Request], tz: str | None = None) -> list[Any]:
+        """Run every request concurrently on this connection.
+
+        Returns one item per request: a DataFrame, or the exception of a
+        request the server rejected (e.g. unknown symbol). Transport errors
+        are raised – the session must then be discarded. ``TimeoutError``
+        is raised when the whole batch takes longer than ``batch_timeout``.
+        """
+
+        deadline = time.monotonic() + self.batch_timeout
+        charts: dict[str, dict[str, Any]] = {}
+        for i, (tv_symbol, bars, timeframe) in enumerate(requests):
+            cs = f"cs_{next(self._ids):06d}"
+            charts[cs] = {"index": i, "rows": {}, "error": None}
+            symbol = "=" + json.dumps({"symbol": tv_symbol, "adjustment": "splits"})
+            self.ws.send(
+                encode("chart_create_session", [cs, ""])
+                + encode("resolve_symbol", [cs, "sds_sym_1", symbol])
+                + encode("create_series", [cs, "sds_1", "s1", "sds_sym_1", timeframe, int(bars), ""])
+            )
+
+        pending = set(charts)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"batch of {len(requests)} requests not completed after {self.batch_timeout}s")
+            for message in decode(self.ws.recv(timeout=remaining)):
+                if message.startswith("~h~"):
+                    # Heartbeat: gửi lại nguyên văn để giữ kết nối
+                    self.ws.send(_wrap(message))
+                    continue
+                data = json.loads(message)
+                params = data.get("p") or []
+                cs = params[0] if params and isinstance(params[0], str) else None
+                if cs not in charts:
+                    continue
+                method = data.get("m")
+                if method in ("timescale_update", "du"):
+                    series = params[1].get("sds_1", {}) if len(params) > 1 and isinstance(params[1], dict) else {}
+                    for bar in series.get("s", []):
+                        charts[cs]["rows"][bar["i"]] = bar["v"]
+                elif method == "series_completed":
+                    pending.discard(cs)
+                elif method in _ERRORS:
+                    charts[cs]["error"] = _ERRORS[method](f"{method}: {requests[charts[cs]['index']][0]} {params[1:]}")
+                    pending.discard(cs)
+
+        # Đóng chart session để kết nối sạch cho lần dùng sau
+        self.ws.send("".join(encode("chart_delete_session", [cs]) for cs in charts))
+        self.uses += 1
+        self.last_used = time.monotonic()
+
+        results: list[Any] = [None] * len(requests)
+        for chart in charts.values():
+            results[chart["index"]] = chart["error"] or _to_frame(chart["rows"], tz)
+        return results
+
+    def close(self) -> None:
+        self.ws.close()
+
+
+def _to_frame(rows: dict[int, list], tz: str | None) -> pd.DataFrame:
+    columns = ["open", "high", "low", "close", "volume"]
+    if not rows:
+        return pd.DataFrame({"time": pd.DatetimeIndex([], tz="UTC"), **{c: [] for c in columns}})
+    values = np.full((len(rows), 6), np.nan)
+    for k, i in enumerate(sorted(rows)):
+        bar = rows[i][:6]
+        values[k, :len(bar)] = bar
+    times = pd.to_datetime(values[:, 0], unit="s", utc=True).as_unit("ns")
+    df = pd.DataFrame({"time": times.tz_convert(tz) if tz else times})
+    for j, col in enumerate(columns, start=1):
+        df[col] = values[:, j]
+    return df
+
+###############################################################################
+# 4️⃣  SessionPool                                                            #
+###############################################################################
+
+class SessionPool:
+    """Bounded pool of reusable :class:`Session` objects.
+
+    Parameters
+    ----------
+    factory : callable
+        Tạo một Session mới (đã kết nối + xác thực).
+    size : int, default=4
+        Số kết nối tối đa mở cùng lúc.
+    max_idle : float, default=60
+        Kết nối nhàn rỗi lâu hơn (giây) bị đóng thay vì dùng lại.
+    """
+
+    def __init__(self, factory: Callable[[], Session], size: int = 4, max_idle: float = 60.0) -> None:
+        self.factory = factory
+        self.size = max(size, 1)
+        self.max_idle = max_idle
+        self.opened = 0
+        self.reused = 0
+        self.discarded = 0
+        self._idle: deque[Session] = deque()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def session(self, fresh: bool = False) -> Iterator[Session]:
+        """Borrow a session; it returns to the pool unless an error escaped."""
+
+        with self._slots:
+            session = None if fresh else self._pop_idle()
+            if session is None:
+                session = self.factory()
+                with self._lock:
+                    self.opened += 1
+            try:
+                yield session
+            except BaseException:
+                with self._lock:
+                    self.discarded += 1
+                session.close()
+                raise
+            with self._lock:
+                self._idle.append(session)
+
+    def _pop_idle(self) -> Session | None:
+        with self._lock:
+            while self._idle:
+                session = self._idle.pop()
+                if time.monotonic() - session.last_used <= self.max_idle:
+                    self.reused += 1
+                    return session
+                session.close()
+        return None
+
+    def close(self) -> None:
+        with self._lock:
+            while self._idle:
+                self._idle.pop().close()
+
+###############################################################################
+# 5️⃣  PriceClient                                                            #
+###############################################################################
+
+class PriceClient:
+    """``load_asset_price`` replacement backed by a :class:`SessionPool`.
+
+    Parameters
+    ----------
+    url : str, default=TV_URL
+        Địa chỉ data feed (hoặc ``LocalTradingViewServer.url``).
+    pool_size : int, default=4
+        Số kết nối giữ mở / dùng song song.
+    batch_size : int, default=8
+        Số request ghép trên một kết nối trong một lượt.
+    timeout : float, default=20
+        Timeout đọc socket (giây).
+    batch_timeout : float, default=120
+        Thời gian tối đa cho một lượt request trên một kết nối (giây).
+    token : str
+        Token xác thực TradingView.
+    max_idle : float, default=60
+        Thời gian nhàn rỗi tối đa của một kết nối trước khi bị đóng.
+    """
+
+    def __init__(
+        self,
+        url: str = TV_URL,
+        pool_size: int = 4,
+        batch_size: int = 8,
+        timeout: float = 20.0,
+        token: str = ANON_TOKEN,
+        max_idle: float = 60.0,
+        batch_timeout: float = 120.0,
+    ) -> None:
+        self.url = url
+        self.batch_size = max(batch_size, 1)
+        self.pool = SessionPool(
+            lambda: Session(url, token, timeout, batch_timeout=batch_timeout),
+            size=pool_size,
+            max_idle=max_idle,
+        )
+        self.requests = 0
+        self.batches = 0
+        self._lock = threading.Lock()
+
+    def fetch(self, tv_symbol: str, bars: int, timeframe: str, tz: str | None = None) -> pd.DataFrame:
+        """Same signature and output as ``load_asset_price``."""
+
+        return self.fetch_many({0: (tv_symbol, bars, timeframe)}, tz)[0]
+
+    def fetch_many(self, requests: dict[Hashable, Request], tz: str | None = None) -> dict[Hashable, pd.DataFrame]:
+        """Fetch every ``key → (symbol, bars, timeframe)`` request.
+
+        Requests are grouped in batches of ``batch_size`` that run on up to
+        ``pool_size`` sessions at once. The first request error is raised
+        after every batch finished, as with the serial loader.
+        """
+
+        keys = list(requests)
+        batches = [keys[i:i + self.batch_size] for i in range(0, len(keys), self.batch_size)]
+        if len(batches) <= 1:
+            done = [self._run_batch([requests[k] for k in batch], tz) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.pool.size, len(batches))) as pool:
+                done = list(pool.map(lambda batch: self._run_batch([requests[k] for k in batch], tz), batches))
+
+        results = {k: v for batch, values in zip(batches, done) for k, v in zip(batch, values)}
+        for value in results.values():
+            if isinstance(value, BaseException):
+                raise value
+        return results
+
+    def stats(self) -> dict[str, int]:
+        """Requests / batches sent and connections opened / reused / discarded."""
+
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "connections": self.pool.opened,
+            "reused": self.pool.reused,
+            "discarded": self.pool.discarded,
+        }
+
+    def close(self) -> None:
+        self.pool.close()
+
+    def __enter__(self) -> "PriceClient":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _run_batch(self, batch: list[Request], tz: str | None) -> list[Any]:
+        with self._lock:
+            self.requests += len(batch)
+            self.batches += 1
+        reused = False
+        try:
+            with self.pool.session() as session:
+                reused = session.uses > 0
+                return session.fetch_many(batch, tz)
+        except (OSError, ConnectionError):
+            # Kết nối cũ có thể đã bị server đóng → thử lại một lần trên kết nối mới
+            if not reused:
+                raise
+            with self.pool.session(fresh=True) as session:
+                return session.fetch_many(batch, tz)
+
+###############################################################################
+# 6️⃣  Server giả lập (benchmark offline)                                     #
+###############################################################################
+
+class LocalTradingViewServer:
+    """Local stand‑in for the TradingView chart feed.
+
+    Parameters
+    ----------
+    handshake_delay : float, default=0.15
+        Độ trễ mô phỏng TCP + TLS + xác thực cho mỗi kết nối mới (giây).
+    latency : float, default=0.02
+        Độ trễ trả lời mỗi request (các request trên cùng kết nối chạy song song).
+    host, port : str, int
+        Địa chỉ lắng nghe (``port=0`` → cổng ngẫu nhiên).
+
+    Symbol bắt đầu bằng ``BAD`` trả về ``symbol_error``.
+    """
+
+    def __init__(self, handshake_delay: float = 0.15, latency: float = 0.02,
+                 host: str = "127.0.0.1", port: int = 0) -> None:
+        self.handshake_delay = handshake_delay
+        self.latency = latency
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        owner = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self) -> None:
+                owner._serve(self.request)
+
+        class Server(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self._server = Server((host, port), Handler)
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"ws://{host}:{port}/socket.io/websocket"
+
+    def start(self) -> "LocalTradingViewServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "LocalTradingViewServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def _serve(self, sock: socket.socket) -> None:
+        raw = b""
+        while b"\r\n\r\n" not in raw:
+            chunk = sock.recv(4096)
+            if not chunk:
+                return
+            raw += chunk
+        head, rest = raw.split(b"\r\n\r\n", 1)
+        fields = dict(
+            (k.strip().lower(), v.strip())
+            for k, v in (line.split(":", 1) for line in head.decode("latin-1").split("\r\n")[1:] if ":" in line)
+        )
+        time.sleep(self.handshake_delay)
+        sock.sendall((
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {_accept_key(fields.get('sec-websocket-key', ''))}\r\n\r\n"
+        ).encode())
+        with self._lock:
+            self.connections += 1
+
+        lock = threading.Lock()
+        symbols: dict[str, str] = {}
+
+        def send(text: str) -> None:
+            with lock:
+                _write_frame(sock, _OP_TEXT, text.encode("utf-8"), mask=False)
+
+        def reply(cs: str, tv_symbol: str, bars: int, timeframe: str) -> None:
+            try:
+                if tv_symbol.startswith("BAD"):
+                    send(encode("symbol_error", [cs, "sds_sym_1", "invalid symbol"]))
+                    return
+                rows = [{"i": i, "v": v} for i, v in enumerate(_synthetic_bars(tv_symbol, bars, timeframe))]
+                send(encode("timescale_update", [cs, {"sds_1": {"s": rows}}]))
+                send(encode("series_completed", [cs, "sds_1", "streaming"]))
+            except OSError:
+                pass
+
+        send(_wrap(json.dumps({"session_id": "local"})))
+        reader = _Reader(sock, rest)
+        try:
+            while True:
+                _, opcode, payload = reader.frame()
+                if opcode == _OP_CLOSE:
+                    return
+                if opcode != _OP_TEXT:
+                    continue
+                for message in decode(payload.decode("utf-8")):
+                    if message.startswith("~h~"):
+                        continue
+                    data = json.loads(message)
+                    params = data.get("p", [])
+                    if data.get("m") == "resolve_symbol":
+                        symbols[params[0]] = json.loads(params[2][1:])["symbol"]
+                    elif data.get("m") == "create_series":
+                        cs, timeframe, bars = params[0], params[4], params[5]
+                        with self._lock:
+                            self.requests += 1
+                        timer = threading.Timer(self.latency, reply, (cs, symbols.get(cs, ""), bars, timeframe))
+                        timer.daemon = True
+                        timer.start()
+        except (ConnectionError, OSError):
+            return
+        finally:
+            sock.close()
+
+
+
+def _synthetic_bars(tv_symbol: str, bars: int, timeframe: str) -> list[list[float]]:
+    freq = {"1D": "D", "1W": "W-MON", "1M": "MS", "3M": "QS", "12M": "YS"}.get(timeframe, "D")
+    times = pd.date_range(end=pd.Timestamp("2025-01-01", tz="UTC"), periods=int(bars), freq=freq)
+    # Như nguồn thật: chỉ trả phần lịch sử tồn tại (ở đây từ 1970)
+    times = times[times >= pd.Timestamp("1970-01-01", tz="UTC")]
+    seed = int.from_bytes(hashlib.md5(tv_symbol.encode()).digest()[:4], "big")
+    close = 1.0 + np.cumsum(np.random.default_rng(seed).normal(0, 0.01, len(times)))
+    seconds = times.as_unit("s").asi8
+    return [[int(t), c, c + 0.005, c - 0.005, c, 0.0] for t, c in zip(seconds, close)]
+
+###############################################################################
+# 7️⃣  Benchmark                                                              #
+###############################################################################
+
+def compare_connection_modes(
+    requests: list[Request],
+    url: str | None = None,
+    pool_size: int = 4,
+    batch_size: int = 8,
+    handshake_delay: float = 0.15,
+    latency: float = 0.02,
+) -> dict[str, float]:
+    """Time one connection per request against :class:`PriceClient`.
+
+    Không có *url* → chạy trên :class:`LocalTradingViewServer` với
+    *handshake_delay* / *latency*. Cả hai chế độ dùng *pool_size* luồng.
+
+    Returns
+    -------
+    dict[str, float]
+        ``{"per_request": s, "pooled": s, "speedup": ratio, "connections": n}``.
+    """
+
+    server = None
+    if url is None:
+        server = LocalTradingViewServer(handshake_delay, latency).start()
+        url = server.url
+
+    def once(request: Request) -> pd.DataFrame:
+        # Giống load_asset_price: mở kết nối, xác thực, tải, đóng
+        session = Session(url)
+        try:
+            return session.fetch_many([request])[0]
+        finally:
+            session.close()
+
+    try:
+        timings: dict[str, float] = {}
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=pool_size) as pool:
+            list(pool.map(once, requests))
+        timings["per_request"] = time.perf_counter() - started
+
+        with PriceClient(url, pool_size=pool_size, batch_size=batch_size) as client:
+            started = time.perf_counter()
+            client.fetch_many(dict(enumerate(requests)))
+            timings["pooled"] = time.perf_counter() - started
+            timings["connections"] = client.stats()["connections"]
+    finally:
+        if server is not None:
+            server.stop()
+
+    timings["speedup"] = timings["per_request"] / timings["pooled"] if timings["pooled"] else float("nan")
+    print(
+        f"⏱️ per-request={timings['per_request']:.2f}s  pooled={timings['pooled']:.2f}s  "
+        f"speedup×{timings['speedup']:.1f} ({len(requests)} requests, "
+        f"{timings['connections']:.0f} connections)"
+    )
+    return timings
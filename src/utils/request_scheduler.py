@@ -0,0 +1,417 @@
+"""request_scheduler.py
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Central, rate‑limit‑aware scheduler for TradingView requests (prices and
+economic indicators).
+
+Every request is queued with a priority (:data:`PRICE` before
+:data:`MACRO`) and executed by a small pool of worker threads. Before each
+attempt a worker takes a token from a shared token bucket (``rate``
+requests / second, bursts up to ``burst``), so raising the number of
+concurrent callers never exceeds the allowed rate. Transient errors are
+retried with jittered exponential backoff ("full jitter": a random delay in
+``[0, min(max_delay, base_delay · 2^attempt)]``); a request only fails after
+``max_retries`` retries, so a throttled burst no longer leaves holes in the
+dataset. Latency, attempts and queueing time are recorded per request.
+
+:class:`FakeSource` is a local stand‑in for ``load_asset_price`` that
+injects latency, random failures and a server‑side rate limit, for testing
+the scheduler without network access.
+
+Classes
+-------
+TokenBucket
+    Thread‑safe token bucket.
+RequestScheduler
+    ``scheduler.submit(...) → Future`` / ``scheduler.fetch(...)`` (same
+    signature as ``load_asset_price``) and ``scheduler.stats()``.
+FakeSource
+    Fake ``load_asset_price`` with configurable latency / failures.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import CancelledError, Future
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+###############################################################################
+# 1️⃣  Độ ưu tiên                                                             #
+###############################################################################
+PRICE = 0   # giá được xếp trước
+MACRO = 1   # chỉ số vĩ mô / tỷ giá quy đổi
+
+Fetcher = Callable[[str, int, str, None], "pd.DataFrame | None"]
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Default retry predicate: programming / argument errors are not retried.
+
+    ``KeyboardInterrupt`` / ``SystemExit`` (không phải ``Exception``) cũng
+    không bao giờ được thử lại.
+    """
+
+    if not isinstance(exc, Exception):
+        return False
+    return not isinstance(exc, (ValueError, TypeError, KeyError, AttributeError))
+
+###############################################################################
+# 2️⃣  TokenBucket                                                            #
+###############################################################################
+
+class TokenBucket:
+    """Token bucket refilled at *rate* tokens / second, holding at most *burst*.
+
+    Parameters
+    ----------
+    rate : float
+        Số request mỗi giây được phép về lâu dài.
+    burst : float | None, default=None
+        Số token tối đa (mặc định bằng ``max(rate, 1)``).
+    """
+
+    def __init__(self, rate: float, burst: float | None = None, clock: Callable[[], float] = time.monotonic) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(rate, 1.0))
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token; return the seconds to wait before using it (0 if none).
+
+        Token được "đặt trước" kể cả khi phải chờ, nên các thread xếp hàng
+        theo thứ tự gọi và tổng tốc độ không vượt quá *rate*.
+        """
+
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        """Block until a token is available; return the time spent waiting."""
+
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+###############################################################################
+# 3️⃣  RequestScheduler                                                       #
+###############################################################################
+
+class RequestScheduler:
+    """Priority queue of fetches run by worker threads behind a token bucket.
+
+    Parameters
+    ----------
+    fetch : callable | None
+        Hàm có chữ ký ``load_asset_price(symbol, bars, timeframe, None)``;
+        mặc định là ``price_loaders.tradingview.load_asset_price``.
+    rate : float, default=4
+        Số request / giây tối đa (token bucket).
+    burst : float | None, default=None
+        Kích thước bucket (mặc định bằng *rate*).
+    workers : int, default=8
+        Số request đang bay tối đa.
+    max_retries : int, default=4
+        Số lần thử lại tối đa cho lỗi tạm thời.
+    base_delay, max_delay : float, default=0.5, 30
+        Tham số backoff luỹ thừa (giây).
+    retry_if : callable, default=:func:`is_transient`
+        Nhận exception, trả True nếu nên thử lại.
+    seed : int | None
+        Seed cho jitter (tái lập được trong test).
+    """
+
+    def __init__(
+        self,
+        fetch: Fetcher | None = None,
+        rate: float = 4.0,
+        burst: float | None = None,
+        workers: int = 8,
+        max_retries: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        retry_if: Callable[[BaseException], bool] = is_transient,
+        seed: int | None = None,
+    ) -> None:
+        if fetch is None:
+            from price_loaders.tradingview import load_asset_price as fetch
+        self._fetch = fetch
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_if = retry_if
+        self._random = random.Random(seed)
+
+        # Hàng đợi: (thời điểm sẵn sàng > 0 nếu đang backoff, priority, seq, job)
+        self._queue: list[tuple[float, int, int, dict]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self._metrics: list[dict[str, Any]] = []
+        self._metrics_lock = threading.Lock()
+        self._started = time.monotonic()
+
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"scheduler-{i}", daemon=True)
+            for i in range(max(workers, 1))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    # ------------------------------------------------------------------
+    # API công khai
+    # ------------------------------------------------------------------
+    def submit(self, tv_symbol: str, bars: int, timeframe: str, priority: int = PRICE) -> Future:
+        """Queue one request and return a :class:`Future` of its DataFrame."""
+
+        future: Future = Future()
+        job = {
+            "request": (tv_symbol, bars, timeframe),
+            "priority": priority,
+            "future": future,
+            "attempts": 0,
+            "queued_at": time.monotonic(),
+            "errors": [],
+        }
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("RequestScheduler is closed")
+            self._push(job, ready_at=0.0)
+        return future
+
+    def fetch(self, tv_symbol: str, bars: int, timeframe: str, _: Any = None, priority: int = PRICE) -> pd.DataFrame | None:
+        """Blocking call with the ``load_asset_price`` signature."""
+
+        return self.submit(tv_symbol, bars, timeframe, priority).result()
+
+    def fetcher(self, priority: int) -> Fetcher:
+        """``load_asset_price``‑compatible callable bound to *priority*."""
+
+        return lambda tv_symbol, bars, timeframe, _=None: self.fetch(tv_symbol, bars, timeframe, priority=priority)
+
+    def stats(self) -> dict[str, float]:
+        """Counters and latency percentiles (seconds) of finished requests."""
+
+        with self._metrics_lock:
+            metrics = list(self._metrics)
+        latency = np.array([m["latency"] for m in metrics if m["ok"]])
+        if not len(latency):
+            latency = np.array([np.nan])
+        elapsed = time.monotonic() - self._started
+        attempts = sum(m["attempts"] for m in metrics)
+        return {
+            "requests": len(metrics),
+            "succeeded": sum(m["ok"] for m in metrics),
+            "failed": sum(not m["ok"] for m in metrics),
+            "attempts": attempts,
+            "retries": attempts - len(metrics),
+            "latency_p50": float(np.percentile(latency, 50)),
+            "latency_p95": float(np.percentile(latency, 95)),
+            "latency_max": float(latency.max()),
+            "queue_wait_mean": float(np.mean([m["queue_wait"] for m in metrics])) if metrics else float("nan"),
+            "attempt_rate": attempts / elapsed if elapsed > 0 else float("nan"),
+        }
+
+    def metrics(self) -> pd.DataFrame:
+        """One row per finished request (symbol, priority, attempts, latency…)."""
+
+        with self._metrics_lock:
+            return pd.DataFrame(self._metrics)
+
+    def close(self, wait: bool = True) -> None:
+        """Stop accepting requests; with *wait* finish the queued ones first."""
+
+        with self._cond:
+            self._closed = True
+            if not wait:
+                for _, _, _, job in self._queue:
+                    # Job đang chờ backoff đã RUNNING → không cancel() được
+                    if not job["future"].cancel():
+                        job["future"].set_exception(CancelledError())
+                self._queue.clear()
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self) -> "RequestScheduler":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Nội bộ
+    # ------------------------------------------------------------------
+    def _push(self, job: dict, ready_at: float) -> None:
+        # Gọi khi đang giữ self._cond
+        heapq.heappush(self._queue, (ready_at, job["priority"], next(self._seq), job))
+        self._cond.notify()
+
+    def _next_job(self) -> dict | None:
+        """Pop the highest‑priority job that is ready (None when closed and empty)."""
+
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                ready = [entry for entry in self._queue if entry[0] <= now]
+                if ready:
+                    # Trong các job đã sẵn sàng: ưu tiên theo priority rồi thứ tự gửi
+                    entry = min(ready, key=lambda e: (e[1], e[2]))
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    return entry[3]
+                if self._closed and not self._queue:
+                    return None
+                timeout = self._queue[0][0] - now if self._queue else None
+                self._cond.wait(timeout)
+
+    def _worker(self) -> None:
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            # Job quay lại sau backoff đã ở trạng thái RUNNING
+            if job["attempts"] == 0 and not job["future"].set_running_or_notify_cancel():
+                continue
+            self._run(job)
+
+    def _run(self, job: dict) -> None:
+        job["attempts"] += 1
+        throttled = self.bucket.acquire()
+        if job["attempts"] == 1:
+            job["queue_wait"] = time.monotonic() - job["queued_at"] - throttled
+        started = time.monotonic()
+        try:
+            result = self._fetch(*job["request"], None)
+        except Exception as exc:  # quyết định retry bên dưới
+            job["errors"].append(repr(exc))
+            if job["attempts"] > self.max_retries or not self.retry_if(exc):
+                self._fail(job, exc, started)
+                return
+            delay = self._backoff(job["attempts"])
+            # Đưa lại vào hàng đợi: worker được thả cho job khác trong lúc chờ backoff
+            with self._cond:
+                self._push(job, ready_at=time.monotonic() + delay)
+            return
+        except BaseException as exc:
+            # KeyboardInterrupt / SystemExit: không retry, báo cho future rồi ném tiếp
+            job["errors"].append(repr(exc))
+            self._fail(job, exc, started)
+            raise
+        self._record(job, ok=True, latency=time.monotonic() - started)
+        job["future"].set_result(result)
+
+    def _fail(self, job: dict, exc: BaseException, started: float) -> None:
+        self._record(job, ok=False, latency=time.monotonic() - started)
+        job["future"].set_exception(exc)
+
+    def _backoff(self, attempt: int) -> float:
+        cap = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return self._random.uniform(0, cap)
+
+    def _record(self, job: dict, ok: bool, latency: float) -> None:
+        tv_symbol, bars, timeframe = job["request"]
+        with self._metrics_lock:
+            self._metrics.append({
+                "symbol": tv_symbol,
+                "bars": bars,
+                "timeframe": timeframe,
+                "priority": job["priority"],
+                "ok": ok,
+                "attempts": job["attempts"],
+                "latency": latency,
+                "queue_wait": job.get("queue_wait", 0.0),
+                "total": time.monotonic() - job["queued_at"],
+                "errors": job["errors"],
+            })
+
+###############################################################################
+# 4️⃣  FakeSource                                                             #
+###############################################################################
+
+class ThrottledError(ConnectionError):
+    """Raised by :class:`FakeSource` when its server‑side rate limit is exceeded."""
+
+
+class FakeSource:
+    """Local stand‑in for ``load_asset_price`` that injects latency and failures.
+
+    Parameters
+    ----------
+    latency : float, default=0.05
+        Độ trễ trung bình mỗi request (giây, phân phối mũ quanh giá trị này).
+    failure_rate : float, default=0.0
+        Xác suất một request ném ``ConnectionError``.
+    rate_limit : float | None, default=None
+        Nếu có: server từ chối (``ThrottledError``) khi số request trong cửa
+        sổ 1 giây gần nhất vượt quá giá trị này.
+    seed : int | None
+        Seed của bộ sinh ngẫu nhiên.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        failure_rate: float = 0.0,
+        rate_limit: float | None = None,
+        seed: int | None = None,
+    ) -> None:
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rate_limit = rate_limit
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._recent: list[float] = []
+        self.calls: list[tuple[float, str]] = []
+        self.throttled = 0
+        self.failures = 0
+
+    def __call__(self, tv_symbol: str, bars: int, timeframe: str, _: Any = None) -> pd.DataFrame:
+        now = time.monotonic()
+        with self._lock:
+            self.calls.append((now, tv_symbol))
+            self._recent = [t for t in self._recent if now - t < 1.0]
+            self._recent.append(now)
+            throttled = self.rate_limit is not None and len(self._recent) > self.rate_limit
+            failed = not throttled and self._random.random() < self.failure_rate
+            delay = self._random.expovariate(1 / self.latency) if self.latency > 0 else 0.0
+            if throttled:
+                self.throttled += 1
+            elif failed:
+                self.failures += 1
+
+        time.sleep(delay)
+        if throttled:
+            raise ThrottledError(f"429 Too Many Requests ({tv_symbol})")
+        if failed:
+            raise ConnectionError(f"connection reset ({tv_symbol})")
+        return _fake_bars(tv_symbol, bars, timeframe)
+
+
+def _fake_bars(tv_symbol: str, bars: int, timeframe: str) -> pd.DataFrame:
+    freq = {"1D": "D", "1W": "W-MON", "1M": "MS", "3M": "QS", "12M": "YS"}.get(timeframe, "D")
+    time_index = pd.date_range(end=pd.Timestamp("2025-01-01", tz="UTC"), periods=bars, freq=freq)
+    close = 1.0 + np.cumsum(np.random.default_rng(abs(hash(tv_symbol)) % 2**32).normal(0, 0.01, bars))
+    return pd.DataFrame({
+        "time": time_index,
+        "open": close, "high": close, "low": close, "close": close,
+        "volume": np.zeros(bars),
+    })
@@ -0,0 +1,196 @@
+"""resampling.py
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Rebuild weekly / monthly OHLCV bars from daily bars so that every symbol needs
+a single daily download.
+
+TradingView stamps a daily bar with the *open* of its trading session, e.g.
+FX sessions open at 17:00 New York → ``21:00``/``22:00`` UTC on the previous
+calendar day. The session date is therefore recovered as
+``(time + session_offset).date()``. Higher timeframe bars are grouped by:
+
+* **1W** – ISO week (Monday → Sunday) of the session date; the bar is stamped
+  with the session open of that Monday, even when Monday is a holiday.
+* **1M** – calendar month of the session date; the bar is stamped with the
+  session open of the first weekday of the month (first calendar day for
+  instruments that trade on weekends, e.g. crypto).
+
+Functions
+---------
+resample_ohlcv(daily, timeframe, session_offset, drop_partial)
+    Vectorised OHLCV aggregation of daily bars into ``"1W"`` or ``"1M"`` bars.
+
+compare_resampled(local, downloaded, rtol)
+    Validation mode: diff locally built bars against downloaded ones.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+# Lệch giờ cộng vào timestamp bar để ra ngày phiên (21:00 UTC CN → thứ Hai)
+SESSION_OFFSET = pd.Timedelta(hours=6)
+
+_NS_PER_DAY = 86_400 * 10**9
+_OHLCV = ("open", "high", "low", "close", "volume")
+
+###############################################################################
+# 1️⃣  Hàm resample_ohlcv                                                     #
+###############################################################################
+
+def resample_ohlcv(
+    daily: pd.DataFrame,
+    timeframe: str,
+    session_offset: pd.Timedelta = SESSION_OFFSET,
+    drop_partial: bool = True,
+) -> pd.DataFrame:
+    """Aggregate *daily* bars into TradingView‑aligned ``"1W"`` / ``"1M"`` bars.
+
+    Parameters
+    ----------
+    daily : pandas.DataFrame
+        Bar ngày với các cột ``time, open, high, low, close`` (``volume`` tuỳ
+        chọn), ``time`` là giờ mở phiên.
+    timeframe : {"1W", "1M"}
+        Khung thời gian cần dựng.
+    session_offset : pandas.Timedelta, default=6h
+        Khoảng cộng vào ``time`` để suy ra ngày phiên giao dịch.
+    drop_partial : bool, default=True
+        Bỏ nhóm đầu tiên nếu dữ liệu ngày bắt đầu giữa tuần / tháng (bar đó sẽ
+        thiếu phần đầu nên không khớp với bar tải về).
+
+    Returns
+    -------
+    pandas.DataFrame
+        Cùng cấu trúc cột với *daily*, mỗi dòng là một bar tuần / tháng.
+    """
+
+    if timeframe not in ("1W", "1M"):
+        raise ValueError(f"Unsupported timeframe '{timeframe}' (expected '1W' or '1M').")
+
+    df = daily.sort_values("time", kind="stable")
+    times = pd.to_datetime(df["time"], utc=True).to_numpy(dtype="datetime64[ns]")
+    if len(times) == 0:
+        return df.iloc[0:0].copy()
+
+    # --------------- 1.1. Ngày phiên & mốc đầu kỳ --------------------------
+    t_ns = times.view("int64")
+    session = (times + session_offset.to_timedelta64()).astype("datetime64[D]")
+    session_days = session.view("int64")
+    weekday = (session_days + 3) % 7          # 1970‑01‑01 là thứ Năm → thứ Hai = 0
+    trades_weekends = bool((weekday >= 5).any())
+
+    if timeframe == "1W":
+        period = session - weekday.astype("timedelta64[D]")
+        anchor = period
+    else:
+        period = session.astype("datetime64[M]").astype("datetime64[D]")
+        anchor = period if trades_weekends else np.busday_offset(period, 0, roll="forward")
+
+    # --------------- 1.2. Biên nhóm & gộp OHLCV ----------------------------
+    starts = np.flatnonzero(np.r_[True, period[1:] != period[:-1]])
+    ends = np.r_[starts[1:], len(df)] - 1
+
+    out: dict[str, np.ndarray] = {}
+    # Nhãn = giờ mở phiên của ngày neo, dùng cùng độ lệch giờ với bar đầu nhóm
+    open_offset = t_ns[starts] - session_days[starts] * _NS_PER_DAY
+    label_ns = anchor[starts].astype("datetime64[D]").view("int64") * _NS_PER_DAY + open_offset
+    out["time"] = pd.to_datetime(label_ns, utc=True)
+
+    # Như bar tải về / DataFrame.resample: NaN trong một bar ngày bị bỏ qua,
+    # không lan ra cả tuần / tháng (nhóm toàn NaN → NaN, volume → 0)
+    columns = [c for c in df.columns if c != "time"]
+    for col in columns:
+        values = df[col].to_numpy()
+        if values.dtype.kind != "f":
+            out[col] = values[starts] if col == "open" else values[ends]
+        elif col == "high":
+            out[col] = np.fmax.reduceat(values, starts)
+        elif col == "low":
+            out[col] = np.fmin.reduceat(values, starts)
+        elif col == "volume":
+            out[col] = np.add.reduceat(np.nan_to_num(values, nan=0.0), starts)
+        else:  # open: giá trị hợp lệ đầu nhóm; close và cột khác: hợp lệ cuối nhóm
+            out[col] = _valid_edge(values, starts, ends, first=col == "open")
+
+    result = pd.DataFrame(out, columns=["time", *columns])
+
+    if drop_partial and session[starts[0]] > anchor[starts[0]]:
+        result = result.iloc[1:]
+
+    return result.reset_index(drop=True)
+
+
+def _valid_edge(values: np.ndarray, starts: np.ndarray, ends: np.ndarray, first: bool) -> np.ndarray:
+    """First / last non‑NaN value of every ``[start, end]`` group (NaN if none)."""
+
+    pos = np.arange(len(values))
+    valid = ~np.isnan(values)
+    if first:
+        edge = np.minimum.reduceat(np.where(valid, pos, len(values)), starts)
+        found = edge <= ends
+    else:
+        edge = np.maximum.reduceat(np.where(valid, pos, -1), starts)
+        found = edge >= starts
+    return np.where(found, values[np.where(found, edge, 0)], np.nan)
+
+###############################################################################
+# 2️⃣  Hàm compare_resampled (validation mode)                                #
+###############################################################################
+
+def compare_resampled(
+    local: pd.DataFrame,
+    downloaded: pd.DataFrame,
+    rtol: float = 1e-9,
+) -> pd.DataFrame:
+    """Diff locally built bars against *downloaded* ones on their common span.
+
+    Parameters
+    ----------
+    local : pandas.DataFrame
+        Kết quả của :func:`resample_ohlcv`.
+    downloaded : pandas.DataFrame
+        Bar cùng timeframe tải từ TradingView.
+    rtol : float, default=1e-9
+        Sai số tương đối cho phép giữa hai giá trị.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Một dòng cho mỗi bar lệch, gồm ``time``, ``status``
+        (``"missing_local"``, ``"missing_downloaded"`` hoặc ``"mismatch"``)
+        và cặp cột ``<col>_local`` / ``<col>_downloaded``. Rỗng nếu khớp hoàn
+        toàn.
+    """
+
+    left = local.assign(time=pd.to_datetime(local["time"], utc=True))
+    right = downloaded.assign(time=pd.to_datetime(downloaded["time"], utc=True))
+
+    # Chỉ so sánh phần giao nhau về thời gian
+    lo = max(left["time"].min(), right["time"].min())
+    hi = min(left["time"].max(), right["time"].max())
+    left = left[(left["time"] >= lo) & (left["time"] <= hi)]
+    right = right[(right["time"] >= lo) & (right["time"] <= hi)]
+
+    merged = left.merge(
+        right, on="time", how="outer", suffixes=("_local", "_downloaded"), indicator=True
+    ).sort_values("time")
+
+    cols = [c for c in _OHLCV if f"{c}_local" in merged and f"{c}_downloaded" in merged]
+    status = np.where(
+        merged["_merge"] == "left_only",
+        "missing_downloaded",
+        np.where(merged["_merge"] == "right_only", "missing_local", ""),
+    ).astype(object)
+
+    both = (merged["_merge"] == "both").to_numpy()
+    differs = np.zeros(len(merged), dtype=bool)
+    for col in cols:
+        a = merged[f"{col}_local"].to_numpy(dtype="float64")
+        b = merged[f"{col}_downloaded"].to_numpy(dtype="float64")
+        differs |= ~np.isclose(a, b, rtol=rtol, atol=0.0, equal_nan=True)
+    status[both & differs] = "mismatch"
+
+    merged.insert(1, "status", status)
+    keep = ["time", "status"] + [f"{c}_{side}" for c in cols for side in ("local", "downloaded")]
+    return merged.loc[merged["status"] != "", keep].reset_index(drop=True)
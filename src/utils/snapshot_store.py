@@ -0,0 +1,346 @@
+"""snapshot_store.py
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Columnar on‑disk snapshot of a ``load_portfolio_data`` result, replacing the
+pickled ``forex_data.pkl`` / ``legacy_fut.pkl`` files used by the notebooks.
+
+A snapshot is a directory with one ``.npy`` file per column of every
+symbol / dataset / table, plus a JSON manifest::
+
+    <root>/manifest.json
+    <root>/EURUSD/asset_data/1D_data/c000.npy      # time (int64 ns UTC)
+    <root>/EURUSD/asset_data/1D_data/c001.npy      # open
+    <root>/EURUSD/economic_data/CPI/…
+    <root>/EURUSD/cot_data/…
+    <root>/cot/manifest.json + markets/*.npz       # legacy_fut as a CotStore
+
+Numeric / datetime / categorical columns are plain ``.npy`` arrays opened
+with ``mmap_mode="c"`` (copy‑on‑write), so a frame is backed by the page
+cache instead of being read eagerly; writes to a loaded frame stay private
+and never reach the files. Object (string) columns are stored as JSON lists. The
+row index is not stored (frames come back with a ``RangeIndex``).
+
+:meth:`SnapshotStore.load` returns the same nested dict shape as
+``load_portfolio_data`` but *lazily*: nothing is read until a symbol /
+dataset / table is actually touched, so a report over one symbol only pays
+for that symbol. ``legacy_fut`` is kept as a :class:`~utils.cot_store.CotStore`
+(only the columns ``load_cot_data`` uses), which ``load_portfolio_data``
+accepts directly.
+
+Classes
+-------
+SnapshotStore
+    ``SnapshotStore.write(root, data, legacy_fut)`` writes a snapshot,
+    ``SnapshotStore(root).load()`` returns the lazy nested dict and
+    ``.cot_store()`` the COT store.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from collections.abc import Mapping
+from typing import Any, Callable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from technical.ohlcv import OHLCV
+from utils.cot_store import CotStore
+
+MANIFEST_VERSION = 1
+
+###############################################################################
+# 1️⃣  Dict lười (lazy)                                                       #
+###############################################################################
+
+class LazyDict(Mapping):
+    """Read‑only mapping whose values are produced by a loader on first access.
+
+    Giá trị đã nạp được giữ lại; ``loaded()`` cho biết key nào đã đọc. Khi
+    pickle (ví dụ gửi sang process con) toàn bộ được nạp thành ``dict`` thường.
+    """
+
+    def __init__(self, loaders: dict[str, Callable[[], Any]]) -> None:
+        self._loaders = loaders
+        self._values: dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key: str) -> Any:
+        with self._lock:
+            if key not in self._values:
+                self._values[key] = self._loaders[key]()
+            return self._values[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._loaders)
+
+    def __len__(self) -> int:
+        return len(self._loaders)
+
+    def __repr__(self) -> str:
+        return f"LazyDict({list(self._loaders)}, loaded={self.loaded()})"
+
+    def loaded(self) -> list[str]:
+        return [k for k in self._loaders if k in self._values]
+
+    def materialize(self) -> dict[str, Any]:
+        """Load everything and return plain nested ``dict`` objects."""
+
+        return {k: v.materialize() if isinstance(v, LazyDict) else v for k, v in self.items()}
+
+    def __reduce__(self):
+        return (dict, (self.materialize(),))
+
+###############################################################################
+# 2️⃣  SnapshotStore                                                          #
+###############################################################################
+
+class SnapshotStore:
+    """Directory of columnar ``.npy`` tables described by ``manifest.json``.
+
+    Parameters
+    ----------
+    root : str
+        Thư mục snapshot.
+    mmap : bool, default=True
+        Mở cột số bằng ``np.load(mmap_mode="c")`` (copy‑on‑write, sửa không
+        ghi xuống file); ``False`` → đọc hẳn vào bộ nhớ.
+    """
+
+    def __init__(self, root: str, mmap: bool = True) -> None:
+        self.root = root
+        self.mmap = mmap
+        path = os.path.join(root, "manifest.json")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No snapshot manifest at {path}")
+        with open(path, encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"Unsupported snapshot version {self.manifest.get('version')}")
+
+    # ------------------------------------------------------------------
+    # Ghi
+    # ------------------------------------------------------------------
+    @classmethod
+    def write(
+        cls,
+        root: str,
+        data: Mapping[str, Mapping[str, Any]],
+        legacy_fut: pd.DataFrame | CotStore | None = None,
+    ) -> "SnapshotStore":
+        """Write *data* (``load_portfolio_data`` output) and *legacy_fut* under *root*.
+
+        Parameters
+        ----------
+        data : dict
+            ``{symbol: {"asset_data": {...}, "economic_data": {...},
+            "cot_data": DataFrame}}``; giá có thể là DataFrame hoặc
+            :class:`~technical.ohlcv.OHLCV`, giá trị ``None`` được giữ nguyên.
+        legacy_fut : pandas.DataFrame | CotStore | None
+            Bảng COT gốc (chỉ giữ cột mà ``load_cot_data`` dùng) hoặc store có sẵn.
+        """
+
+        os.makedirs(root, exist_ok=True)
+        symbols: dict[str, dict] = {}
+        used: set[str] = set()
+        for symbol, datasets in data.items():
+            folder = _unique_name(symbol, used)
+            symbols[symbol] = {
+                "dir": folder,
+                "datasets": _write_node(os.path.join(root, folder), datasets),
+            }
+
+        cot = None
+        if legacy_fut is None:
+            pass
+        elif isinstance(legacy_fut, CotStore):
+            # Nạp mọi partition rồi ghi sang snapshot, giữ nguyên root của store gốc
+            for market in legacy_fut.markets:
+                legacy_fut.partition(market)
+            previous = legacy_fut.root
+            legacy_fut.save(os.path.join(root, "cot"))
+            legacy_fut.root = previous
+            cot = "cot"
+        else:
+            CotStore.from_legacy(legacy_fut, os.path.join(root, "cot"))
+            cot = "cot"
+
+        manifest = {"version": MANIFEST_VERSION, "symbols": symbols, "cot": cot}
+        path = os.path.join(root, "manifest.json")
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp, path)
+        return cls(root)
+
+    # ------------------------------------------------------------------
+    # Đọc
+    # ------------------------------------------------------------------
+    @property
+    def symbols(self) -> list[str]:
+        return list(self.manifest["symbols"])
+
+    def load(self, symbols: list[str] | None = None, ohlcv: bool = False) -> LazyDict:
+        """Return ``{symbol: {dataset: …}}`` in the ``load_portfolio_data`` shape.
+
+        Mọi cấp đều lười: bảng chỉ được mở khi truy cập lần đầu.
+
+        Parameters
+        ----------
+        symbols : list[str] | None
+            Chỉ các symbol này (mặc định: tất cả, theo thứ tự đã ghi).
+        ohlcv : bool, default=False
+            Trả ``asset_data`` dưới dạng :class:`~technical.ohlcv.OHLCV` dựng
+            thẳng trên mảng memory‑mapped (không sao chép).
+        """
+
+        names = self.symbols if symbols is None else list(symbols)
+        for name in names:
+            if name not in self.manifest["symbols"]:
+                raise KeyError(f"Symbol '{name}' is not in the snapshot.")
+        return LazyDict({name: self._symbol_loader(name, ohlcv) for name in names})
+
+    def cot_store(self) -> CotStore | None:
+        """Open the stored ``legacy_fut`` as a :class:`CotStore` (``None`` if absent)."""
+
+        if not self.manifest.get("cot"):
+            return None
+        return CotStore.open(os.path.join(self.root, self.manifest["cot"]))
+
+    def nbytes(self, symbol: str | None = None) -> int:
+        """Size on disk of one symbol (or of the whole snapshot)."""
+
+        folder = self.root if symbol is None else os.path.join(self.root, self.manifest["symbols"][symbol]["dir"])
+        return sum(
+            os.path.getsize(os.path.join(path, name))
+            for path, _, files in os.walk(folder)
+            for name in files
+        )
+
+    # ------------------------------------------------------------------
+    # Nội bộ
+    # ------------------------------------------------------------------
+    def _symbol_loader(self, symbol: str, ohlcv: bool) -> Callable[[], LazyDict]:
+        entry = self.manifest["symbols"][symbol]
+        folder = os.path.join(self.root, entry["dir"])
+        bar_keys = {"asset_data"} if ohlcv else set()
+        return lambda: self._node(folder, entry["datasets"], bar_keys=bar_keys)
+
+    def _node(self, path: str, node: dict | None, bars: bool = False, bar_keys: set[str] = frozenset()) -> Any:
+        if node is None:
+            return None
+        if node["kind"] == "table":
+            return self._read_table(path, node, bars)
+        return LazyDict({
+            key: (lambda child=child, key=key: self._node(
+                os.path.join(path, child["dir"]) if child else path, child, bars or key in bar_keys))
+            for key, child in node["items"].items()
+        })
+
+    def _read_table(self, path: str, node: dict, bars: bool) -> pd.DataFrame | OHLCV:
+        specs = {spec["name"]: spec for spec in node["columns"]}
+        columns = {name: self._read_column(path, spec) for name, spec in specs.items()}
+        if bars:
+            # OHLCV dựng thẳng trên mảng memory-mapped (đúng dtype → không sao chép)
+            return OHLCV(
+                columns["time"], columns["open"], columns["high"], columns["low"], columns["close"],
+                columns.get("volume"), specs["time"].get("tz"),
+            )
+        return pd.DataFrame({name: _to_pandas(columns[name], spec) for name, spec in specs.items()}, copy=False)
+
+    def _read_column(self, path: str, spec: dict) -> np.ndarray | list:
+        file = os.path.join(path, spec["file"])
+        if spec["kind"] == "json":
+            with open(file, encoding="utf-8") as f:
+                return json.load(f)
+        return np.load(file, mmap_mode="c" if self.mmap else None)
+
+###############################################################################
+# 3️⃣  Helper nội bộ: ghi cột                                                 #
+###############################################################################
+
+def _write_node(path: str, value: Any) -> dict | None:
+    """Write a nested dict / table and return its manifest node."""
+
+    if value is None:
+        return None
+    if isinstance(value, (pd.DataFrame, OHLCV)):
+        return _write_table(path, value.to_frame() if isinstance(value, OHLCV) else value)
+    if isinstance(value, Mapping):
+        items: dict[str, dict | None] = {}
+        used: set[str] = set()
+        for key, child in value.items():
+            folder = _unique_name(str(key), used)
+            node = _write_node(os.path.join(path, folder), child)
+            if node is not None:
+                node["dir"] = folder
+            items[str(key)] = node
+        return {"kind": "dict", "items": items}
+    raise TypeError(f"Cannot snapshot value of type {type(value).__name__}")
+
+
+def _write_table(path: str, df: pd.DataFrame) -> dict:
+    os.makedirs(path, exist_ok=True)
+    specs = []
+    for j, name in enumerate(df.columns):
+        series = df[name]
+        spec: dict[str, Any] = {"name": str(name)}
+        if isinstance(series.dtype, pd.DatetimeTZDtype) or pd.api.types.is_datetime64_dtype(series.dtype):
+            tz = str(series.dt.tz) if series.dt.tz is not None else None
+            values = series.astype("datetime64[ns, UTC]" if tz else "datetime64[ns]").array.asi8
+            spec.update(kind="datetime", tz=tz)
+        elif isinstance(series.dtype, pd.CategoricalDtype):
+            values = series.cat.codes.to_numpy()
+            spec.update(kind="category", categories=series.cat.categories.tolist())
+        elif series.dtype.kind in "biuf":
+            values = series.to_numpy()
+            spec.update(kind="array")
+        else:
+            values = [None if v is None or (isinstance(v, float) and np.isnan(v)) else _plain(v)
+                      for v in series.tolist()]
+            spec.update(kind="json")
+
+        spec["file"] = f"c{j:03d}." + ("json" if spec["kind"] == "json" else "npy")
+        file = os.path.join(path, spec["file"])
+        if spec["kind"] == "json":
+            tmp = file + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(values, f)
+        else:
+            tmp = file + ".tmp.npy"
+            np.save(tmp, np.ascontiguousarray(values))
+        os.replace(tmp, file)
+        specs.append(spec)
+    return {"kind": "table", "rows": len(df), "columns": specs}
+
+
+def _to_pandas(values: np.ndarray | list, spec: dict) -> Any:
+    if spec["kind"] == "datetime":
+        index = pd.DatetimeIndex(np.asarray(values).view("datetime64[ns]"))
+        return index.tz_localize("UTC").tz_convert(spec["tz"]) if spec["tz"] else index
+    if spec["kind"] == "category":
+        return pd.Categorical.from_codes(np.asarray(values), spec["categories"])
+    if spec["kind"] == "json":
+        return pd.array(values, dtype=object)
+    return values
+
+
+def _plain(value: Any) -> Any:
+    # Giá trị object phải ghi được bằng JSON
+    if isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot snapshot object value of type {type(value).__name__}")
+
+
+def _unique_name(name: str, used: set[str]) -> str:
+    base = re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_") or "_"
+    folder, k = base, 1
+    while folder.lower() in used:
+        k += 1
+        folder = f"{base}_{k}"
+    used.add(folder.lower())
+    return folder
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Code nằm trong src/ và được import dạng `technical.x` / `utils.x`
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
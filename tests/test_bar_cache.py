@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils.bar_cache as bar_cache
+from utils.bar_cache import BarCache
+
+
+def _source(n, shift=0.0):
+    times = pd.date_range('2024-01-01', periods=n, freq='D', tz='UTC').as_unit('ns')
+    frame = pd.DataFrame({'time': times, 'close': np.arange(n, dtype=float) + shift})
+
+    def fetch(tv_symbol, bars, timeframe, tz):
+        return frame.tail(bars).reset_index(drop=True)
+    return frame, fetch
+
+
+def test_failed_segment_write_keeps_previous_cache(tmp_path, monkeypatch):
+    cache = BarCache(str(tmp_path), last_bar_ttl=0, segment_size=4)
+    old, fetch = _source(10)
+    cache.load('FX:EURUSD', 10, '1D', fetch)
+
+    # Nguồn sửa lại lịch sử → append ghi lại từ segment đầu; lỗi ở segment thứ hai
+    new, fetch = _source(14, shift=100.0)
+    savez = np.savez
+    calls = []
+
+    def failing_savez(path, **arrays):
+        calls.append(path)
+        if len(calls) == 2:
+            raise OSError('disk full')
+        savez(path, **arrays)
+
+    monkeypatch.setattr(bar_cache.np, 'savez', failing_savez)
+    with pytest.raises(OSError):
+        cache.load('FX:EURUSD', 10, '1D', fetch)
+    monkeypatch.setattr(bar_cache.np, 'savez', savez)
+
+    # Segment và meta cũ còn nguyên: đọc lại (trong TTL) ra đúng dữ liệu cũ
+    cache.last_bar_ttl = 1e9
+    got = cache.load('FX:EURUSD', 10, '1D', fetch)
+    pd.testing.assert_frame_equal(got, old)
+
+    cache.last_bar_ttl = 0
+    got = cache.load('FX:EURUSD', 14, '1D', fetch)
+    pd.testing.assert_frame_equal(got, new)
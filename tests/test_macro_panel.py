@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from utils.macro_panel import RELEASE_LAGS, MacroPanel
+
+
+def _series(times, values):
+    return pd.DataFrame({'time': pd.to_datetime(times, utc=True), 'close': np.asarray(values, float)})
+
+
+def _known_at(panel, country, name, when):
+    return panel.align_frame(pd.DatetimeIndex(pd.to_datetime(when, utc=True)), country)[name].to_numpy()
+
+
+def test_quarterly_series_inferred_from_spacing():
+    # CPI quý của một quốc gia không có trong bảng timeframe → suy ra từ khoảng cách
+    cpi = _series(['2023-07-01', '2023-10-01', '2024-01-01'], [1.0, 2.0, 3.0])
+    panel = MacroPanel.from_economic_data({'XX': {'CPI': cpi}})
+    available = pd.Timestamp('2024-04-01', tz='UTC') + RELEASE_LAGS['3M']
+    got = _known_at(panel, 'XX', 'CPI', [
+        '2024-02-16',  # theo kỳ 1M: đã "biết" quý I → nhìn trước
+        available - pd.Timedelta(days=1),
+        available,
+    ])
+    np.testing.assert_array_equal(got, [2.0, 2.0, 3.0])
+
+
+def test_quarterly_single_observation_uses_country_timeframe():
+    # Chỉ một quan sát (look_back_bars=1): dùng timeframe 3M của AU CPI
+    data = {'AU': {'CPI': _series(['2024-01-01'], [3.0])}, 'US': {'CPI': _series(['2024-01-01'], [5.0])}}
+    panel = MacroPanel.from_economic_data(data)
+    au = _known_at(panel, 'AU', 'CPI', ['2024-02-16', '2024-04-15', '2024-05-01'])
+    us = _known_at(panel, 'US', 'CPI', ['2024-02-15', '2024-02-16'])
+    np.testing.assert_array_equal(au, [np.nan, np.nan, 3.0])
+    np.testing.assert_array_equal(us, [np.nan, 5.0])
+
+
+def test_monthly_series_keeps_monthly_schedule():
+    cpi = _series(pd.date_range('2023-01-01', periods=12, freq='MS'), np.arange(12))
+    panel = MacroPanel.from_economic_data({'US': {'CPI': cpi}})
+    # Tháng 12/2023 công bố ngày 2024-01-16
+    got = _known_at(panel, 'US', 'CPI', ['2024-01-15', '2024-01-16'])
+    np.testing.assert_array_equal(got, [10.0, 11.0])
@@ -0,0 +1,40 @@
+import contextlib
+import io
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from reporting.summary_generator import generate_summary_report
+from technical.ohlcv import OHLCV
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'notebooks', 'eurusd.pkl')
+
+
+@pytest.mark.parametrize('unit', ['s', 'ms', 'us', 'ns'])
+@pytest.mark.parametrize('tz', ['UTC', 'Asia/Ho_Chi_Minh', None])
+def test_from_frame_keeps_epoch_for_every_unit(unit, tz):
+    times = pd.Series(pd.date_range('2024-01-01', periods=5, freq='D', tz=tz).as_unit(unit))
+    df = pd.DataFrame({'time': times, 'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.5})
+    bars = OHLCV.from_frame(df)
+    expected = pd.DatetimeIndex(times).as_unit('ns').asi8
+    np.testing.assert_array_equal(bars.time, expected)
+    assert bars.to_frame()['time'].tolist() == times.tolist()
+
+
+def _report(data, max_workers):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        generate_summary_report(data, max_workers=max_workers)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize('unit', ['s', 'us'])
+def test_parallel_summary_matches_serial_for_non_ns_times(unit):
+    with open(SAMPLE, 'rb') as f:
+        data = pickle.load(f)
+    for df in data['EURUSD']['asset_data'].values():
+        df['time'] = df['time'].dt.as_unit(unit)
+    assert _report(data, max_workers=2) == _report(data, max_workers=None)
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.resampling import SESSION_OFFSET, resample_ohlcv
+
+AGG = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+
+
+def _daily_fx(n=700, nan_rate=0.0, seed=0):
+    # Bar ngày FX: phiên mở 17:00 New York = 21:00 UTC ngày hôm trước
+    rng = np.random.default_rng(seed)
+    sessions = pd.bdate_range('2020-01-06', periods=n, tz='UTC')
+    close = 1.1 + np.cumsum(rng.normal(0, 0.005, n))
+    df = pd.DataFrame({
+        'time': sessions - pd.Timedelta(hours=3),
+        'open': close + rng.normal(0, 0.002, n),
+        'high': close + 0.01,
+        'low': close - 0.01,
+        'close': close,
+        'volume': rng.integers(100, 1000, n).astype(float),
+    })
+    if nan_rate:
+        for col in AGG:
+            df.loc[rng.random(n) < nan_rate, col] = np.nan
+    return df
+
+
+def _expected(daily, rule):
+    # Cùng phép gộp bằng DataFrame.resample trên ngày phiên (time + session offset)
+    by_session = daily.set_index(daily['time'] + SESSION_OFFSET)
+    grouped = by_session.resample(rule, closed='left', label='left')
+    expected = grouped.agg(AGG)
+    return expected[grouped.size() > 0].reset_index(drop=True)
+
+
+@pytest.mark.parametrize('timeframe, rule', [('1W', 'W-MON'), ('1M', 'MS')])
+@pytest.mark.parametrize('nan_rate', [0.0, 0.05, 0.4])
+def test_matches_dataframe_resample(timeframe, rule, nan_rate):
+    daily = _daily_fx(nan_rate=nan_rate, seed=int(nan_rate * 100))
+    got = resample_ohlcv(daily, timeframe, drop_partial=False)
+    pd.testing.assert_frame_equal(got[list(AGG)], _expected(daily, rule), check_dtype=False)
+
+
+def test_nan_day_does_not_blank_the_week():
+    daily = _daily_fx(n=10)
+    daily.loc[2, ['open', 'high', 'low', 'close']] = np.nan
+    daily.loc[0, 'open'] = np.nan
+    daily.loc[4, 'close'] = np.nan
+    week = resample_ohlcv(daily, '1W').iloc[0]
+    first_five = daily.iloc[:5]
+    assert week['open'] == first_five['open'].iloc[1]
+    assert week['high'] == first_five['high'].max()
+    assert week['low'] == first_five['low'].min()
+    assert week['close'] == first_five['close'].iloc[3]
+
+
+def test_weekly_label_is_monday_session_open():
+    daily = _daily_fx(n=15)
+    weekly = resample_ohlcv(daily, '1W')
+    assert list(weekly['time']) == list(daily['time'].iloc[[0, 5, 10]])
@@ -0,0 +1,60 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from technical.swing_detector import SwingDetector
+from technical.swing_points import SWING_WINDOWS, swing_high_low
+
+
+def _bars(rng, n, ties=False, nan_rate=0.0):
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    highs = close + rng.uniform(0, 1, n)
+    lows = close - rng.uniform(0, 1, n)
+    if ties:
+        highs, lows = np.round(highs), np.round(lows)
+    if nan_rate:
+        highs[rng.random(n) < nan_rate] = np.nan
+        lows[rng.random(n) < nan_rate] = np.nan
+    return pd.DataFrame({'high': highs, 'low': lows})
+
+
+def _batch(df, timeframe):
+    out = swing_high_low(df, timeframe)
+    return (list(np.flatnonzero(out['valid_swing_high'].to_numpy())),
+            list(np.flatnonzero(out['valid_swing_low'].to_numpy())))
+
+
+def _streamed(detector):
+    return [i for i, _, _ in detector.swing_highs()], [i for i, _, _ in detector.swing_lows()]
+
+
+@pytest.mark.parametrize('timeframe', list(SWING_WINDOWS))
+@pytest.mark.parametrize('ties, nan_rate', [(False, 0.0), (True, 0.0), (True, 0.05), (False, 0.3)])
+def test_stream_matches_batch_on_every_prefix(timeframe, ties, nan_rate):
+    rng = np.random.default_rng(len(timeframe) + int(ties) + int(nan_rate * 100))
+    for _ in range(3):
+        df = _bars(rng, 150, ties=ties, nan_rate=nan_rate)
+        detector = SwingDetector(timeframe)
+        for n in range(len(df)):
+            detector.update(df['high'].iloc[n], df['low'].iloc[n])
+            assert _streamed(detector) == _batch(df.iloc[:n + 1], timeframe)
+
+
+def test_gap_next_to_peak_matches_batch():
+    # NaN sát đỉnh (khoảng trống dữ liệu) không được che mất swing
+    highs = np.array([1, 2, 3, 4, np.nan, 9, 4, 3, 2, 1, 0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 12, 1, 1, 1, 1, 1], float)
+    df = pd.DataFrame({'high': highs, 'low': highs - 1})
+    detector = SwingDetector('D').extend(df)
+    assert _streamed(detector) == _batch(df, 'D')
+
+
+def test_state_round_trip_continues_identically():
+    rng = np.random.default_rng(3)
+    df = _bars(rng, 300, ties=True, nan_rate=0.05)
+    df['time'] = pd.date_range('2020-01-01', periods=len(df), freq='D', tz='UTC')
+    detector = SwingDetector('W').extend(df.iloc[:170])
+    restored = SwingDetector.from_dict(json.loads(json.dumps(detector.to_dict())))
+    restored.extend(df.iloc[170:])
+    assert _streamed(restored) == _batch(df, 'W')
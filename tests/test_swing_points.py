@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from technical.swing_points import SWING_WINDOWS, _filter_consecutive, raw_swing_points, swing_high_low
+
+
+def baseline_raw_swing_points(highs, lows, window):
+    """Vòng lặp gốc (trước khi vector hoá) dùng làm chuẩn so sánh."""
+    highs = pd.Series(highs, dtype=float)
+    lows = pd.Series(lows, dtype=float)
+    swing_highs = []
+    swing_lows = []
+    n = len(highs)
+    for i in range(n):
+        start = max(i - window, 0)
+        end = min(i + window + 1, n)
+
+        max_around = highs[start:i].max() if i > start else -np.inf
+        max_around = max(max_around, highs[i+1:end].max() if i+1 < end else -np.inf)
+
+        min_around = lows[start:i].min() if i > start else np.inf
+        min_around = min(min_around, lows[i+1:end].min() if i+1 < end else np.inf)
+
+        swing_highs.append(highs[i] > max_around)
+        swing_lows.append(lows[i] < min_around)
+    return np.array(swing_highs, dtype=bool), np.array(swing_lows, dtype=bool)
+
+
+def baseline_filter_consecutive(pivots, opposite, prices, is_high):
+    """Vòng lặp tham lam gốc của filter_consecutive_highs / filter_consecutive_lows."""
+    pivots = list(pivots)
+    filtered = []
+    i = 0
+    while i < len(pivots):
+        curr = pivots[i]
+        if i == len(pivots) - 1:
+            filtered.append(curr)
+            break
+        nxt = pivots[i + 1]
+        if [o for o in opposite if curr < o < nxt]:
+            filtered.append(curr)
+            i += 1
+        elif (prices[curr] > prices[nxt]) if is_high else (prices[curr] < prices[nxt]):
+            filtered.append(curr)
+            i += 2  # bỏ next
+        else:
+            i += 1  # bỏ curr, giữ next
+    if pivots and pivots[-1] not in filtered:
+        filtered.append(pivots[-1])
+    return sorted(filtered)
+
+
+def baseline_valid_swing_points(highs, lows, window):
+    """swing_high_low gốc (trước khi vector hoá): 2 mảng bool valid high / valid low."""
+    highs = np.asarray(highs, dtype=float)
+    lows = np.asarray(lows, dtype=float)
+    swing_highs, swing_lows = baseline_raw_swing_points(highs, lows, window)
+    sh_idx = list(np.flatnonzero(swing_highs))
+    sl_idx = list(np.flatnonzero(swing_lows))
+
+    def is_valid(idx, opposite, price, opposite_prices, is_high):
+        before = [o for o in opposite if o < idx]
+        after = [o for o in opposite if o > idx]
+        if not before or not after:
+            return False
+        p_before, p_after = opposite_prices[max(before)], opposite_prices[min(after)]
+        if is_high:
+            return p_before < price[idx] and p_after < price[idx]
+        return p_before > price[idx] and p_after > price[idx]
+
+    valid_highs = [i for i in sh_idx if is_valid(i, sl_idx, highs, lows, True)]
+    valid_lows = [i for i in sl_idx if is_valid(i, sh_idx, lows, highs, False)]
+    # Đỉnh lọc trước, đáy lọc dựa trên đỉnh đã lọc
+    valid_highs = baseline_filter_consecutive(valid_highs, valid_lows, highs, is_high=True)
+    valid_lows = baseline_filter_consecutive(valid_lows, valid_highs, lows, is_high=False)
+
+    n = len(highs)
+    return np.isin(np.arange(n), valid_highs), np.isin(np.arange(n), valid_lows)
+
+
+def _random_bars(rng, n, ties=False, nan_rate=0.0):
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    highs = close + rng.uniform(0, 1, n)
+    lows = close - rng.uniform(0, 1, n)
+    if ties:
+        # Làm tròn để có nhiều giá bằng nhau
+        highs, lows = np.round(highs), np.round(lows)
+    if nan_rate:
+        highs[rng.random(n) < nan_rate] = np.nan
+        lows[rng.random(n) < nan_rate] = np.nan
+    return highs, lows
+
+
+def _assert_same(highs, lows, window):
+    got_high, got_low = raw_swing_points(highs, lows, window)
+    exp_high, exp_low = baseline_raw_swing_points(highs, lows, window)
+    np.testing.assert_array_equal(got_high, exp_high)
+    np.testing.assert_array_equal(got_low, exp_low)
+
+    # Cả 4 cột của swing_high_low phải giống bản gốc từng bit
+    timeframe = {w: tf for tf, w in SWING_WINDOWS.items()}.get(window)
+    if timeframe is not None:
+        df = swing_high_low(pd.DataFrame({'high': highs, 'low': lows}), timeframe)
+        exp_valid_high, exp_valid_low = baseline_valid_swing_points(highs, lows, window)
+        np.testing.assert_array_equal(df['swing_high'].to_numpy(), exp_high)
+        np.testing.assert_array_equal(df['swing_low'].to_numpy(), exp_low)
+        np.testing.assert_array_equal(df['valid_swing_high'].to_numpy(), exp_valid_high)
+        np.testing.assert_array_equal(df['valid_swing_low'].to_numpy(), exp_valid_low)
+
+
+@pytest.mark.parametrize('window', [1, 3, 4, 5])
+@pytest.mark.parametrize('ties', [False, True])
+def test_matches_baseline_on_random_series(window, ties):
+    rng = np.random.default_rng(window * 10 + ties)
+    for _ in range(20):
+        highs, lows = _random_bars(rng, int(rng.integers(50, 400)), ties=ties)
+        _assert_same(highs, lows, window)
+
+
+@pytest.mark.parametrize('window', [1, 2, 3, 5, 8])
+def test_matches_baseline_on_edge_lengths(window):
+    # Chuỗi ngắn hơn / xấp xỉ cửa sổ: cửa sổ bị cắt ở cả hai đầu
+    rng = np.random.default_rng(window)
+    for n in range(0, 2 * window + 4):
+        for ties in (False, True):
+            highs, lows = _random_bars(rng, n, ties=ties)
+            _assert_same(highs, lows, window)
+
+
+def test_constant_series_has_no_swings():
+    highs = lows = np.full(30, 1.5)
+    swing_high, swing_low = raw_swing_points(highs, lows, 5)
+    assert not swing_high.any() and not swing_low.any()
+
+
+def test_nan_next_to_peak_matches_baseline():
+    highs = np.array([1, 2, 3, 4, np.nan, 9, 4, 3, 2, 1, 0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 12, 1, 1, 1, 1, 1], float)
+    lows = highs - 1
+    _assert_same(highs, lows, 5)
+    swing_high, _ = raw_swing_points(highs, lows, 5)
+    assert list(np.flatnonzero(swing_high)) == [5, 20]
+
+
+@pytest.mark.parametrize('nan_rate', [0.02, 0.2, 0.6])
+def test_matches_baseline_with_nans(nan_rate):
+    rng = np.random.default_rng(int(nan_rate * 100))
+    for window in (1, 3, 5):
+        for n in (0, 1, 2, 7, 60, 300):
+            highs, lows = _random_bars(rng, n, ties=True, nan_rate=nan_rate)
+            _assert_same(highs, lows, window)
+
+
+@pytest.mark.parametrize('timeframe', list(SWING_WINDOWS))
+def test_swing_high_low_columns(timeframe):
+    rng = np.random.default_rng(7)
+    highs, lows = _random_bars(rng, 500, ties=True)
+    df = swing_high_low(pd.DataFrame({'high': highs, 'low': lows}), timeframe)
+    exp_high, exp_low = baseline_raw_swing_points(highs, lows, SWING_WINDOWS[timeframe])
+    np.testing.assert_array_equal(df['swing_high'].to_numpy(), exp_high)
+    np.testing.assert_array_equal(df['swing_low'].to_numpy(), exp_low)
+    exp_valid_high, exp_valid_low = baseline_valid_swing_points(highs, lows, SWING_WINDOWS[timeframe])
+    np.testing.assert_array_equal(df['valid_swing_high'].to_numpy(), exp_valid_high)
+    np.testing.assert_array_equal(df['valid_swing_low'].to_numpy(), exp_valid_low)
+
+
+@pytest.mark.parametrize('is_high', [True, False])
+def test_filter_consecutive_matches_greedy_loop(is_high):
+    # Nhiều pivot liền nhau không có pivot đối diện ở giữa → các chuỗi "nhảy" dài
+    rng = np.random.default_rng(int(is_high))
+    for _ in range(300):
+        n = int(rng.integers(0, 40))
+        positions = np.sort(rng.choice(np.arange(200), size=2 * n, replace=False))
+        side = rng.random(2 * n) < 0.8
+        pivots, opposite = positions[side], positions[~side]
+        prices = np.round(rng.normal(0, 1, 200), 1)
+        got = _filter_consecutive(pivots, opposite, prices, is_high)
+        np.testing.assert_array_equal(got, baseline_filter_consecutive(pivots, opposite, prices, is_high))
+
+
+def test_filter_consecutive_alternating_jump_run():
+    # Đỉnh giảm dần liên tiếp: giữ 0, bỏ 1, giữ 2, bỏ 3, …, pivot cuối luôn giữ
+    pivots = np.arange(0, 14, 2)
+    prices = np.zeros(14)
+    prices[pivots] = np.arange(len(pivots), 0, -1)
+    got = _filter_consecutive(pivots, np.array([], dtype=int), prices, is_high=True)
+    assert list(got) == [0, 4, 8, 12]